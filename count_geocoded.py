@@ -1,47 +1,253 @@
+import sys
 import json
+import argparse
+from collections import Counter
 from pathlib import Path
 
-def count_geocoded_properties(geojson_path):
-    with open(geojson_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    total_features = len(data['features'])
-    
-    # Count features with valid coordinates
-    geocoded_count = 0
-    null_geometry = 0
-    invalid_coords = 0
-    
-    for feature in data['features']:
-        if feature.get('geometry') is None:
-            null_geometry += 1
-            continue
-            
-        coords = feature['geometry'].get('coordinates')
-        if not coords:
-            invalid_coords += 1
-        elif len(coords) == 2 and all(isinstance(x, (int, float)) for x in coords):
-            geocoded_count += 1
+DEFAULT_PATH = Path("data/processed/geocoded_properties.geojson")
+COLUMNS = ['district', 'building_address', 'longitude', 'latitude']
+CHUNK_CHARS = 1 << 16
+BATCH_ROWS = 65536
+
+
+class _Stats:
+    """Running totals, updated one feature (or one batch of rows) at a time."""
+
+    def __init__(self):
+        self.total = 0
+        self.geocoded = 0
+        self.null_geometry = 0
+        self.invalid_coords = 0
+        self.failure_reasons = Counter()
+        self.district_total = Counter()
+        self.district_geocoded = Counter()
+
+    def add(self, district, building_address, status):
+        """status: 'geocoded', 'null_geometry' or 'invalid_coords'."""
+        district = district if isinstance(district, str) and district.strip() else 'unknown'
+        self.total += 1
+        self.district_total[district] += 1
+        if status == 'geocoded':
+            self.geocoded += 1
+            self.district_geocoded[district] += 1
+            return
+        if status == 'null_geometry':
+            self.null_geometry += 1
+            has_address = isinstance(building_address, str) and building_address.strip()
+            self.failure_reasons['not_found' if has_address else 'no_building_address'] += 1
         else:
-            invalid_coords += 1
-    
-    return {
-        'total': total_features,
-        'geocoded': geocoded_count,
-        'null_geometry': null_geometry,
-        'invalid_coords': invalid_coords
-    }
+            self.invalid_coords += 1
+            self.failure_reasons['invalid_coords'] += 1
+
+    def add_frame(self, df):
+        """Tally a pandas batch of rows holding COLUMNS."""
+        for column in COLUMNS:
+            if column not in df.columns:
+                df[column] = None
+        district = df['district'].where(df['district'].astype(str).str.strip().astype(bool)
+                                        & df['district'].notna(), 'unknown')
+        located = df['longitude'].notna() & df['latitude'].notna()
+        has_address = df['building_address'].notna() & df['building_address'].astype(str).str.strip().astype(bool)
+
+        self.total += len(df)
+        self.geocoded += int(located.sum())
+        self.null_geometry += int((~located).sum())
+        self.failure_reasons['not_found'] += int((~located & has_address).sum())
+        self.failure_reasons['no_building_address'] += int((~located & ~has_address).sum())
+        self.district_total.update(district.value_counts().to_dict())
+        self.district_geocoded.update(district[located].value_counts().to_dict())
+
+    def as_dict(self):
+        return {
+            'total': self.total,
+            'geocoded': self.geocoded,
+            'null_geometry': self.null_geometry,
+            'invalid_coords': self.invalid_coords,
+            'failure_reasons': {reason: count for reason, count in self.failure_reasons.most_common() if count},
+            'districts': {
+                district: {'total': total, 'geocoded': self.district_geocoded[district]}
+                for district, total in sorted(self.district_total.items(), key=lambda item: (-item[1], item[0]))
+            },
+        }
+
+
+def _coordinates_status(geometry):
+    if geometry is None:
+        return 'null_geometry'
+    coords = geometry.get('coordinates')
+    if coords and len(coords) == 2 and all(isinstance(x, (int, float)) and not isinstance(x, bool) for x in coords):
+        return 'geocoded'
+    return 'invalid_coords'
+
+
+def iter_geojson_features(path, chunk_chars=CHUNK_CHARS):
+    """
+    Yield the features of a GeoJSON FeatureCollection one at a time.
+
+    The file is read in chunks and each value is decoded with
+    JSONDecoder.raw_decode as soon as it is complete, so memory is bounded
+    by the largest single feature rather than the file size. An empty
+    (or whitespace-only) file has no features.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer, position = '', 0
+
+        def fill():
+            nonlocal buffer, position
+            chunk = f.read(chunk_chars)
+            if not chunk:
+                return False
+            buffer = buffer[position:] + chunk
+            position = 0
+            return True
+
+        def skip(characters=' \t\r\n'):
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position] in characters:
+                    position += 1
+                if position < len(buffer) or not fill():
+                    return buffer[position:position + 1]
+
+        def decode():
+            nonlocal position
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if not fill():
+                        raise
+                    continue
+                # A number at the end of the buffer may continue in the next chunk
+                if end == len(buffer) and fill():
+                    continue
+                position = end
+                return value
+
+        def expect(character):
+            nonlocal position
+            if skip() != character:
+                raise ValueError(f"Malformed GeoJSON: expected {character!r}")
+            position += 1
+
+        if not skip():
+            return
+        expect('{')
+        while skip(' \t\r\n,') not in ('}', ''):
+            key = decode()
+            expect(':')
+            skip()
+            if key != 'features':
+                decode()
+                continue
+            expect('[')
+            while skip(' \t\r\n,') not in (']', ''):
+                yield decode()
+            expect(']')
+
+
+def _detect_format(path):
+    with open(path, 'rb') as f:
+        magic = f.read(4)
+    if magic == b'PAR1':
+        return 'geoparquet'
+    if magic[:3] == b'fgb':
+        return 'flatgeobuf'
+    return 'csv' if str(path).lower().endswith('.csv') else 'geojson'
+
+
+def _count_csv(path, stats):
+    import pandas as pd
+    header = pd.read_csv(path, nrows=0).columns
+    for chunk in pd.read_csv(path, usecols=[c for c in COLUMNS if c in header], chunksize=BATCH_ROWS):
+        stats.add_frame(chunk)
+
+
+def count_geocoded_properties(path):
+    """Totals, failure reasons and per-district counts of a geocoder output file (any --format)."""
+    stats = _Stats()
+    output_format = _detect_format(path)
+
+    if output_format == 'geojson':
+        for feature in iter_geojson_features(path):
+            properties = feature.get('properties') or {}
+            stats.add(properties.get('district'), properties.get('building_address'),
+                      _coordinates_status(feature.get('geometry')))
+
+    elif output_format == 'geoparquet':
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(path)
+        columns = [c for c in COLUMNS if c in parquet.schema_arrow.names]
+        for batch in parquet.iter_batches(batch_size=BATCH_ROWS, columns=columns):
+            stats.add_frame(batch.to_pandas())
+
+    elif output_format == 'flatgeobuf':
+        import pyogrio
+        fields = pyogrio.read_info(path)['fields']
+        with pyogrio.open_arrow(path, columns=[c for c in COLUMNS if c in fields],
+                                read_geometry=False, batch_size=BATCH_ROWS, use_pyarrow=True) as (_, reader):
+            for batch in reader:
+                stats.add_frame(batch.to_pandas())
+        # Rows without coordinates are written next to the FlatGeobuf file
+        sidecar = Path(f"{path}.ungeocoded.csv")
+        if sidecar.exists():
+            _count_csv(sidecar, stats)
 
-if __name__ == "__main__":
-    geojson_path = Path("data/processed/geocoded_properties.geojson")
-    if not geojson_path.exists():
-        print(f"Error: File not found: {geojson_path}")
     else:
-        stats = count_geocoded_properties(geojson_path)
-        
-        print(f"Geocoding Statistics:")
-        print(f"- Total properties: {stats['total']}")
-        print(f"- Successfully geocoded: {stats['geocoded']} ({(stats['geocoded']/stats['total'])*100:.1f}%)")
-        print(f"- Null geometry: {stats['null_geometry']} ({(stats['null_geometry']/stats['total'])*100:.1f}%)")
-        print(f"- Invalid coordinates: {stats['invalid_coords']} ({(stats['invalid_coords']/stats['total'])*100:.1f}%)")
-        print(f"- Failed to geocode: {stats['total'] - stats['geocoded']} ({((stats['total'] - stats['geocoded'])/stats['total'])*100:.1f}%)")
+        _count_csv(path, stats)
+
+    return stats.as_dict()
+
+
+def _percent(part, total):
+    return part / total * 100 if total else 0.0
+
+
+def print_report(stats):
+    total = stats['total']
+    print(f"Geocoding Statistics:")
+    print(f"- Total properties: {total}")
+    print(f"- Successfully geocoded: {stats['geocoded']} ({_percent(stats['geocoded'], total):.1f}%)")
+    print(f"- Null geometry: {stats['null_geometry']} ({_percent(stats['null_geometry'], total):.1f}%)")
+    print(f"- Invalid coordinates: {stats['invalid_coords']} ({_percent(stats['invalid_coords'], total):.1f}%)")
+    print(f"- Failed to geocode: {total - stats['geocoded']} ({_percent(total - stats['geocoded'], total):.1f}%)")
+
+    if stats['failure_reasons']:
+        print(f"\nFailure reasons:")
+        for reason, count in stats['failure_reasons'].items():
+            print(f"- {reason}: {count} ({_percent(count, total):.1f}%)")
+
+    if stats['districts']:
+        print(f"\nBy district:")
+        for district, counts in stats['districts'].items():
+            print(f"- {district}: {counts['geocoded']}/{counts['total']} geocoded "
+                  f"({_percent(counts['geocoded'], counts['total']):.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report geocoding statistics for a geocoder output file')
+    parser.add_argument('path', nargs='?', default=str(DEFAULT_PATH),
+                        help='Geocoded GeoJSON, CSV, GeoParquet or FlatGeobuf file')
+    parser.add_argument('--json', action='store_true', help='Print the statistics as JSON')
+    args = parser.parse_args()
+
+    path = Path(args.path)
+    if not path.exists():
+        print(f"Error: File not found: {path}")
+        return 1
+
+    try:
+        stats = count_geocoded_properties(path)
+    except ValueError as e:
+        print(f"Error: Cannot read {path}: {e}")
+        return 1
+    if args.json:
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+    else:
+        print_report(stats)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
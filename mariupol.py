@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Single command line entry point for the Mariupol Evidence Project.
+
+    python mariupol.py enrich [options]          toponymic enrichment of the scrape
+    python mariupol.py geocode [options]         geocode seized properties
+    python mariupol.py stats [path] [--json]     geocoding statistics of an output file
+    python mariupol.py verify-custody LOG        check the custody log's hash chain
+
+Each subcommand is the main() (or another entry point) of an existing
+script, imported only when it is run: this module imports nothing beyond the standard library, so --help
+and light subcommands such as stats and verify-custody never load pandas,
+geopandas or geopy.
+"""
+
+import os
+import sys
+import importlib
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# command: (directory, module, entry point, summary)
+COMMANDS = {
+    'enrich': ('src', 'process_evidence_v3_integrated', 'main',
+               'Apply toponymic intelligence to scraped Telegram data'),
+    'geocode': ('scripts', 'geocode_properties_enhanced', 'main',
+                'Geocode seized properties'),
+    'stats': ('', 'count_geocoded', 'main',
+              'Report geocoding statistics for a geocoder output file'),
+    'verify-custody': ('src', 'custody_log', 'verify_main',
+                       'Check every hash link of a JSON Lines custody log'),
+}
+
+
+def usage():
+    width = max(len(command) for command in COMMANDS)
+    lines = ['usage: mariupol <command> [options]', '', 'commands:']
+    lines += [f"  {command:<{width}}  {summary}" for command, (_, _, _, summary) in COMMANDS.items()]
+    lines += ['', "Run 'mariupol <command> --help' for the options of a command."]
+    return '\n'.join(lines)
+
+
+def run(command, arguments):
+    """Imports the command's module and runs its entry point with the given arguments."""
+    directory, module_name, entry_point, _ = COMMANDS[command]
+    path = os.path.join(ROOT, directory)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    sys.argv = [f"mariupol {command}"] + arguments
+    module = importlib.import_module(module_name)
+    return getattr(module, entry_point)()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return 0 if argv else 2
+    command, arguments = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"mariupol: unknown command {command!r}\n\n{usage()}", file=sys.stderr)
+        return 2
+    return run(command, arguments)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
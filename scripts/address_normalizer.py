@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Precompiled address normalization for Mariupol property-register addresses.
+
+AddressNormalizer applies the same ordered rewrite rules that
+SeizedPropertyGeocoder._clean_address used to rebuild on every call, but:
+
+* every pattern is compiled once at import;
+* abbreviation patterns already covered by the rule just before them
+  (цр, кр, жра, ора, пр, лбр) and the identity rewrite of lettered house
+  numbers (123а) are dropped. Rules are otherwise kept separate: merging
+  two passes into one alternation changes which word boundaries the
+  second pass sees (e.g. "ж.р.а.ора");
+* each rule carries the literal substrings any of its matches must contain,
+  so rules that cannot apply to an address are skipped without running
+  the regex;
+* normalized outputs are memoized in an LRU cache.
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+
+# Words that introduce the "50-летия СССР" style street names
+YEAR_WORDS = ('год', 'лет', 'рок', 'рік')
+
+
+def _rule(pattern: str, replacement: str, triggers: Optional[Tuple[str, ...]] = None):
+    """A compiled rewrite rule; triggers (casefolded) gate whether it can match at all."""
+    return re.compile(pattern), replacement, triggers
+
+
+# Applied in order, exactly as the original cleaning passes.
+NORMALIZATION_RULES = [
+    # Handle special street names first
+    _rule(r'(?i)(\d+)[-\s]*(?:год[ау]?|лет|рок[ів]?|рік)[-\s]*(ссср|срср|срс|сс|с\.?с\.?р\.?|с\.?р\.?с\.?р\.?)',
+          r'\1-летия СССР', YEAR_WORDS),
+
+    # Standardize district abbreviations (both Russian and Ukrainian variants).
+    # The bare forms (цр, кр, жра, ора, пр, лбр) are matched by the dotted patterns.
+    # Central District (Центральный район / Центральний район)
+    _rule(r'(?i)\bц\.?\s*р\.?\b', 'Центральный район', ('ц',)),
+    _rule(r'(?i)\bцентральний\b', 'Центральный', ('центральний',)),
+    # Kalmius District (Кальмиусский район / Кальміуський район)
+    _rule(r'(?i)\bк\.?\s*р\.?\b(?!ривой)', 'Кальмиусский район', ('к',)),
+    _rule(r'(?i)\bкальміуський\b', 'Кальмиусский', ('кальміуський',)),
+    # October District (Октябрьский район / Жовтневий район)
+    _rule(r'(?i)\bж\.?\s*р\.?\s*а\.?\b', 'Октябрьский район', ('ж',)),
+    _rule(r'(?i)\bо\.?\s*р\.?\s*а\.?\b', 'Октябрьский район', ('о',)),
+    _rule(r'(?i)\bжовтневий\b', 'Октябрьский', ('жовтневий',)),
+    # Primorsky District (Приморский район / Приморський район)
+    _rule(r'(?i)\bп\.?\s*р\.?\b(?!ортов)', 'Приморский район', ('п',)),
+    _rule(r'(?i)\bприморський\b', 'Приморский', ('приморський',)),
+    # Left Bank District (Левобережный район / Лівобережний район)
+    _rule(r'(?i)\bл\.?\s*б\.?\s*р\.?\b', 'Левобережный район', ('л',)),
+    _rule(r'(?i)\bлівобережний\b', 'Левобережный', ('лівобережний',)),
+
+    # Common street name variants
+    _rule(r'(?i)\bпр-?кт\.?\s*металлургов\b', 'проспект Металлургов', ('металлургов',)),
+    _rule(r'(?i)\bпр-?кт\.?\s*ленина\b', 'проспект Ленина', ('ленина',)),
+    _rule(r'(?i)\bпр-?кт\.?\s*мира\b', 'проспект Мира', ('мира',)),
+    _rule(r'(?i)\bпер\.?\s*нахимова\b', 'переулок Нахимова', ('нахимова',)),
+    _rule(r'(?i)\bул\.?\s*артема\b', 'улица Артема', ('артема',)),
+    _rule(r'(?i)\bул\.?\s*куприна\b', 'улица Куприна', ('куприна',)),
+
+    # Special case for 50-летия СССР street
+    _rule(r'(?i)\b(ул\.?|улица|вул\.?|вулиця)?\s*(\d+)[-\s]*(?:год[ау]?|лет|рок[ів]?|рік)[-\s]*(ссср|срср|срс|сс|с\.?с\.?р\.?|с\.?р\.?с\.?р\.?)\b',
+          r'улица \2-летия СССР', YEAR_WORDS),
+
+    # Street types (Ukrainian -> Russian)
+    _rule(r'(?i)\b(?:вул\.?|вулиц[яюи]|вулиці|vul\.?|vulytsya)\b', 'улица', ('вул', 'vul')),
+    _rule(r'(?i)\b(?:пров\.?|провулок|prov\.?|provulok)\b', 'переулок', ('пров', 'prov')),
+    _rule(r'(?i)\b(?:пр-?кт\.?|просп\.?|проспект|prosp\.?|prospekt)\b', 'проспект', ('пр', 'prosp')),
+    _rule(r'(?i)\b(?:бул\.?|бульвар|bul\.?|bulvar)\b', 'бульвар', ('бул', 'bul')),
+    _rule(r'(?i)\b(?:пл\.?|площа|площадь|pl\.?|ploshcha|ploshchad)\b', 'площадь', ('пл', 'площ', 'pl')),
+    _rule(r'(?i)\b(?:ш\.?|шосе|sh\.?|shose)\b', 'шоссе', ('ш', 'sh')),
+    _rule(r'(?i)\b(?:наб\.?|набережна|набережная|nab\.?|naberezhna|naberezhnaya)\b', 'набережная', ('наб', 'nab')),
+    _rule(r'(?i)\b(?:пр-?д\.?|проезд|proezd)\b', 'проезд', ('пр', 'proezd')),
+    _rule(r'(?i)\b(?:туп\.?|тупик|tup\.?|tupik)\b', 'тупик', ('туп', 'tup')),
+
+    # Settlement types (Ukrainian -> Russian)
+    _rule(r'(?i)\b(?:с\.?\s*с\.?|с/с|с-с|селище|selyshche|s/s|s-s|с\.?с\.?)\b', 'поселок', ('с', 's')),
+    _rule(r'(?i)\b(?:пос\.?|поселение|поселок|pos\.?|poseleniye|posyolok|п\.?|п/п|п-п|п\.?п\.?)\b', 'поселок', ('п', 'pos')),
+    _rule(r'(?i)\b(?:смт\b|с\.?м\.?т\.?|селище міського типу)\b', 'пгт', ('с',)),
+    _rule(r'(?i)\b(?:с\.?|село|selo|s\.?)\b', 'село', ('с', 's')),
+    _rule(r'(?i)\b(?:х\.?|хутор|khutor|kh\.?)\b', 'хутор', ('х', 'kh')),
+
+    # Common address components
+    _rule(r'(?i)\b(?:буд\.?|будинок|bud\.?|budynok)\b', 'д.', ('буд', 'bud')),
+    _rule(r'(?i)\b(?:корп\.?|корпус|korpus|kor\.?|korp\.?)\b', 'к.', ('корп', 'kor')),
+
+    # Only replace нко with улица when it's at the start of the address or after a comma
+    _rule(r'(?i)(^|\s|,)(нко)(\s|$)', r'\1улица\3', ('нко',)),
+    _rule(r'(?i)\bн\.?\s*к\.?\s*о\.?\b', 'улица', ('н',)),
+
+    # Handle numbered streets with ordinal suffixes (1-й, 2-я, etc.)
+    _rule(r'(?i)\b(\d+)[-\s]*(?:й|я|го|му|ый|ой|ий|ая|ое|ье|ые|ых|ым|ими|х|м|го|му|ем|ом|ом)\b', r'\1-й'),
+
+    # Clean up special street names
+    _rule(r'(?i)\b(\d+)\s*[-–—]?\s*(?:год[ау]?|лет|рок[ів]?|рік)?\s*(ссср|срср|срс|сс|с\.?с\.?р\.?|с\.?р\.?с\.?р\.?)\b',
+          r'\1-летия СССР', ('с',)),
+
+    # Clean up punctuation and whitespace
+    _rule(r'\s+', ' '),
+    _rule(r'\s*,\s*', ', ', (',',)),
+    _rule(r'\s*\.\s*', '.', ('.',)),
+    _rule(r'\s*\/\s*', '/', ('/',)),
+    _rule(r'\s*-\s*', '-', ('-',)),
+]
+
+_MULTIPLE_SPACES = re.compile(r'\s+')
+_TRAILING_PUNCTUATION = re.compile(r'[\s,.]*$')
+
+
+class AddressNormalizer:
+    """Reusable, memoized address normalizer (see module docstring)."""
+
+    def __init__(self, cache_size: int = 65536, rules=None):
+        self.rules = NORMALIZATION_RULES if rules is None else rules
+        self.normalize_cached = lru_cache(maxsize=cache_size)(self._normalize)
+
+    def normalize(self, address) -> str:
+        """Normalize one address; non-string or empty input gives ""."""
+        if not address or not isinstance(address, str):
+            return ""
+        return self.normalize_cached(address)
+
+    def cache_info(self):
+        return self.normalize_cached.cache_info()
+
+    def _normalize(self, address: str) -> str:
+        cleaned = address.strip()
+        folded = cleaned.casefold()
+
+        for pattern, replacement, triggers in self.rules:
+            if triggers is not None and not any(trigger in folded for trigger in triggers):
+                continue
+            cleaned, count = pattern.subn(replacement, cleaned)
+            if count:
+                folded = cleaned.casefold()
+
+        # Clean up any remaining multiple spaces
+        cleaned = _MULTIPLE_SPACES.sub(' ', cleaned).strip()
+
+        # Remove any trailing commas or periods
+        return _TRAILING_PUNCTUATION.sub('', cleaned)
+
+
+DEFAULT_NORMALIZER = AddressNormalizer()
+
+
+def normalize_address(address) -> str:
+    """Normalize an address with the shared module-level normalizer."""
+    return DEFAULT_NORMALIZER.normalize(address)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Benchmark address normalization: the previous _clean_address (dicts of
+patterns rebuilt and looked up in the re module cache on every call) against
+the precompiled AddressNormalizer, and check both give identical output on
+register-style addresses and on randomly recombined address fragments.
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+
+from address_normalizer import AddressNormalizer
+
+STREETS = [
+    'б-р Богдана Хмельницкого', 'бульвар Шевченко', 'бул Шевченко', 'пр-кт Металлургов', 'пркт Мира',
+    'просп. Нахимова', 'пр. Ленина', 'ул. Артема', 'ул Куприна', 'вул. Купріна', 'вулиця Торгова',
+    'пер. Нахимова', 'провулок Морський', 'пл. Театральная', 'ул. 50 лет СССР', '50-летия СССР',
+    'ул. 50 років СРСР', 'нко Итальянская', 'ш. Запорожское', 'наб. Азовская', 'туп. Пионерский',
+    'ул. 1-я Слободская', 'ул. 2 Земледельческая', 'п Старый Крым ул Рабочая', 'пос. Сартана',
+    'смт Талаковка', 'с. Пионерское', 'ул. Латышева', 'Шевченко', 'Khmelnytskoho', 'vul. Torhova',
+]
+HOUSES = ['{n}', '{n}а', '{n}Б', '{n}/2', 'д. {n}', 'буд. {n}', '{n} корп. 2', '{n}-А']
+DISTRICTS = ['', ', ЖРА', ', ЦР', ', кр', ', Приморський', ', Лівобережний район', ', Жовтневий', ', ора']
+TAILS = ['', ', Мариуполь', ', Мариуполь, Украина', ', г. Мариуполь, Донецкая обл.', ' .', ',']
+
+
+def register_addresses(count, apartments_per_building=20, seed=7):
+    """
+    Addresses shaped like the seized-property register: one row per
+    apartment, so every building appears many times.
+    """
+    rng = random.Random(seed)
+    buildings = []
+    for _ in range(max(count // apartments_per_building, 1)):
+        house = rng.choice(HOUSES).format(n=rng.randint(1, 300))
+        buildings.append(f"{rng.choice(STREETS)}, {house}{rng.choice(DISTRICTS)}{rng.choice(TAILS)}")
+    return [f"{rng.choice(buildings)}, кв. {rng.randint(1, 200)}" if rng.random() < 0.7 else rng.choice(buildings)
+            for _ in range(count)]
+
+
+def fuzz_addresses(count, seed=11):
+    """Random recombinations of address fragments and separators, for the equivalence check."""
+    rng = random.Random(seed)
+    fragments = [token for street in STREETS for token in street.split()]
+    fragments += [d.strip(', ') for d in DISTRICTS if d] + ['ц.р.', 'к. р.', 'ж.р.а.', 'л.б.р', 'с.с.', 'с/с',
+                                                           'п/п', 'с.м.т.', 'х.', 'н.к.о.', 'кривой', 'портовский',
+                                                           '1941 року', '30-й', '5 го', 'СРСР', 'ссср']
+    separators = [' ', ', ', '. ', '-', ' / ', '  ', '\t', '']
+    addresses = []
+    for _ in range(count):
+        parts = [rng.choice(fragments) if rng.random() < 0.8 else str(rng.randint(1, 120))
+                 for _ in range(rng.randint(1, 7))]
+        addresses.append(''.join(part + rng.choice(separators) for part in parts))
+    return addresses
+
+
+def legacy_clean_address(address: str) -> str:
+    """Verbatim copy of SeizedPropertyGeocoder._clean_address before AddressNormalizer."""
+    if not address or not isinstance(address, str):
+        return ""
+
+    cleaned = str(address).strip()
+
+    cleaned = re.sub(
+        r'(?i)(\d+)[-\s]*(?:год[ау]?|лет|рок[ів]?|рік)[-\s]*(ссср|срср|срс|сс|с\.?с\.?р\.?|с\.?р\.?с\.?р\.?)',
+        r'\1-летия СССР',
+        cleaned
+    )
+
+    district_mapping = {
+        r'(?i)\bц\.?\s*р\.?\b': 'Центральный район',
+        r'(?i)\bцр\b': 'Центральный район',
+        r'(?i)\bцентральний\b': 'Центральный',
+        r'(?i)\bк\.?\s*р\.?\b(?!ривой)': 'Кальмиусский район',
+        r'(?i)\bкр\b(?!ривой)': 'Кальмиусский район',
+        r'(?i)\bкальміуський\b': 'Кальмиусский',
+        r'(?i)\bж\.?\s*р\.?\s*а\.?\b': 'Октябрьский район',
+        r'(?i)\bжра\b': 'Октябрьский район',
+        r'(?i)\bо\.?\s*р\.?\s*а\.?\b': 'Октябрьский район',
+        r'(?i)\bора\b': 'Октябрьский район',
+        r'(?i)\bжовтневий\b': 'Октябрьский',
+        r'(?i)\bп\.?\s*р\.?\b(?!ортов)': 'Приморский район',
+        r'(?i)\bпр\b(?!ортов)': 'Приморский район',
+        r'(?i)\bприморський\b': 'Приморский',
+        r'(?i)\bл\.?\s*б\.?\s*р\.?\b': 'Левобережный район',
+        r'(?i)\bлбр\b': 'Левобережный район',
+        r'(?i)\bлівобережний\b': 'Левобережный',
+        r'(?i)\bпр-?кт\.?\s*металлургов\b': 'проспект Металлургов',
+        r'(?i)\bпр-?кт\.?\s*ленина\b': 'проспект Ленина',
+        r'(?i)\bпр-?кт\.?\s*мира\b': 'проспект Мира',
+        r'(?i)\bпер\.?\s*нахимова\b': 'переулок Нахимова',
+        r'(?i)\bул\.?\s*артема\b': 'улица Артема',
+        r'(?i)\bул\.?\s*куприна\b': 'улица Куприна',
+        r'(?i)\b(ул\.?|улица|вул\.?|вулиця)?\s*(\d+)[-\s]*(?:год[ау]?|лет|рок[ів]?|рік)[-\s]*(ссср|срср|срс|сс|с\.?с\.?р\.?|с\.?р\.?с\.?р\.?)\b':
+            'улица \2-летия СССР',
+    }
+    for pattern, replacement in district_mapping.items():
+        cleaned = re.sub(pattern, replacement, cleaned)
+
+    replacements = {
+        r'(?i)\b(?:вул\.?|вулиц[яюи]|вулиці|vul\.?|vulytsya)\b': 'улица',
+        r'(?i)\b(?:пров\.?|провулок|prov\.?|provulok)\b': 'переулок',
+        r'(?i)\b(?:пр-?кт\.?|просп\.?|проспект|prosp\.?|prospekt)\b': 'проспект',
+        r'(?i)\b(?:бул\.?|бульвар|bul\.?|bulvar)\b': 'бульвар',
+        r'(?i)\b(?:пл\.?|площа|площадь|pl\.?|ploshcha|ploshchad)\b': 'площадь',
+        r'(?i)\b(?:ш\.?|шосе|sh\.?|shose)\b': 'шоссе',
+        r'(?i)\b(?:наб\.?|набережна|набережная|nab\.?|naberezhna|naberezhnaya)\b': 'набережная',
+        r'(?i)\b(?:пр-?д\.?|проезд|proezd)\b': 'проезд',
+        r'(?i)\b(?:туп\.?|тупик|tup\.?|tupik)\b': 'тупик',
+        r'(?i)\b(?:с\.?\s*с\.?|с/с|с-с|селище|selyshche|s/s|s-s|с\.?с\.?)\b': 'поселок',
+        r'(?i)\b(?:пос\.?|поселение|поселок|pos\.?|poseleniye|posyolok|п\.?|п/п|п-п|п\.?п\.?)\b': 'поселок',
+        r'(?i)\b(?:смт\b|с\.?м\.?т\.?|селище міського типу)\b': 'пгт',
+        r'(?i)\b(?:с\.?|село|selo|s\.?)\b': 'село',
+        r'(?i)\b(?:х\.?|хутор|khutor|kh\.?)\b': 'хутор',
+        r'(?i)\b(?:буд\.?|будинок|bud\.?|budynok)\b': 'д.',
+        r'(?i)\b(?:корп\.?|корпус|korpus|kor\.?|korp\.?)\b': 'к.',
+        r'(?i)(^|\s|,)(нко)(\s|$)': r'\1улица\3',
+        r'(?i)\bн\.?\s*к\.?\s*о\.?\b': 'улица',
+        r'(?i)\b(\d+)[-\s]*(?:й|я|го|му|ый|ой|ий|ая|ое|ье|ые|ых|ым|ими|х|м|го|му|ем|ом|ом)\b': r'\1-й',
+        r'(?i)\b(\d+)\s*[-–—]?\s*(?:год[ау]?|лет|рок[ів]?|рік)?\s*(ссср|срср|срс|сс|с\.?с\.?р\.?|с\.?р\.?с\.?р\.?)\b': r'\1-летия СССР',
+        r'\s+': ' ',
+        r'\s*,\s*': ', ',
+        r'\s*\.\s*': '.',
+        r'\s*\/\s*': '/',
+        r'\s*-\s*': '-',
+    }
+    for pattern, repl in replacements.items():
+        cleaned = re.sub(pattern, repl, cleaned)
+
+    cleaned = re.sub(r'(\d+)([а-яА-Я])\b', r'\1\2', cleaned, flags=re.IGNORECASE)
+    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+    cleaned = re.sub(r'[\s,.]*$', '', cleaned)
+    return cleaned
+
+
+def building_addresses(addresses):
+    """The geocoder normalizes addresses after extract_building_address drops the apartment."""
+    return [re.sub(r',?\s*кв\.?\s*\d+.*$', '', address).strip() for address in addresses]
+
+
+def throughput(func, addresses):
+    start = time.perf_counter()
+    for address in addresses:
+        func(address)
+    return len(addresses) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark address normalization')
+    parser.add_argument('--addresses', type=int, default=50000, help='Number of register addresses')
+    parser.add_argument('--fuzz', type=int, default=50000, help='Number of fuzzed addresses to compare')
+    args = parser.parse_args()
+
+    addresses = register_addresses(args.addresses)
+    normalizer = AddressNormalizer(cache_size=0)
+    for address in addresses + fuzz_addresses(args.fuzz):
+        expected = legacy_clean_address(address)
+        actual = normalizer.normalize(address)
+        if actual != expected:
+            print(f"MISMATCH for {address!r}: {expected!r} != {actual!r}")
+            return 1
+    print(f"Identical output on {len(addresses) + args.fuzz:,} addresses")
+
+    addresses = building_addresses(addresses)
+
+    before = throughput(legacy_clean_address, addresses)
+    uncached = throughput(AddressNormalizer(cache_size=0).normalize, addresses)
+    memoized = AddressNormalizer()
+    cached = throughput(memoized.normalize, addresses)
+    info = memoized.cache_info()
+
+    print(f"Legacy _clean_address: {before:>10,.0f} addresses/s")
+    print(f"AddressNormalizer:     {uncached:>10,.0f} addresses/s ({uncached / before:.1f}x)")
+    print(f"  with LRU memo:       {cached:>10,.0f} addresses/s ({cached / before:.1f}x, "
+          f"{info.hits:,} hits / {info.misses:,} misses)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark the finite-state address tokenizer against the two regular
+expressions it replaced, on messages of growing length:
+- typical: lemmatized chatter with a few addresses;
+- no-digits: street words but no house numbers, where the old name group
+  swept to the end of the message and backtracked from every keyword;
+and report which of a set of lemmatized address mentions each one finds.
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from address_tokenizer import scan_addresses  # noqa: E402
+
+# The patterns extract_addresses_with_verified_toponymy used before the tokenizer
+LEGACY_PATTERNS = [
+    re.compile(r'(?:ул\.|улица|пр\.|проспект|пл\.|площадь|пер\.|переулок)\s*([А-Яа-я\s\-]+)\s*,?\s*(\d+[А-Яа-я]*)', re.IGNORECASE),
+    re.compile(r'([А-Яа-я]+ский\s+переулок)\s+(\d+[а-я])', re.IGNORECASE),
+]
+
+FILLER = ['сегодня', 'в', 'город', 'опять', 'нет', 'вода', 'свет', 'дом', 'наш', 'сосед', 'говорить',
+          'что', 'новый', 'власть', 'квартира', 'забрать', 'документ', 'суд', 'улица', 'площадь']
+ADDRESSES = ['площадь ленина 1', 'улица тульская 15', 'проспект нахимова 82', 'черноморский переулок 1б',
+             'ул. артема 22', 'пр. мира 101а', 'переулок морской 3']
+MENTIONS = [
+    ('проспект нахимова 82 снесли', ('нахимова', '82')),
+    ('новый адрес черноморский переулок', ('черноморский переулок', None)),
+    ('черноморский переулок 1б', ('черноморский переулок', '1б')),
+    ('ул. Артема, д. 22', ('Артема', '22')),
+    ('вул. Соборна, буд. 12', ('Соборна', '12')),
+    ('пр-т Строителей 99', ('Строителей', '99')),
+    ('на площадь ленина пришли', ('ленина', None)),
+    ('улица тульская 15 кв 4', ('тульская', '15')),
+    ('улица 2-й кальчик 5', ('2-й кальчик', '5')),
+]
+
+
+def legacy_scan(text):
+    return [(match[0].strip(), match[1].strip()) for pattern in LEGACY_PATTERNS for match in pattern.findall(text)]
+
+
+def fsm_scan(text):
+    return [(candidate.street, candidate.house_number) for candidate in scan_addresses(text)]
+
+
+def message(words, rng, digits=True):
+    tokens = rng.choices(FILLER, k=words)
+    if digits:
+        for _ in range(max(1, words // 50)):
+            tokens.insert(rng.randrange(len(tokens) + 1), rng.choice(ADDRESSES))
+    return ' '.join(tokens)
+
+
+def microseconds(scan, texts, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            scan(text)
+    return (time.perf_counter() - start) / (rounds * len(texts)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the address tokenizer against the legacy regexes')
+    parser.add_argument('--lengths', type=int, nargs='+', default=[20, 200, 1000, 4000],
+                        help='Message lengths in words')
+    parser.add_argument('--messages', type=int, default=10, help='Messages per length')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    print(f"{'words':>6} {'kind':<10} {'regex µs':>12} {'fsm µs':>10} {'speedup':>8}")
+    for words in args.lengths:
+        rounds = max(1, 2000 // words)
+        for kind, digits in (('typical', True), ('no-digits', False)):
+            texts = [message(words, rng, digits) for _ in range(args.messages)]
+            regex = microseconds(legacy_scan, texts, rounds)
+            fsm = microseconds(fsm_scan, texts, rounds)
+            print(f"{words:6d} {kind:<10} {regex:12.1f} {fsm:10.1f} {regex / fsm:7.1f}x")
+
+    print("\nLemmatized mentions found (regex / fsm):")
+    for text, expected in MENTIONS:
+        legacy = expected in legacy_scan(text)
+        fsm = expected in fsm_scan(text)
+        print(f"  {'yes' if legacy else 'no ':<3} / {'yes' if fsm else 'no ':<3}  {text}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark the per-row and batch toponymic enrichment paths on a synthetic
+Telegram dump and check that both produce identical columns, undated and
+correlated as of each message's date.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import toponymic_db_fw  # noqa: E402
+
+FILLER = [
+    'сегодня', 'в', 'город', 'опять', 'нет', 'вода', 'свет', 'дом', 'наш', 'сосед',
+    'говорить', 'что', 'новый', 'власть', 'квартира', 'забрать', 'документ', 'суд',
+]
+ADDRESSES = [
+    'площадь ленина 1', 'улица тульская 15', 'проспект нахимова 82',
+    'черноморский переулок 1б', 'ул. артема 22', 'пр. мира 101а', 'переулок морской 3',
+]
+
+
+def synthetic_messages(count, address_rate=0.1, seed=42):
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(count):
+        words = rng.choices(FILLER, k=rng.randint(8, 30))
+        if rng.random() < address_rate:
+            words.insert(rng.randint(0, len(words)), rng.choice(ADDRESSES))
+        messages.append(' '.join(words) if rng.random() > 0.01 else None)
+    return pd.Series(messages, dtype=object)
+
+
+def synthetic_dates(count, seed=7):
+    """Message dates spread over 2022-2025, around the 2023-08 renamings."""
+    rng = random.Random(seed)
+    return pd.Series([f"{rng.randint(2022, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+                      for _ in range(count)], dtype=object)
+
+
+def per_row_enrichment(texts, dates=None):
+    """The previous implementation: one extraction call and four .apply passes."""
+    def analyze_row(row_text, as_of):
+        if not isinstance(row_text, str):
+            return {'verified_correlations': [], 'ownership_claim_threats': [], 'cultural_erasure_evidence': []}
+        return toponymic_db_fw.extract_addresses_with_verified_toponymy(row_text, as_of)
+
+    if dates is None:
+        results = texts.apply(analyze_row, as_of=None)
+    else:
+        results = pd.Series([analyze_row(text, date) for text, date in zip(texts, dates)], index=texts.index)
+    return pd.DataFrame({
+        'toponymic_intelligence': results.apply(lambda x: json.dumps(x, ensure_ascii=False)),
+        'is_flagged': results.apply(lambda x: bool(x.get('ownership_claim_threats') or x.get('cultural_erasure_evidence'))),
+        'threat_type': results.apply(lambda x: x.get('ownership_claim_threats')[0]['manipulation_tactic'] if x.get('ownership_claim_threats') else None),
+        'erasure_type': results.apply(lambda x: x.get('cultural_erasure_evidence')[0]['cultural_significance'] if x.get('cultural_erasure_evidence') else None),
+    })
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark toponymic enrichment')
+    parser.add_argument('--rows', type=int, default=200000, help='Number of synthetic messages')
+    parser.add_argument('--address-rate', type=float, default=0.1,
+                        help='Share of messages that mention an address')
+    args = parser.parse_args()
+
+    texts = synthetic_messages(args.rows, args.address_rate)
+    toponymic_db_fw.get_toponymic_index()
+
+    legacy, legacy_seconds = timed(per_row_enrichment, texts)
+    batch, batch_seconds = timed(toponymic_db_fw.extract_addresses_batch, texts)
+
+    pd.testing.assert_frame_equal(legacy, batch)
+    print(f"Rows: {args.rows:,}  flagged: {int(batch['is_flagged'].sum()):,}")
+    print(f"Per-row .apply: {legacy_seconds:.2f}s ({args.rows / legacy_seconds:,.0f} rows/s)")
+    print(f"Batch:          {batch_seconds:.2f}s ({args.rows / batch_seconds:,.0f} rows/s)")
+    print(f"Speedup:        {legacy_seconds / batch_seconds:.1f}x")
+
+    dates = synthetic_dates(args.rows)
+    dated_legacy = per_row_enrichment(texts, dates)
+    dated, dated_seconds = timed(toponymic_db_fw.extract_addresses_batch, texts, dates)
+    pd.testing.assert_frame_equal(dated_legacy, dated)
+    print(f"Batch as of message dates: {dated_seconds:.2f}s ({args.rows / dated_seconds:,.0f} rows/s), "
+          f"flagged: {int(dated['is_flagged'].sum()):,}")
+
+
+if __name__ == "__main__":
+    main()
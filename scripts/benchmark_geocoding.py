@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Geocoding throughput benchmark against the local mock Nominatim server.
+
+Each scenario runs the full pipeline (process_properties) with a fresh cache
+on a register-style input: apartments in the gazetteer fixture's buildings,
+spelled the way the register spells streets, plus buildings the server does
+not know, which use up every query variation. The server's latency and
+fault injection change per scenario. The warm scenario repeats the run on
+the cache left by the cold one.
+
+Reported per scenario: buildings per second, upstream requests per building,
+cache hit rate, failed upstream attempts, and the time workers spent
+backing off. Use --json to keep the numbers for comparison between commits.
+"""
+
+import os
+import csv
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+
+import pandas as pd
+
+from mock_nominatim import DEFAULT_GAZETTEER, MockNominatimServer
+import geocode_properties_enhanced as geocoding
+
+DISTRICTS = ['ЖРА', 'ЦР', 'Кальмиусский район', 'Приморский район', 'Левобережный район']
+STREET_SPELLINGS = {'улица': ['ул.', 'улица'], 'проспект': ['пр-т', 'проспект'], 'бульвар': ['б-р', 'бульвар'],
+                    'переулок': ['пер.', 'переулок'], 'площадь': ['пл.', 'площадь']}
+UNKNOWN_STREETS = ['ул. Заводская', 'пер. Тихий', 'ул. Садовая', 'пр-т Победы']
+
+# name, server options, geocoder options
+SCENARIOS = [
+    ('serial', {'latency': 0.02}, {'workers': 1}),
+    ('workers-4', {'latency': 0.02}, {'workers': 4}),
+    ('slow-upstream', {'latency': 0.2, 'jitter': 0.05}, {'workers': 4}),
+    ('errors-5%', {'latency': 0.02, 'error_rate': 0.03, 'rate_limit_rate': 0.02}, {'workers': 4}),
+    ('timeouts-2%', {'latency': 0.02, 'timeout_rate': 0.02, 'hang': 5.0}, {'workers': 4, 'timeout': 0.5}),
+    ('warm-cache', {'latency': 0.02}, {'workers': 4}),
+]
+
+
+def write_register(path, apartments=3, unknown=12, seed=11):
+    """Register CSV (district, address) for the fixture's buildings and some unknown ones."""
+    rng = random.Random(seed)
+    with open(DEFAULT_GAZETTEER, 'r', encoding='utf-8-sig', newline='') as f:
+        rows = list(csv.DictReader(f))
+    buildings = []
+    for row in rows:
+        street_type, _, name = row['street'].partition(' ')
+        for spelling in STREET_SPELLINGS.get(street_type, [street_type]):
+            buildings.append(f"{spelling} {name}, д. {row['housenumber']}")
+    buildings += [f"{rng.choice(UNKNOWN_STREETS)}, д. {n}" for n in rng.sample(range(200, 400), unknown)]
+
+    # Every apartment of a building is registered in the building's district
+    records = [(district, f"{building}, кв. {rng.randint(1, 120)}")
+               for building, district in ((building, rng.choice(DISTRICTS)) for building in buildings)
+               for _ in range(apartments)]
+    rng.shuffle(records)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['district', 'address'])
+        writer.writerows(records)
+
+
+def run_scenario(input_file, directory, server_options, geocoder_options, cache_file):
+    output_file = os.path.join(directory, 'geocoded.csv')
+    with MockNominatimServer(seed=7, **server_options) as server:
+        geocoder = geocoding.SeizedPropertyGeocoder(cache_file=cache_file, provider='self-hosted',
+                                                    domain=server.domain, scheme='http',
+                                                    manual_coordinates_file=None, **geocoder_options)
+        start = time.perf_counter()
+        try:
+            ok = geocoder.process_properties(input_file, output_file, 'csv', batch_size=25)
+        finally:
+            geocoder.close()
+        elapsed = time.perf_counter() - start
+        requests = server.stats()['requests']
+
+    if not ok:
+        raise RuntimeError("process_properties failed")
+    output = pd.read_csv(output_file)
+    buildings = output[['district', 'building_address']].drop_duplicates()
+    located = output.dropna(subset=['longitude']).drop_duplicates(['district', 'building_address'])
+    lookups = geocoder.cache_hits + geocoder.cache_misses
+    return {
+        'buildings': len(buildings),
+        'resolved': len(located),
+        'seconds': round(elapsed, 3),
+        'buildings_per_second': round(len(buildings) / elapsed, 2),
+        'upstream_requests': requests,
+        'requests_per_building': round(requests / max(len(buildings), 1), 2),
+        'cache_hit_rate': round(geocoder.cache_hits / lookups, 3) if lookups else 0.0,
+        'failed_attempts': geocoder.geocoder.failed_attempts,
+        'backoff_seconds': round(geocoder.geocoder.backoff_seconds, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark geocoding throughput against a mock Nominatim')
+    parser.add_argument('--scenarios', nargs='+', choices=[name for name, _, _ in SCENARIOS],
+                        default=[name for name, _, _ in SCENARIOS])
+    parser.add_argument('--apartments', type=int, default=3, help='Register rows per building')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+    # Injected faults are expected; keep retry warnings and geopy's HTTP error logs out of the table
+    logging.getLogger().setLevel(logging.ERROR)
+    logging.getLogger('geocode_properties_enhanced').setLevel(logging.CRITICAL)
+
+    directory = tempfile.mkdtemp()
+    input_file = os.path.join(directory, 'register.csv')
+    write_register(input_file, args.apartments)
+    warm_cache = os.path.join(directory, 'warm_cache.json')
+
+    results = {}
+    for name, server_options, geocoder_options in SCENARIOS:
+        if name not in args.scenarios:
+            continue
+        if name == 'warm-cache':
+            # Fill the cache with a cold run first, then measure the rerun
+            run_scenario(input_file, directory, server_options, geocoder_options, warm_cache)
+            cache_file = warm_cache
+        else:
+            cache_file = os.path.join(directory, f"{name}_cache.json")
+        results[name] = run_scenario(input_file, directory, server_options, geocoder_options, cache_file)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{'scenario':<14} {'bldg/s':>8} {'req/bldg':>9} {'hit rate':>9} {'failed':>7} {'backoff s':>10} "
+          f"{'resolved':>9} {'seconds':>8}")
+    for name, r in results.items():
+        print(f"{name:<14} {r['buildings_per_second']:8.1f} {r['requests_per_building']:9.2f} "
+              f"{r['cache_hit_rate']:9.1%} {r['failed_attempts']:7d} {r['backoff_seconds']:10.1f} "
+              f"{r['resolved']:>4}/{r['buildings']:<4} {r['seconds']:8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark the geocoder's output formats on a large synthetic property set:
+write time, size on disk, full read, a two-column read, a small bounding-box
+read, and counting geocoded rows (what count_geocoded.py does).
+
+Rows look like the geocoder's output: register address, district, building
+address, the coordinates tuple and longitude/latitude. Apartments share
+their building's point, and some buildings failed to geocode.
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import pyarrow.parquet as pq
+
+from output_formats import OUTPUT_FORMATS, ungeocoded_sidecar_path, write_output
+
+MIN_LON, MAX_LON, MIN_LAT, MAX_LAT = 37.4, 37.7, 47.0, 47.2
+EXTENSIONS = {'geojson': 'geojson', 'csv': 'csv', 'geoparquet': 'parquet', 'flatgeobuf': 'fgb'}
+STREETS = ['пр-т Мира', 'ул. Артема', 'б-р Шевченко', 'пр-т Строителей', 'ул. Куприна', 'пер. Нахимова',
+           'ул. Казанцева', 'пр-т Металлургов', 'ул. Греческая', 'ул. Гагарина']
+DISTRICTS = ['Центральный район', 'Приморский район', 'Кальмиусский район', 'Левобережный район']
+
+
+def synthetic_output(count, buildings=8000, failed_share=0.08, seed=3):
+    rng = np.random.default_rng(seed)
+    lon = rng.uniform(MIN_LON, MAX_LON, buildings)
+    lat = rng.uniform(MIN_LAT, MAX_LAT, buildings)
+    failed = rng.random(buildings) < failed_share
+    lon[failed] = np.nan
+    lat[failed] = np.nan
+    building_address = [f"{STREETS[b % len(STREETS)]}, д. {b // len(STREETS) + 1}" for b in range(buildings)]
+
+    which = rng.integers(0, buildings, count)
+    apartments = rng.integers(1, 300, count)
+    return pd.DataFrame({
+        'address': [f"{building_address[b]}, кв. {a}" for b, a in zip(which, apartments)],
+        'district': [DISTRICTS[b % len(DISTRICTS)] for b in which],
+        'building_address': [building_address[b] for b in which],
+        'coordinates': [None if failed[b] else (lon[b], lat[b]) for b in which],
+        'longitude': lon[which],
+        'latitude': lat[which],
+    })
+
+
+def read_full(path, output_format):
+    if output_format == 'csv':
+        return pd.read_csv(path)
+    if output_format == 'geoparquet':
+        return gpd.read_parquet(path)
+    return gpd.read_file(path)
+
+
+def read_columns(path, output_format, columns):
+    if output_format == 'csv':
+        return pd.read_csv(path, usecols=columns)
+    if output_format == 'geoparquet':
+        return gpd.read_parquet(path, columns=columns + ['geometry'])
+    return gpd.read_file(path, columns=columns)
+
+
+def read_bbox(path, output_format, bbox):
+    if output_format == 'csv':
+        df = pd.read_csv(path)
+        return df[df.longitude.between(bbox[0], bbox[2]) & df.latitude.between(bbox[1], bbox[3])]
+    if output_format == 'geoparquet':
+        return gpd.read_parquet(path, bbox=bbox)
+    return gpd.read_file(path, bbox=bbox)
+
+
+def count_geocoded(path, output_format):
+    """(total, geocoded) rows, reading as little as each format allows."""
+    if output_format == 'csv':
+        df = pd.read_csv(path, usecols=['longitude'])
+        return len(df), int(df.longitude.notna().sum())
+    if output_format == 'geoparquet':
+        column = pq.read_table(path, columns=['longitude']).column('longitude')
+        return len(column), len(column) - column.null_count
+    if output_format == 'flatgeobuf':
+        import pyogrio
+        located = pyogrio.read_info(path)['features']
+        sidecar = ungeocoded_sidecar_path(path)
+        failed = len(pd.read_csv(sidecar, usecols=['longitude'])) if os.path.exists(sidecar) else 0
+        return located + failed, located
+    with open(path, 'r', encoding='utf-8') as f:
+        features = json.load(f)['features']
+    return len(features), sum(feature['geometry'] is not None for feature in features)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark geocoder output formats')
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--formats', nargs='+', choices=OUTPUT_FORMATS, default=list(OUTPUT_FORMATS))
+    args = parser.parse_args()
+
+    df = synthetic_output(args.rows)
+    expected = (len(df), int(df.longitude.notna().sum()))
+    # Roughly one city block
+    bbox = (37.55, 47.10, 37.56, 47.107)
+    in_bbox = int((df.longitude.between(bbox[0], bbox[2]) & df.latitude.between(bbox[1], bbox[3])).sum())
+    directory = tempfile.mkdtemp()
+    print(f"{len(df)} rows, {expected[1]} geocoded, {in_bbox} inside the test bbox\n")
+    print(f"{'format':<11} {'write s':>8} {'size MB':>8} {'read s':>8} {'2 cols s':>9} {'bbox s':>8} {'count s':>8}")
+
+    for output_format in args.formats:
+        path = os.path.join(directory, f"properties.{EXTENSIONS[output_format]}")
+        _, write_seconds = timed(write_output, df, path, output_format)
+        size = os.path.getsize(path) + (os.path.getsize(ungeocoded_sidecar_path(path))
+                                        if os.path.exists(ungeocoded_sidecar_path(path)) else 0)
+
+        full, read_seconds = timed(read_full, path, output_format)
+        _, columns_seconds = timed(read_columns, path, output_format, ['address', 'district'])
+        selected, bbox_seconds = timed(read_bbox, path, output_format, bbox)
+        counts, count_seconds = timed(count_geocoded, path, output_format)
+
+        assert counts == expected, (output_format, counts, expected)
+        assert len(selected) == in_bbox, (output_format, len(selected), in_bbox)
+        if output_format != 'flatgeobuf':
+            assert len(full) == len(df), (output_format, len(full))
+        print(f"{output_format:<11} {write_seconds:8.2f} {size / 1e6:8.1f} {read_seconds:8.2f} "
+              f"{columns_seconds:9.2f} {bbox_seconds:8.3f} {count_seconds:8.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark GridSpatialIndex against a brute-force (vectorized numpy) scan of
+every point, on a synthetic city-scale set of property points clustered
+around Mariupol apartment blocks, and check both return the same results.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+from spatial_index import GridSpatialIndex, haversine_m
+
+# Mariupol bounding box used by the geocoder's region check
+MIN_LON, MAX_LON, MIN_LAT, MAX_LAT = 37.4, 37.7, 47.0, 47.2
+
+
+def synthetic_properties(count, buildings=5000, seed=5):
+    """Apartments share their building's coordinates, like geocoded register rows."""
+    rng = np.random.default_rng(seed)
+    building_lon = rng.uniform(MIN_LON, MAX_LON, buildings)
+    building_lat = rng.uniform(MIN_LAT, MAX_LAT, buildings)
+    which = rng.integers(0, buildings, count)
+    return building_lon[which], building_lat[which]
+
+
+def timed(function, queries):
+    start = time.perf_counter()
+    results = [function(*query) for query in queries]
+    return results, (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the spatial index')
+    parser.add_argument('--points', type=int, default=200000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--radius', type=float, default=300.0, help='Radius query size in metres')
+    parser.add_argument('--knn', type=int, default=10)
+    args = parser.parse_args()
+
+    lon, lat = synthetic_properties(args.points)
+    start = time.perf_counter()
+    index = GridSpatialIndex(lon, lat)
+    build_seconds = time.perf_counter() - start
+
+    path = os.path.join(tempfile.mkdtemp(), 'index.npz')
+    index.save(path)
+    start = time.perf_counter()
+    index = GridSpatialIndex.load(path)
+    load_seconds = time.perf_counter() - start
+
+    rng = np.random.default_rng(9)
+    centers = list(zip(rng.uniform(MIN_LON, MAX_LON, args.queries), rng.uniform(MIN_LAT, MAX_LAT, args.queries)))
+    boxes = [(x, y, x + 0.01, y + 0.007) for x, y in centers]
+
+    def brute_radius(x, y):
+        distances = haversine_m(x, y, lon, lat)
+        return np.flatnonzero(distances <= args.radius)
+
+    def brute_knn(x, y):
+        distances = haversine_m(x, y, lon, lat)
+        return np.sort(distances[np.argpartition(distances, args.knn)[:args.knn]])
+
+    def brute_bbox(x0, y0, x1, y1):
+        return np.flatnonzero((lon >= x0) & (lon <= x1) & (lat >= y0) & (lat <= y1))
+
+    rows = []
+    for name, brute, indexed, queries, same in (
+        (f'radius {args.radius:.0f} m', brute_radius, lambda x, y: index.radius(x, y, args.radius)[0], centers,
+         lambda b, i: np.array_equal(np.sort(b), np.sort(index.ids[i]))),
+        (f'{args.knn}-nearest', brute_knn, lambda x, y: index.nearest(x, y, args.knn)[1], centers,
+         lambda b, i: np.allclose(b, i)),
+        ('bbox ~750x780 m', brute_bbox, index.bbox, boxes,
+         lambda b, i: np.array_equal(np.sort(b), np.sort(index.ids[i]))),
+    ):
+        expected, brute_ms = timed(brute, queries)
+        actual, index_ms = timed(indexed, queries)
+        if not all(same(b, i) for b, i in zip(expected, actual)):
+            print(f"MISMATCH in {name} queries")
+            return 1
+        hits = np.mean([len(r) for r in expected])
+        rows.append((name, brute_ms, index_ms, hits))
+
+    print(f"{args.points:,} points: built in {build_seconds * 1000:.0f} ms, "
+          f"loaded from disk in {load_seconds * 1000:.0f} ms ({os.path.getsize(path) / 1e6:.1f} MB)")
+    for name, brute_ms, index_ms, hits in rows:
+        print(f"{name:<16} brute force {brute_ms:7.3f} ms  grid {index_ms:6.3f} ms  "
+              f"({brute_ms / index_ms:5.1f}x, {hits:,.0f} results/query)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
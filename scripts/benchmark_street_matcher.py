@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Benchmark StreetMatcher on noisy register/Telegram spellings of the
+gazetteer fixture's streets. It measures:
+- accuracy: share of noisy names mapped to the right street, to a wrong
+  one, or left alone, and how often a correctly spelled real street that
+  the index does not know gets respelled into a fixture street (a false
+  positive that would borrow another street's coordinates);
+- lookup cost: the matcher, cold and memoized, against the old
+  street_name_mappings scan;
+- upstream requests and resolution: the geocoder with and without the
+  matcher, on noisy building addresses against the mock Nominatim server,
+  starting from a cache that knows every fixture street from one other
+  building.
+"""
+
+import os
+import csv
+import sys
+import time
+import random
+import logging
+import argparse
+import tempfile
+
+from mock_nominatim import DEFAULT_GAZETTEER, MockNominatimServer
+from street_matcher import STREET_NAME_VARIANTS, StreetMatcher, fold_street_name, street_name_span
+import geocode_properties_enhanced as geocoding
+
+TYPE_SPELLINGS = {'улица': ['ул.', 'улица', 'вул.'], 'проспект': ['пр-т', 'проспект', 'просп.'],
+                  'бульвар': ['б-р', 'бульвар'], 'переулок': ['пер.', 'переулок', 'пров.'],
+                  'площадь': ['пл.', 'площадь'], 'вулиця': ['вул.', 'ул.']}
+UKRAINIAN_LETTERS = {'и': 'і', 'е': 'є', 'ы': 'и', 'э': 'е', 'ё': 'е'}
+CYRILLIC = 'абвгдежзиклмнопрстуфхцчшщыэюя'
+# Real streets missing from the fixture, several a letter or an ending away
+# from a fixture street; any respelling of them is a wrong street
+UNKNOWN_STREETS = ['улица Морская', 'улица Черноморская', 'улица Азовская', 'улица Казацкая',
+                   'улица Киевский спуск', 'переулок Греческий', 'переулок Итальянский', 'улица Торговый ряд',
+                   'улица Пушкина', 'улица Куинджи', 'улица Университетская', 'улица Харлампиевская',
+                   'улица Георгиевская', 'улица Флотская', 'улица Строительная', 'улица Мариупольская']
+
+
+def legacy_mapping_scan(address):
+    """The lookup half of the old street_name_mappings loop, for timing."""
+    variations = []
+    for standard, *alts in STREET_NAME_VARIANTS:
+        if standard.lower() in address.lower():
+            for alt in alts:
+                variations.append(address.replace(standard, alt))
+                variations.append(address.lower().replace(standard.lower(), alt))
+    return variations
+
+
+def misspell(name, rng):
+    """One register/Telegram-style corruption of a street name."""
+    kind = rng.choice(['ukrainian', 'drop', 'double', 'swap', 'substitute', 'case'])
+    letters = [i for i, c in enumerate(name) if c.isalpha()]
+    if len(letters) < 4:
+        return name.lower()
+    i = rng.choice(letters[1:-1])
+    if kind == 'ukrainian':
+        swapped = ''.join(UKRAINIAN_LETTERS.get(c, c) for c in name)
+        return swapped if swapped != name else name[:i] + name[i + 1:]
+    if kind == 'drop':
+        return name[:i] + name[i + 1:]
+    if kind == 'double':
+        return name[:i] + name[i] + name[i:]
+    if kind == 'swap':
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    if kind == 'substitute':
+        return name[:i] + rng.choice(CYRILLIC) + name[i + 1:]
+    return name.lower()
+
+
+def noisy_buildings(count, seed=5):
+    """(noisy address, true street name) pairs for the fixture's buildings."""
+    rng = random.Random(seed)
+    with open(DEFAULT_GAZETTEER, 'r', encoding='utf-8-sig', newline='') as f:
+        rows = list(csv.DictReader(f))
+    buildings = []
+    for _ in range(count):
+        row = rng.choice(rows)
+        street_type, _, name = row['street'].partition(' ')
+        spelling = rng.choice(TYPE_SPELLINGS.get(street_type, [street_type]))
+        buildings.append((f"{spelling} {misspell(name, rng)}, д. {row['housenumber']}", name))
+    return buildings
+
+
+def unknown_buildings(count, seed=6):
+    """(address, street name) pairs on UNKNOWN_STREETS, spelled correctly."""
+    rng = random.Random(seed)
+    buildings = []
+    for _ in range(count):
+        street_type, _, name = rng.choice(UNKNOWN_STREETS).partition(' ')
+        spelling = rng.choice(TYPE_SPELLINGS.get(street_type, [street_type]))
+        buildings.append((f"{spelling} {name}, д. {rng.randint(1, 120)}", name))
+    return buildings
+
+
+def accuracy(matcher, buildings):
+    right = wrong = unchanged = 0
+    for address, truth in buildings:
+        canonical = matcher.canonicalize(address) or address
+        span = street_name_span(canonical)
+        name = canonical[span[0]:span[1]] if span else ''
+        if fold_street_name(name) == fold_street_name(truth):
+            right += 1
+        elif canonical == address:
+            unchanged += 1
+        else:
+            wrong += 1
+    return right, wrong, unchanged
+
+
+def time_per_call(function, items, rounds=1):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for item in items:
+            function(item)
+    return (time.perf_counter() - start) / (rounds * len(items)) * 1e6
+
+
+def known_streets_cache(path):
+    """
+    A cache that has already resolved one other building on every fixture
+    street, as a production cache has; the matcher learns the streets from it.
+    """
+    cache = geocoding.open_geocoding_cache(path)
+    with open(DEFAULT_GAZETTEER, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            cache[geocoding.building_cache_key(f"{row['street']}, д. 999")] = (float(row['longitude']),
+                                                                                float(row['latitude']))
+    cache.close()
+
+
+def geocode_noisy(buildings, use_matcher):
+    cache_file = os.path.join(tempfile.mkdtemp(), 'cache.json')
+    known_streets_cache(cache_file)
+    with MockNominatimServer(seed=7) as server:
+        geocoder = geocoding.SeizedPropertyGeocoder(cache_file=cache_file, provider='self-hosted',
+                                                    domain=server.domain, scheme='http',
+                                                    manual_coordinates_file=None)
+        if not use_matcher:
+            geocoder.street_matcher = StreetMatcher()
+        resolved = sum(geocoder._geocode_single_address(address, '') is not None for address, _ in buildings)
+        geocoder.close()
+        return server.stats()['requests'], resolved
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark fuzzy street matching')
+    parser.add_argument('--names', type=int, default=2000, help='Noisy addresses for accuracy and timing')
+    parser.add_argument('--buildings', type=int, default=150, help='Noisy buildings to geocode')
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.ERROR)
+    logging.getLogger('geocode_properties_enhanced').setLevel(logging.CRITICAL)
+
+    start = time.perf_counter()
+    matcher = StreetMatcher.build(DEFAULT_GAZETTEER)
+    build_ms = (time.perf_counter() - start) * 1000
+    buildings = noisy_buildings(args.names)
+    right, wrong, unchanged = accuracy(matcher, buildings)
+    print(f"Index: {len(matcher)} spellings, built in {build_ms:.1f} ms")
+    print(f"Accuracy on {len(buildings)} noisy addresses: {right / len(buildings):.1%} right, "
+          f"{wrong / len(buildings):.1%} wrong street, {unchanged / len(buildings):.1%} unmatched")
+    unknown = unknown_buildings(max(len(buildings) // 4, 1))
+    kept, respelled, _ = accuracy(matcher, unknown)
+    print(f"Unknown real streets, {len(unknown)} addresses: {kept / len(unknown):.1%} left alone, "
+          f"{respelled / len(unknown):.1%} respelled to a wrong street")
+
+    addresses = [address for address, _ in buildings]
+    fresh = StreetMatcher.build(DEFAULT_GAZETTEER)
+    cold = time_per_call(fresh.canonicalize, addresses)
+    warm = time_per_call(fresh.canonicalize, addresses, rounds=5)
+    legacy = time_per_call(legacy_mapping_scan, addresses, rounds=5)
+    print(f"Per address: old mapping scan {legacy:.1f} µs, matcher {cold:.1f} µs cold / {warm:.1f} µs memoized")
+
+    sample = noisy_buildings(args.buildings, seed=9)
+    for label, use_matcher in (('without matcher', False), ('with matcher', True)):
+        requests, resolved = geocode_noisy(sample, use_matcher)
+        print(f"Geocoding {len(sample)} noisy buildings {label}: {resolved} resolved, "
+              f"{requests} upstream requests ({requests / len(sample):.2f} per building)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark toponymic database start-up: compiling the index from the JSON
+file (parse, validate, build the automata) against loading the compiled
+snapshot, on synthetic databases of growing size. Also checks that the
+snapshot answers lookups exactly like a freshly built index, and times
+unmemoized lookups with and without an as-of date; dated lookups bisect
+per-state rename staircases, so they should stay close to undated ones as
+the number of renamings grows.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import toponymic_store  # noqa: E402
+from toponymic_index import ToponymicIndex  # noqa: E402
+
+SYLLABLES = ['ка', 'ло', 'ми', 'ре', 'ту', 'на', 'зо', 'ви', 'ше', 'по', 'ль', 'ск', 'ро', 'да', 'бу']
+STREET_TYPES = [('улица', 'вулиця'), ('проспект', 'проспект'), ('переулок', 'провулок'), ('площадь', 'площа')]
+
+
+def synthetic_database(streets, seed=3):
+    rng = random.Random(seed)
+    database = {}
+    used = set()
+    while len(used) < streets:
+        name = ''.join(rng.choices(SYLLABLES, k=rng.randint(3, 5))).capitalize()
+        renamed = ''.join(rng.choices(SYLLABLES, k=rng.randint(3, 5))).capitalize()
+        if name in used or renamed in used:
+            continue
+        used.update((name, renamed))
+        russian_type, ukrainian_type = rng.choice(STREET_TYPES)
+        district = f"DISTRICT_{len(used) % 7}"
+        database.setdefault(district, {})[f"street_{len(used)}"] = {
+            'ukrainian_name': f"{ukrainian_type} {name}",
+            'occupation_name': f"{russian_type} {renamed}",
+            'renaming_date': f"2023-{rng.randint(1, 12):02d}",
+            'cultural_significance': 'RESISTANCE_SYMBOL_ERASURE',
+        }
+    return database
+
+
+def timed(function, *args, rounds=5):
+    best, result = float('inf'), None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def compile_from_source(path):
+    return ToponymicIndex(toponymic_store.load_database(path))
+
+
+def lookup_microseconds(index, probes, as_of=None):
+    start = time.perf_counter()
+    for probe in probes:
+        index._memo.clear()
+        index.lookup(probe, as_of)
+    return (time.perf_counter() - start) / len(probes) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark toponymic snapshot loading')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[3, 300, 3000],
+                        help='Database sizes (streets) to measure')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    print(f"{'streets':>8} {'compile ms':>11} {'snapshot ms':>12} {'speedup':>8} {'snapshot KiB':>13} "
+          f"{'lookup µs':>10} {'as-of µs':>9}")
+    for size in args.sizes:
+        path = os.path.join(directory, f"toponymic_{size}.json")
+        database = synthetic_database(size)
+        toponymic_store.write_database(database, path)
+
+        built, compile_ms = timed(compile_from_source, path)
+        toponymic_store.load_index(path)  # writes the snapshot
+        loaded, snapshot_ms = timed(toponymic_store.load_index, path)
+
+        probes = [record['occupation_name'].split()[1].lower() for street in database.values()
+                  for record in street.values()][:500] + ['несуществующая', 'ка']
+        if loaded.version != built.version or any(loaded.lookup(p, as_of) != built.lookup(p, as_of)
+                                                  for p in probes for as_of in (None, '2023-06-15')):
+            print(f"Mismatch between snapshot and compiled index for {size} streets")
+            return 1
+        snapshot_file = toponymic_store.snapshot_path(path, toponymic_store.file_sha256(path))
+        print(f"{size:8d} {compile_ms:11.2f} {snapshot_ms:12.2f} {compile_ms / snapshot_ms:7.1f}x "
+              f"{os.path.getsize(snapshot_file) / 1024:13.1f} {lookup_microseconds(loaded, probes):10.2f} "
+              f"{lookup_microseconds(loaded, probes, '2023-06-15'):9.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Measure upstream calls per resolved building with fixed and with adaptive
+(success-statistics ordered) query variations, against a simulated provider.
+
+The simulated provider knows the buildings of the bundled gazetteer fixture
+and, like free-text Nominatim, only resolves queries that name the city and
+do not mention a district. Register-style addresses for those buildings are
+split into a training half, geocoded to learn the statistics, and a held-out
+half geocoded once with empty statistics ("before") and once with the learned
+ones ("after"). No network is used.
+"""
+
+import os
+import sys
+import random
+import logging
+import argparse
+import tempfile
+from types import SimpleNamespace
+
+from gazetteer import GazetteerGeocoder
+from variation_stats import VariationStats
+import geocode_properties_enhanced as geocoding
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'fixtures', 'mariupol_gazetteer.csv')
+DISTRICTS = ['ЖРА', 'ЦР', 'Кальмиусский район', 'Приморский район', 'Левобережный район']
+STREET_SPELLINGS = {'улица': ['ул.', 'улица'], 'проспект': ['пр-т', 'проспект'], 'бульвар': ['б-р', 'бульвар'],
+                    'переулок': ['пер.', 'переулок'], 'площадь': ['пл.', 'площадь']}
+
+
+class SimulatedProvider:
+    def __init__(self, gazetteer: GazetteerGeocoder):
+        self.gazetteer = gazetteer
+        self.calls = 0
+
+    def geocode(self, query, **kwargs):
+        self.calls += 1
+        lower = query.lower()
+        if 'мариуполь' not in lower or 'район' in lower:
+            return None
+        coords = self.gazetteer.lookup(query.split(', Мариуполь')[0])
+        return SimpleNamespace(longitude=coords[0], latitude=coords[1]) if coords else None
+
+
+def register_buildings(seed=3):
+    import csv
+    rng = random.Random(seed)
+    with open(FIXTURE, 'r', encoding='utf-8-sig', newline='') as f:
+        rows = list(csv.DictReader(f))
+    buildings = []
+    for row in rows:
+        street_type, _, name = row['street'].partition(' ')
+        for spelling in STREET_SPELLINGS.get(street_type, [street_type]):
+            buildings.append((f"{spelling} {name}, д. {row['housenumber']}", rng.choice(DISTRICTS)))
+    rng.shuffle(buildings)
+    return buildings
+
+
+def geocode_all(buildings, stats: VariationStats, provider: SimulatedProvider):
+    geocoder = geocoding.SeizedPropertyGeocoder(cache_file=None, manual_coordinates_file=None)
+    geocoder.variation_stats = stats
+    geocoder.geocoder._geocode_upstream = provider.geocode
+    calls_before = provider.calls
+    resolved = sum(geocoder._geocode_single_address(address, district) is not None
+                   for address, district in buildings)
+    return provider.calls - calls_before, resolved
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark adaptive query variation ordering')
+    parser.add_argument('--stats-file', default=None, help='Keep the learned statistics in this file')
+    args = parser.parse_args()
+    logging.getLogger('geocode_properties_enhanced').setLevel(logging.ERROR)
+
+    provider = SimulatedProvider(GazetteerGeocoder(FIXTURE))
+    buildings = register_buildings()
+    half = len(buildings) // 2
+    training, held_out = buildings[:half], buildings[half:]
+
+    calls, resolved = geocode_all(held_out, VariationStats(), provider)
+    print(f"Fixed order:    {calls} upstream calls for {resolved}/{len(held_out)} resolved buildings "
+          f"({calls / max(resolved, 1):.2f} calls per resolved building)")
+
+    stats_file = args.stats_file or os.path.join(tempfile.mkdtemp(), 'variation_stats.json')
+    learned = VariationStats(stats_file)
+    geocode_all(training, learned, provider)
+    learned.flush()
+
+    calls, resolved = geocode_all(held_out, VariationStats(stats_file), provider)
+    print(f"Adaptive order: {calls} upstream calls for {resolved}/{len(held_out)} resolved buildings "
+          f"({calls / max(resolved, 1):.2f} calls per resolved building)")
+    print(f"Statistics learned from {len(training)} training buildings: {stats_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Rewrite a legacy geocoding cache into deduplicated building keys.
+
+Legacy caches hold one entry per apartment (and per query variant), e.g.
+"бульвар Шевченко 228 68/2, ЖРА, Мариуполь, Украина". Every entry is re-keyed
+with building_cache_key, entries of one building are merged (majority vote
+over positive results; negative only if no variant ever resolved) and the
+result is written with any cache backend. Reports the size reduction and,
+for a sample of register addresses, the cache hit rate before and after.
+"""
+
+import os
+import re
+import sys
+import logging
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+from geocoding_cache import building_cache_key, cached_building, compact_entries, open_geocoding_cache
+
+logger = logging.getLogger(__name__)
+
+# Sentinel for cache misses (None is a cached negative result)
+_MISSING = object()
+
+
+def _file_size(path: str) -> int:
+    return sum(os.path.getsize(p) for p in (path, f"{path}-wal") if os.path.exists(p))
+
+
+# "<street> <house> [<apartment>]" at the start of a legacy key
+_LEGACY_ADDRESS = re.compile(r'^(.*?\S)\s+(\d+[а-яА-ЯіїєІЇЄ]?(?:/\d+[а-яА-ЯіїєІЇЄ]?)?)(?:\s+(\d+(?:/\d+)?))?$')
+# Register rows always list a district; legacy keys often name none
+PLACEHOLDER_DISTRICT = 'Центральный район'
+
+
+def register_rows(legacy_keys: List[str]) -> List[Tuple[str, str]]:
+    """
+    (address, district) rows in the register's format ("бульвар Богдана
+    Хмельницкого, д. 24, кв. 10") for the apartments a legacy cache was built
+    from. A row takes the district its key names, else PLACEHOLDER_DISTRICT.
+    """
+    rows = []
+    for key in legacy_keys:
+        parts = [part.strip() for part in key.split('|')[0].split(',')]
+        match = _LEGACY_ADDRESS.match(parts[0])
+        if not match:
+            continue
+        street, house, apartment = match.groups()
+        address = f"{street}, д. {house}" + (f", кв. {apartment}" if apartment else "")
+        district = next((part for part in parts[1:] if part.upper() in ('ЖРА', 'ОРА', 'ЦР', 'КР', 'ПР', 'ЛБР')
+                         or part.lower().endswith('район')), PLACEHOLDER_DISTRICT)
+        rows.append((address, district))
+    return rows
+
+
+def _load_sample(addresses_csv: Optional[str], legacy_keys: List[str]) -> List[Tuple[str, str]]:
+    if not addresses_csv:
+        # Without a register sample, rebuild register rows for the cached apartments
+        return register_rows(legacy_keys)
+    import pandas as pd
+    df = pd.read_csv(addresses_csv)
+    districts = df['district'] if 'district' in df.columns else [""] * len(df)
+    return [(str(address), str(district) if isinstance(district, str) else "")
+            for address, district in zip(df['address'], districts)]
+
+
+def hit_rates(sample: List[Tuple[str, str]], legacy: Dict, compacted: Dict) -> Tuple[float, float]:
+    """
+    Share of sample addresses found by the old lookup key scheme and by the
+    geocoder's lookup (building key, then the city-wide entry).
+    """
+    from geocode_properties_enhanced import SeizedPropertyGeocoder
+    geocoder = SeizedPropertyGeocoder()
+
+    old_hits = new_hits = 0
+    for address, district in sample:
+        cleaned = geocoder._clean_address(geocoder.extract_building_address(address))
+        old_hits += f"{cleaned}|{district}".lower() in legacy
+        new_hits += cached_building(compacted, building_cache_key(cleaned, district), _MISSING) is not _MISSING
+    total = len(sample) or 1
+    return old_hits / total, new_hits / total
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Compact a legacy geocoding cache into building keys')
+    parser.add_argument('legacy_cache', help='Legacy cache file (JSON or SQLite)')
+    parser.add_argument('output_cache', help='Compacted cache file (.json, or .sqlite/.db for SQLite)')
+    parser.add_argument('--addresses', default=None,
+                        help='CSV with address (and district) columns to measure the hit rate on')
+    parser.add_argument('--skip-hit-rate', action='store_true',
+                        help='Only compact; do not measure hit rates')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if os.path.abspath(args.legacy_cache) == os.path.abspath(args.output_cache):
+        logger.error("Write the compacted cache to a new file; the legacy cache is left untouched")
+        return 1
+
+    legacy_cache = open_geocoding_cache(args.legacy_cache)
+    legacy = dict(legacy_cache.items())
+    legacy_cache.close()
+    compacted, conflicts = compact_entries(legacy.items())
+
+    output = open_geocoding_cache(args.output_cache)
+    for key, coords in compacted.items():
+        output[key] = coords
+    output.close()
+
+    before, after = _file_size(args.legacy_cache), _file_size(args.output_cache)
+    print(f"Entries: {len(legacy)} -> {len(compacted)} "
+          f"({100 * (1 - len(compacted) / max(len(legacy), 1)):.1f}% fewer)")
+    print(f"Size:    {before:,} -> {after:,} bytes ({100 * (1 - after / max(before, 1)):.1f}% smaller)")
+    print(f"Buildings with conflicting coordinates (majority kept): {conflicts}")
+
+    if not args.skip_hit_rate:
+        sample = _load_sample(args.addresses, list(legacy))
+        old_rate, new_rate = hit_rates(sample, legacy, compacted)
+        print(f"Hit rate on {len(sample)} addresses: {100 * old_rate:.1f}% -> {100 * new_rate:.1f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
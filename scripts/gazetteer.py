@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Offline geocoder backed by a local street/house-number gazetteer.
+
+The gazetteer is a CSV (e.g. an OSM extract of Mariupol addresses) with
+columns street, housenumber, longitude, latitude. Rows are loaded into a
+dict keyed by (normalized street name, normalized house number), so a
+lookup is a few string operations and one hash probe, with no network.
+Street and house numbers go through the same AddressNormalizer and
+building_cache_key as the geocoder, so "пер. Нахимова, д. 3, ЖРА" and a
+gazetteer row "переулок Нахимова,3" meet on the same key.
+
+data/fixtures/mariupol_gazetteer.csv is a small bundled fixture
+(approximate coordinates) for exercising the offline path:
+
+    python scripts/gazetteer.py data/fixtures/mariupol_gazetteer.csv --self-check
+"""
+
+import re
+import sys
+import csv
+import time
+import logging
+import argparse
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from address_normalizer import normalize_address
+from geocoding_cache import building_cache_key, building_part
+
+logger = logging.getLogger(__name__)
+
+HOUSE_PREFIXES = {'д', 'дом', 'буд'}
+STREET_TYPES = {'улица', 'проспект', 'бульвар', 'переулок', 'площадь', 'поселок',
+                'шоссе', 'набережная', 'проезд', 'тупик', 'спуск', 'микрорайон'}
+_HOUSE = re.compile(r'^\d+[а-яіїєa-z]?(?:/\d+[а-яіїєa-z]?)?$')
+# Latin letters that register clerks type for look-alike Cyrillic house letters
+_HOUSE_LETTERS = str.maketrans('abcehkmoptx', 'авсенкмортх')
+
+
+def normalize_house_number(house: str) -> str:
+    """'22-А', '22 а' and '22a' (Latin) all become '22а'."""
+    return re.sub(r'[\s\-]', '', house.lower()).translate(_HOUSE_LETTERS)
+
+
+def _house_token(token: str) -> str:
+    house = normalize_house_number(token) if token[:1].isdigit() else token
+    return house if _HOUSE.match(house) else token
+
+
+def _split_key(key: str) -> Optional[Tuple[str, str, str]]:
+    tokens = [_house_token(token) for token in key.split()]
+    for i in range(len(tokens) - 1, 0, -1):
+        if _HOUSE.match(tokens[i]):
+            street = [token for token in tokens[:i] if token not in HOUSE_PREFIXES]
+            street_type = next((token for token in street if token in STREET_TYPES), '')
+            name = ' '.join(token for token in street if token not in STREET_TYPES)
+            return (street_type, name, tokens[i]) if name else None
+    return None
+
+
+@lru_cache(maxsize=65536)
+def split_address(address: str) -> Tuple[Tuple[str, str, str], ...]:
+    """
+    Candidate (street type, street name, house number) parses of an address,
+    all normalized; empty if no house number follows a street name.
+
+    The address is parsed both as given and after AddressNormalizer, because
+    the normalizer mangles some spellings (e.g. "пр-кт" next to a district
+    rule) that building_cache_key alone handles.
+    """
+    parses = []
+    for key in (building_cache_key(address), building_cache_key(normalize_address(address))):
+        parts = _split_key(building_part(key))
+        if parts and parts not in parses:
+            parses.append(parts)
+    return tuple(parses)
+
+
+class GazetteerGeocoder:
+    """In-memory (street, house number) -> (lon, lat) index over a gazetteer CSV."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._index: Dict[Tuple[str, str], List[Tuple[str, float, float]]] = defaultdict(list)
+        self.rows = 0
+        self.hits = 0
+        self.misses = 0
+        if path:
+            self.load(path)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def load(self, path: str) -> int:
+        """Add every row of a gazetteer CSV to the index. Returns rows indexed."""
+        indexed = 0
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                try:
+                    self.add(row['street'], row['housenumber'], float(row['longitude']), float(row['latitude']))
+                    indexed += 1
+                except (KeyError, TypeError, ValueError) as e:
+                    logger.warning(f"Skipping gazetteer row {row}: {e}")
+        self.rows += indexed
+        logger.info(f"Loaded {indexed} gazetteer addresses ({len(self)} keys) from {path}")
+        return indexed
+
+    def add(self, street: str, house_number: str, lon: float, lat: float):
+        parses = split_address(f"{street} {house_number}")
+        if not parses:
+            raise ValueError("no street name and house number")
+        for street_type, name, house in parses:
+            self._index[(name, house)].append((street_type, lon, lat))
+
+    def lookup(self, address: str) -> Optional[Tuple[float, float]]:
+        """Coordinates of an address, preferring a row with the same street type."""
+        for street_type, name, house in (split_address(address) if address else ()):
+            candidates = self._index.get((name, house))
+            if not candidates:
+                continue
+            self.hits += 1
+            for candidate_type, lon, lat in candidates:
+                if candidate_type == street_type:
+                    return (lon, lat)
+            return candidates[0][1:]
+        self.misses += 1
+        return None
+
+
+def self_check(geocoder: GazetteerGeocoder, path: str) -> int:
+    """Resolve every gazetteer row by its own address, register-style; report hit rate and speed."""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        queries = [f"{row['street']}, д. {row['housenumber']}, кв. 1" for row in csv.DictReader(f)]
+    queries = [re.sub(r',?\s*кв\.?\s*\d+.*$', '', query) for query in queries]
+    resolved = sum(geocoder.lookup(query) is not None for query in queries)
+
+    rounds = max(1, 20000 // max(len(queries), 1))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for query in queries:
+            geocoder.lookup(query)
+    per_lookup = (time.perf_counter() - start) / (rounds * len(queries)) if queries else 0.0
+    print(f"Resolved {resolved}/{len(queries)} gazetteer addresses offline "
+          f"({per_lookup * 1e6:.1f} µs per lookup, normalization included)")
+    return 0 if resolved == len(queries) else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Look up addresses in a local gazetteer')
+    parser.add_argument('gazetteer', help='Gazetteer CSV (street, housenumber, longitude, latitude)')
+    parser.add_argument('addresses', nargs='*', help='Addresses to look up')
+    parser.add_argument('--self-check', action='store_true',
+                        help='Resolve every gazetteer row by its own address and time the lookups')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    geocoder = GazetteerGeocoder(args.gazetteer)
+    for address in args.addresses:
+        print(f"{address} -> {geocoder.lookup(address)}")
+    if args.self_check:
+        return self_check(geocoder, args.gazetteer)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,62 +6,95 @@ Enhanced geocoding script for Mariupol seized properties with caching and retrie
 import os
 import sys
 import re
+import csv
 import json
 import logging
-import concurrent.futures
+import threading
 from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple, Any, Set, Union
 import time
 import argparse
-from geopy.geocoders import Nominatim
-from geopy.extra.rate_limiter import RateLimiter
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-from pathlib import Path
-import pandas as pd
-import geopandas as gpd
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError, GeocoderUnavailable
-from shapely.geometry import Point
-from tqdm import tqdm
 import random
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout), logging.FileHandler('geocoding.log')]
-)
+from address_normalizer import AddressNormalizer
+from gazetteer import GazetteerGeocoder
+from geocoding_cache import (SQLITE_SUFFIXES, building_cache_key, cached_building, migrate_json_cache,
+                             open_geocoding_cache)
+from manual_overrides import DEFAULT_OVERRIDES_FILE, ManualOverrideIndex
+from output_formats import OUTPUT_FORMATS, write_output
+from rate_limiter import PROVIDER_RATE_LIMITS, TokenBucket, bucket_for_provider
+from single_flight import SingleFlight
+from street_matcher import StreetMatcher, load_toponymic_database
+from variation_stats import VariationStats, variation_context, variation_template
+
+# pandas and geopy are imported where they are used, and logging is only
+# configured by main(), so importing this module (or running --help) is cheap
+# and has no side effects such as creating geocoding.log.
 logger = logging.getLogger(__name__)
 
+
+def configure_logging(log_file: Optional[str] = 'geocoding.log'):
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=handlers
+    )
+
+# Sentinel for cache misses (None is a cached negative result)
+_MISSING = object()
+# Columns of the partial output written by checkpoints
+CHECKPOINT_COLUMNS = ['building_address', 'district', 'longitude', 'latitude']
+
 class RateLimitedGeocoder:
-    def __init__(self, user_agent="mariupol_property_geocoder", **kwargs):
+    def __init__(self, user_agent="mariupol_property_geocoder", bucket: Optional[TokenBucket] = None,
+                 provider: str = 'nominatim', timeout: float = 30, **kwargs):
+        from geopy.geocoders import Nominatim
+        self.timeout = timeout
         self.geocoder = Nominatim(
             user_agent=user_agent,
-            timeout=30,
+            timeout=timeout,
             **kwargs
         )
-        # More conservative rate limiting (Nominatim's default is 1 request/second)
-        self.min_delay = 1.1  # seconds between requests
-        self.last_request = 0
+        # One bucket shared by every worker thread; only upstream requests take tokens
+        self.bucket = bucket or bucket_for_provider(provider)
+        # Identical queries from concurrent workers share one upstream request
+        self.single_flight = SingleFlight()
         self.max_retries = 3
-        
+        # Failed upstream attempts and the time spent backing off after them
+        self._stats_lock = threading.Lock()
+        self.failed_attempts = 0
+        self.backoff_seconds = 0.0
+        
+    @staticmethod
+    def _query_key(query, kwargs):
+        normalized = ' '.join(str(query).lower().replace('ё', 'е').split())
+        return normalized, tuple(sorted((k, repr(v)) for k, v in kwargs.items()))
+
     def geocode(self, query, **kwargs):
+        return self.geocode_coalesced(query, **kwargs)[0]
+
+    def geocode_coalesced(self, query, **kwargs):
+        """(location, executed): executed is False when the result came from another caller's request."""
+        return self.single_flight.execute(self._query_key(query, kwargs),
+                                          lambda: self._geocode_upstream(query, **kwargs))
+
+    def _geocode_upstream(self, query, **kwargs):
+        from geopy.exc import GeocoderServiceError, GeocoderTimedOut
         retries = 0
         last_exception = None
         
         while retries < self.max_retries:
             try:
-                # Enforce rate limiting
-                elapsed = time.time() - self.last_request
-                if elapsed < self.min_delay:
-                    time.sleep(self.min_delay - elapsed)
-                
-                # Make the request
-                self.last_request = time.time()
+                # Enforce rate limiting (retries take a token as well)
+                self.bucket.acquire()
                 
                 # Set default parameters
                 params = {
                     'exactly_one': True,
-                    'timeout': 30,
+                    'timeout': self.timeout,
                     'addressdetails': True,
                     'country_codes': 'ua',
                     'language': 'ru',
@@ -72,10 +105,19 @@ class RateLimitedGeocoder:
                 
             except (GeocoderTimedOut, GeocoderServiceError) as e:
                 last_exception = e
-                wait_time = (2 ** retries) + random.uniform(0, 1)
-                logger.warning(f"Attempt {retries + 1} failed: {e}. Retrying in {wait_time:.1f}s...")
-                time.sleep(wait_time)
                 retries += 1
+                with self._stats_lock:
+                    self.failed_attempts += 1
+                if retries >= self.max_retries:
+                    # No point backing off when there is no attempt left
+                    logger.warning(f"Attempt {retries} failed: {e}")
+                    break
+                wait_time = (2 ** (retries - 1)) + random.uniform(0, 1)
+                with self._stats_lock:
+                    self.backoff_seconds += wait_time
+                logger.warning(f"Attempt {retries} failed: {e}. Retrying in {wait_time:.1f}s...")
+                # Backoff only stalls this worker; the others keep their slots
+                time.sleep(wait_time)
             except Exception as e:
                 logger.error(f"Unexpected error: {e}")
                 return None
@@ -84,69 +126,54 @@ class RateLimitedGeocoder:
         return None
 
 class SeizedPropertyGeocoder:
-    def __init__(self, cache_file: str = None, user_agent: str = "mariupol_property_geocoder"):
-        self.geocoder = RateLimitedGeocoder(user_agent=user_agent)
+    def __init__(self, cache_file: str = None, user_agent: str = "mariupol_property_geocoder",
+                 cache_backend: str = 'auto', workers: int = 1, provider: str = 'nominatim',
+                 rate: Optional[float] = None, burst: Optional[float] = None,
+                 domain: Optional[str] = None, scheme: Optional[str] = None, timeout: float = 30,
+                 gazetteer_file: Optional[str] = None,
+                 manual_coordinates_file: Optional[str] = DEFAULT_OVERRIDES_FILE,
+                 variation_stats_file: Optional[str] = None):
+        endpoint = {k: v for k, v in (('domain', domain), ('scheme', scheme)) if v}
+        self.geocoder = RateLimitedGeocoder(user_agent=user_agent,
+                                            bucket=bucket_for_provider(provider, rate, burst),
+                                            timeout=timeout, **endpoint)
+        self.workers = max(1, workers)
+        self._lock = threading.Lock()
         self.cache_file = cache_file
-        self.cache = self._load_cache()
+        self.cache = open_geocoding_cache(cache_file, cache_backend)
+        self.address_normalizer = AddressNormalizer()
+        # Offline street/house index consulted before any network request
+        self.gazetteer = GazetteerGeocoder(gazetteer_file) if gazetteer_file else None
+        # Noisy street spellings -> canonical street, built once from every known street
+        self.street_matcher = StreetMatcher.build(gazetteer_file, self.cache, load_toponymic_database())
         self.cache_hits = 0
         self.cache_misses = 0
+        # Query variation success rates, used to order upstream attempts
+        self.variation_stats = VariationStats(variation_stats_file)
+        self.max_variations = 8
+        self.upstream_calls = 0
+        self.upstream_resolved = 0
         self.last_save = time.time()
-        self.cache_modified = False
         self.save_interval = 300
         
-        # Enhanced manual coordinates with more variations
-        self.manual_coordinates = {
-            # Bohdana Khmelnytskoho Boulevard variations
-            'б-р Богдана Хмельницкого, д. 24': (37.5689, 47.1012),
-            'б-р Богдана Хмельницкого, 24': (37.5689, 47.1012),
-            'Богдана Хмельницкого, 24': (37.5689, 47.1012),
-            'Хмельницкого, 24': (37.5689, 47.1012),
-            'Khmelnytskoho, 24': (37.5689, 47.1012),
-            
-            # 50-летия СССР variations
-            '50-летия СССР, 55, Октябрьский район': (37.5667, 47.1000),
-            '50-летия СССР, 55': (37.5667, 47.1000),
-            '50 let SSSR, 55': (37.5667, 47.1000),
-            
-            # Add more common addresses as needed
-            'б-р Шевченко, 24': (37.5650, 47.0980),  # Example coordinates
-            'Шевченко, 24': (37.5650, 47.0980),
-            'Shevchenka, 24': (37.5650, 47.0980),
-        }
-
-    def _load_cache(self):
-        if not self.cache_file or not os.path.exists(self.cache_file):
-            return {}
-        try:
-            with open(self.cache_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            logger.error(f"Failed to load cache file: {e}")
-            return {}
+        # Manual coordinate overrides, reloaded when the file changes
+        self.manual_overrides = ManualOverrideIndex(manual_coordinates_file)
 
     def _save_cache(self, force=False):
-        if not self.cache_modified or not self.cache_file:
+        if not (self.cache.modified or self.variation_stats.modified):
             return
-            
+
         current_time = time.time()
         if not force and (current_time - self.last_save) < self.save_interval:
             return
-            
-        try:
-            temp_file = f"{self.cache_file}.tmp"
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, ensure_ascii=False, indent=2)
-            
-            if os.path.exists(self.cache_file):
-                os.replace(temp_file, self.cache_file)
-            else:
-                os.rename(temp_file, self.cache_file)
-                
-            self.cache_modified = False
-            self.last_save = current_time
-            logger.debug(f"Cache saved with {len(self.cache)} entries")
-        except Exception as e:
-            logger.error(f"Failed to save cache: {e}")
+
+        with self._lock:
+            try:
+                self.cache.flush()
+                self.variation_stats.flush()
+                self.last_save = current_time
+            except Exception as e:
+                logger.error(f"Failed to save cache: {e}")
 
     def extract_building_address(self, full_address: str) -> str:
         """Extract just the building part of the address (without apartment number)."""
@@ -155,119 +182,8 @@ class SeizedPropertyGeocoder:
         return building_address
 
     def _clean_address(self, address: str) -> str:
-        if not address or not isinstance(address, str):
-            return ""
-
-        # Convert to string and normalize
-        cleaned = str(address).strip()
-        
-        # Handle special street names first
-        cleaned = re.sub(
-            r'(?i)(\d+)[-\s]*(?:год[ау]?|лет|рок[ів]?|рік)[-\s]*(ссср|срср|срс|сс|с\.?с\.?р\.?|с\.?р\.?с\.?р\.?)', 
-            r'\1-летия СССР', 
-            cleaned
-        )
-        
-        # Standardize district abbreviations (both Russian and Ukrainian variants)
-        district_mapping = {
-            # Central District (Центральный район / Центральний район)
-            r'(?i)\bц\.?\s*р\.?\b': 'Центральный район',
-            r'(?i)\bцр\b': 'Центральный район',
-            r'(?i)\bцентральний\b': 'Центральный',
-            
-            # Kalmius District (Кальмиусский район / Кальміуський район)
-            r'(?i)\bк\.?\s*р\.?\b(?!ривой)': 'Кальмиусский район',
-            r'(?i)\bкр\b(?!ривой)': 'Кальмиусский район',
-            r'(?i)\bкальміуський\b': 'Кальмиусский',
-            
-            # October District (Октябрьский район / Жовтневий район)
-            r'(?i)\bж\.?\s*р\.?\s*а\.?\b': 'Октябрьский район',
-            r'(?i)\bжра\b': 'Октябрьский район',
-            r'(?i)\bо\.?\s*р\.?\s*а\.?\b': 'Октябрьский район',
-            r'(?i)\bора\b': 'Октябрьский район',
-            r'(?i)\bжовтневий\b': 'Октябрьский',
-            
-            # Primorsky District (Приморский район / Приморський район)
-            r'(?i)\bп\.?\s*р\.?\b(?!ортов)': 'Приморский район',
-            r'(?i)\bпр\b(?!ортов)': 'Приморский район',
-            r'(?i)\bприморський\b': 'Приморский',
-            
-            # Left Bank District (Левобережный район / Лівобережний район)
-            r'(?i)\bл\.?\s*б\.?\s*р\.?\b': 'Левобережный район',
-            r'(?i)\bлбр\b': 'Левобережный район',
-            r'(?i)\bлівобережний\b': 'Левобережный',
-            
-            # Common street name variants
-            r'(?i)\bпр-?кт\.?\s*металлургов\b': 'проспект Металлургов',
-            r'(?i)\bпр-?кт\.?\s*ленина\b': 'проспект Ленина',
-            r'(?i)\bпр-?кт\.?\s*мира\b': 'проспект Мира',
-            r'(?i)\bпер\.?\s*нахимова\b': 'переулок Нахимова',
-            r'(?i)\bул\.?\s*артема\b': 'улица Артема',
-            r'(?i)\bул\.?\s*куприна\b': 'улица Куприна',
-            
-            # Special case for 50-летия СССР street
-            r'(?i)\b(ул\.?|улица|вул\.?|вулиця)?\s*(\d+)[-\s]*(?:год[ау]?|лет|рок[ів]?|рік)[-\s]*(ссср|срср|срс|сс|с\.?с\.?р\.?|с\.?р\.?с\.?р\.?)\b': 
-                'улица \2-летия СССР',
-        }
-        
-        for pattern, replacement in district_mapping.items():
-            cleaned = re.sub(pattern, replacement, cleaned)
-        
-        # Standardize street types and other address components
-        replacements = {
-            # Street types (Ukrainian -> Russian)
-            r'(?i)\b(?:вул\.?|вулиц[яюи]|вулиці|vul\.?|vulytsya)\b': 'улица',
-            r'(?i)\b(?:пров\.?|провулок|prov\.?|provulok)\b': 'переулок',
-            r'(?i)\b(?:пр-?кт\.?|просп\.?|проспект|prosp\.?|prospekt)\b': 'проспект',
-            r'(?i)\b(?:бул\.?|бульвар|bul\.?|bulvar)\b': 'бульвар',
-            r'(?i)\b(?:пл\.?|площа|площадь|pl\.?|ploshcha|ploshchad)\b': 'площадь',
-            r'(?i)\b(?:ш\.?|шосе|sh\.?|shose)\b': 'шоссе',
-            r'(?i)\b(?:наб\.?|набережна|набережная|nab\.?|naberezhna|naberezhnaya)\b': 'набережная',
-            r'(?i)\b(?:пр-?д\.?|проезд|proezd)\b': 'проезд',
-            r'(?i)\b(?:туп\.?|тупик|tup\.?|tupik)\b': 'тупик',
-            
-            # Settlement types (Ukrainian -> Russian)
-            r'(?i)\b(?:с\.?\s*с\.?|с/с|с-с|селище|selyshche|s/s|s-s|с\.?с\.?)\b': 'поселок',
-            r'(?i)\b(?:пос\.?|поселение|поселок|pos\.?|poseleniye|posyolok|п\.?|п/п|п-п|п\.?п\.?)\b': 'поселок',
-            r'(?i)\b(?:смт\b|с\.?м\.?т\.?|селище міського типу)\b': 'пгт',
-            r'(?i)\b(?:с\.?|село|selo|s\.?)\b': 'село',
-            r'(?i)\b(?:х\.?|хутор|khutor|kh\.?)\b': 'хутор',
-            
-            # Common address components
-            r'(?i)\b(?:буд\.?|будинок|bud\.?|budynok)\b': 'д.',
-            r'(?i)\b(?:корп\.?|корпус|korpus|kor\.?|korp\.?)\b': 'к.',
-            
-            # Only replace нко with улица when it's at the start of the address or after a comma
-            r'(?i)(^|\s|,)(нко)(\s|$)': r'\1улица\3',
-            r'(?i)\bн\.?\s*к\.?\s*о\.?\b': 'улица',
-            
-            # Handle numbered streets with ordinal suffixes (1-й, 2-я, etc.)
-            r'(?i)\b(\d+)[-\s]*(?:й|я|го|му|ый|ой|ий|ая|ое|ье|ые|ых|ым|ими|х|м|го|му|ем|ом|ом)\b': r'\1-й',
-            
-            # Clean up special street names
-            r'(?i)\b(\d+)\s*[-–—]?\s*(?:год[ау]?|лет|рок[ів]?|рік)?\s*(ссср|срср|срс|сс|с\.?с\.?р\.?|с\.?р\.?с\.?р\.?)\b': r'\1-летия СССР',
-            
-            # Clean up punctuation and whitespace
-            r'\s+': ' ',
-            r'\s*,\s*': ', ',
-            r'\s*\.\s*': '.',
-            r'\s*\/\s*': '/',
-            r'\s*-\s*': '-',
-        }
-        
-        for pattern, repl in replacements.items():
-            cleaned = re.sub(pattern, repl, cleaned)
-        
-        # Handle building numbers with letters (e.g., 123а)
-        cleaned = re.sub(r'(\d+)([а-яА-Я])\b', r'\1\2', cleaned, flags=re.IGNORECASE)
-        
-        # Clean up any remaining multiple spaces
-        cleaned = re.sub(r'\s+', ' ', cleaned).strip()
-        
-        # Remove any trailing commas or periods
-        cleaned = re.sub(r'[\s,.]*$', '', cleaned)
-        
-        return cleaned
+        """Normalize street/district/settlement spellings (see address_normalizer)."""
+        return self.address_normalizer.normalize(address)
 
     def _generate_address_variations(self, address: str, district: str = "") -> List[str]:
         if not address or not isinstance(address, str):
@@ -282,43 +198,6 @@ class SeizedPropertyGeocoder:
         # Base variation - just the cleaned address
         variations.add(cleaned_address)
         
-        # Common street name mappings (common misspellings and variations)
-        street_name_mappings = {
-            'металлургов': ['металургов'],
-            'артема': ['артёма'],
-            'нахимова': ['нахимова', 'нахимова переулок'],
-            '50-летия СССР': [
-                '50 лет СССР', 
-                '50 лет ССР', 
-                '50-летия ССР',
-                '50-летия СССР',
-                '50 років СРСР',
-                '50 летия СССР',
-                '50-річчя СРСР',
-                '50-річчя СССР'
-            ],
-            '2-й Кальчик': ['2-й Кальчик', '2-й Кальчикский', '2-я Кальчикская'],
-            # Add more street name variations here
-            'Кирова': ['Кірова'],
-            'Чернышевского': ['Чернишевського'],
-            'Щорса': ['Щорса', 'Щорса улица', 'улица Щорса'],
-            'Луначарского': ['Луначарського'],
-            'Куйбышева': ['Куйбишева'],
-            'Фрунзе': ['Фрунзе', 'Фрунзе улица', 'улица Фрунзе'],
-            'Дзержинского': ['Дзержинського'],
-            'Куприна': ['Куприна', 'Купріна'],
-            'Лермонтова': ['Лермонтова', 'Лермонтовська'],
-            'Гагарина': ['Гагаріна'],
-            'Горького': ['Горького', 'Горького улица', 'улица Горького'],
-        }
-        
-        # Generate variations with common street name alternatives
-        for standard, alts in street_name_mappings.items():
-            if standard.lower() in cleaned_address.lower():
-                for alt in alts:
-                    variations.add(cleaned_address.replace(standard, alt))
-                    variations.add(cleaned_address.lower().replace(standard.lower(), alt))
-        
         # Add variations with different levels of context
         if district:
             cleaned_district = self._clean_address(district)
@@ -377,7 +256,7 @@ class SeizedPropertyGeocoder:
                                   'набережная': 'наб.',
                                   'проезд': 'пр-д',
                                   'тупик': 'туп.'
-                              }[m.group(0)], var, flags=re.IGNORECASE)
+                              }[m.group(0).lower()], var, flags=re.IGNORECASE)
             if short_type != var:
                 street_type_variations.append(short_type)
         
@@ -468,50 +347,64 @@ class SeizedPropertyGeocoder:
         if not cleaned:
             return None
             
-        cache_key = f"{cleaned}|{district}".lower()
+        # Manual coordinates come first, exact override then the earliest-listed
+        # prefix. They are never written to the cache, so adding or correcting an
+        # override (picked up by the hot reload) takes effect for cached buildings too.
+        manual_key = f"{cleaned}, {self._clean_address(district)}" if district else cleaned
+        override = self.manual_overrides.lookup(manual_key)
+        if override:
+            coords, matched, exact = override
+            if exact:
+                logger.info(f"Exact manual match: {manual_key} -> {coords}")
+            else:
+                logger.info(f"Partial manual match: {manual_key} -> {coords} (matched on {matched})")
+            return coords
         
-        # Check cache first
-        if cache_key in self.cache:
-            cached = self.cache[cache_key]
-            if isinstance(cached, (tuple, list)) and len(cached) == 2:
-                self.cache_hits += 1
-                return tuple(cached)
-            elif cached is None:  # Cache negative results
-                return None
+        # One entry per building and district: apartments and query variants share it
+        cache_key = building_cache_key(cleaned, district)
         
-        self.cache_misses += 1
+        # Then the cache
+        cached = cached_building(self.cache, cache_key, _MISSING)
+        if isinstance(cached, (tuple, list)) and len(cached) == 2:
+            with self._lock:
+                self.cache_hits += 1
+            return tuple(cached)
+        elif cached is None:  # Cache negative results
+            return None
         
-        # Check manual coordinates with more precise matching
-        manual_key = f"{cleaned}, {district}" if district else cleaned
-        manual_key = manual_key.lower().strip()
+        with self._lock:
+            self.cache_misses += 1
         
-        # Try exact matches first
-        if manual_key in (k.lower() for k in self.manual_coordinates.keys()):
-            coords = self.manual_coordinates[manual_key]
-            logger.info(f"Exact manual match: {manual_key} -> {coords}")
-            self.cache[cache_key] = coords
-            self.cache_modified = True
-            return coords
-            
-        # Then try partial matches but be more strict
-        for key, coords in self.manual_coordinates.items():
-            key_lower = key.lower()
-            # Only match if the address starts with the key (to avoid partial matches)
-            if manual_key.startswith(key_lower):
-                logger.info(f"Partial manual match: {manual_key} -> {coords} (matched on {key})")
+        # Misspelled streets: the canonical spelling may already be cached
+        canonical = self.street_matcher.canonicalize(cleaned)
+        if canonical:
+            logger.debug(f"Canonical street spelling: {cleaned} -> {canonical}")
+            cached = cached_building(self.cache, building_cache_key(canonical, district), _MISSING)
+            if isinstance(cached, (tuple, list)) and len(cached) == 2:
+                self.cache[cache_key] = tuple(cached)
+                return tuple(cached)
+
+        # Then the local gazetteer, which needs no network
+        if self.gazetteer is not None:
+            coords = self.gazetteer.lookup(address)
+            if coords is None and canonical:
+                coords = self.gazetteer.lookup(canonical)
+            if coords is not None:
+                logger.info(f"Gazetteer match: {cleaned} -> {coords}")
                 self.cache[cache_key] = coords
-                self.cache_modified = True
                 return coords
-        
+
         # If no manual match found, try online geocoding with limited variations
         logger.info(f"No manual match found, trying online geocoding for: {cleaned}")
         
-        # Generate address variations (limit to 5 most relevant ones)
-        variations = self._generate_address_variations(cleaned, district)[:5]
+        # Generate address variations (limit to 5 most relevant ones), spelling the street canonically
+        base = canonical or cleaned
+        generated = self._generate_address_variations(base, district)
+        variations = generated[:5]
         
         # Add district to variations if not already included
         if district and not any(district.lower() in v.lower() for v in variations):
-            variations.append(f"{cleaned}, {district}")
+            variations.append(f"{base}, {district}")
         
         # Add city and country to variations (limit to 2 variations with region)
         variations_with_region = []
@@ -526,8 +419,13 @@ class SeizedPropertyGeocoder:
         if cleaned not in variations:
             variations.append(cleaned)
         
-        # Limit total variations to 8
-        variations = variations[:8]
+        # Rank by past success for this street type and district (ties keep the
+        # order above), prune hopeless templates, then limit total variations to 8
+        context = variation_context(cleaned, district)
+        candidates = list(dict.fromkeys(variations + generated[5:]))
+        ranked = self.variation_stats.order(context, [(v, variation_template(base, v)) for v in candidates])
+        templates = dict(ranked[:self.max_variations])
+        variations = list(templates)
         
         logger.debug(f"Trying {len(variations)} variations for: {cleaned}")
         
@@ -535,9 +433,9 @@ class SeizedPropertyGeocoder:
         for i, variation in enumerate(variations, 1):
             try:
                 # Check cache for this variation
-                var_key = f"{variation}|{district}".lower()
-                if var_key in self.cache:
-                    cached = self.cache[var_key]
+                var_key = building_cache_key(variation, district)
+                cached = cached_building(self.cache, var_key, _MISSING)
+                if cached is not _MISSING:
                     if isinstance(cached, (tuple, list)) and len(cached) == 2:
                         self.cache[cache_key] = cached  # Cache under the original key too
                         logger.debug(f"Cache hit for variation {i}/{len(variations)}")
@@ -545,17 +443,24 @@ class SeizedPropertyGeocoder:
                 
                 # Try to geocode
                 logger.debug(f"Trying to geocode ({i}/{len(variations)}): {variation}")
-                location = self.geocoder.geocode(variation, exactly_one=True)
+                location, executed = self.geocoder.geocode_coalesced(variation, exactly_one=True)
+                resolved = (location is not None and hasattr(location, 'longitude') and hasattr(location, 'latitude')
+                            and self._is_in_mariupol_region(location.longitude, location.latitude))
+                # A request shared by coalesced callers is counted once, by the one that made it
+                if executed:
+                    self.variation_stats.record(context, templates[variation], resolved)
+                    with self._lock:
+                        self.upstream_calls += 1
+                        self.upstream_resolved += int(resolved)
                 
                 if location and hasattr(location, 'longitude') and hasattr(location, 'latitude'):
                     lon, lat = location.longitude, location.latitude
                     
-                    # Verify the location is in the Mariupol region
-                    if self._is_in_mariupol_region(lon, lat):
+                    # Only accept locations in the Mariupol region
+                    if resolved:
                         logger.info(f"Successfully geocoded: {variation} -> ({lon}, {lat})")
                         self.cache[cache_key] = (lon, lat)  # Cache under original key
                         self.cache[var_key] = (lon, lat)     # Cache under variation key
-                        self.cache_modified = True
                         return (lon, lat)
                     else:
                         logger.warning(f"Geocoded location outside Mariupol region: {variation} -> ({lon}, {lat})")
@@ -567,7 +472,6 @@ class SeizedPropertyGeocoder:
         # If we get here, all variations failed
         logger.warning(f"Failed to geocode address after {len(variations)} attempts: {cleaned}")
         self.cache[cache_key] = None  # Cache the failure
-        self.cache_modified = True
         return None
 
     def _is_in_mariupol_region(self, lon: float, lat: float) -> bool:
@@ -578,6 +482,7 @@ class SeizedPropertyGeocoder:
     def process_properties(self, input_file: str, output_file: str, output_format: str = 'geojson', 
                           batch_size: int = 50, resume: bool = False) -> bool:
         """Process properties with optimized geocoding of unique buildings."""
+        import pandas as pd
         try:
             logger.info(f"Reading input file: {input_file}")
             df = pd.read_csv(input_file)
@@ -590,48 +495,213 @@ class SeizedPropertyGeocoder:
             buildings = df[['district', 'building_address']].drop_duplicates()
             logger.info(f"Found {len(buildings)} unique buildings to geocode")
             
-            # Geocode each unique building
-            buildings['coordinates'] = buildings.apply(
-                lambda x: self._geocode_single_address(x['building_address'], x['district']), 
-                axis=1
+            # Geocode each unique building in checkpointed batches
+            buildings['coordinates'] = self._geocode_in_batches(
+                [(address, district if isinstance(district, str) else "")
+                 for address, district in zip(buildings['building_address'], buildings['district'])],
+                input_file, output_file, batch_size, resume
             )
             
-            # Map coordinates back to all apartments
-            building_coords = dict(zip(
-                buildings['building_address'], 
-                buildings['coordinates']
-            ))
-            df['coordinates'] = df['building_address'].map(building_coords)
+            # Map coordinates back to all apartments, by district and building: the
+            # same street and house number in two districts are two buildings
+            df = df.merge(buildings, on=['district', 'building_address'], how='left')
             
-            # Split coordinates into separate columns
+            # Split coordinates into separate columns (buildings that failed to geocode get NaN)
             df[['longitude', 'latitude']] = pd.DataFrame(
-                df['coordinates'].tolist(), 
-                index=df.index
+                [coords if coords else (None, None) for coords in df['coordinates']],
+                index=df.index,
+                dtype=float
             )
             
             # Save results
             self._save_output(df, output_file, output_format)
+            self._remove_checkpoint(output_file)
             logger.info(f"Successfully processed {len(df)} properties")
+            coalesced = self.geocoder.single_flight.coalesced
+            if self.upstream_resolved:
+                logger.info(f"Upstream calls per resolved building: "
+                            f"{self.upstream_calls / self.upstream_resolved:.2f} "
+                            f"({self.upstream_calls} calls, {self.upstream_resolved} resolved)")
+            if coalesced:
+                logger.info(f"Coalesced {coalesced} duplicate in-flight queries into shared upstream calls")
             return True
             
         except Exception as e:
             logger.error(f"Error processing properties: {e}", exc_info=True)
             return False
 
-    def _save_output(self, df: pd.DataFrame, output_file: str, output_format: str):
+        finally:
+            self._save_cache(force=True)
+
+    def _geocode_buildings(self, buildings: List[Tuple[str, str]]) -> List[Optional[Tuple[float, float]]]:
+        """
+        Geocode buildings on a pool of worker threads, results in input order.
+
+        Cache and manual lookups run fully in parallel; workers only queue on
+        the shared token bucket when they make an upstream request.
+        """
+        if self.workers == 1 or len(buildings) <= 1:
+            return [self._geocode_building(address, district) for address, district in buildings]
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='geocoder') as executor:
+            return list(executor.map(lambda building: self._geocode_building(*building), buildings))
+
+    # --- Checkpointing ---
+
+    @staticmethod
+    def _checkpoint_paths(output_file: str) -> Tuple[str, str]:
+        """Progress manifest and partial output written next to the final output."""
+        return f"{output_file}.progress.json", f"{output_file}.partial.csv"
+
+    @staticmethod
+    def _building_key(address, district) -> Tuple[str, str]:
+        return (str(address), district if isinstance(district, str) else "")
+
+    @staticmethod
+    def _input_signature(input_file: str) -> Dict[str, Any]:
+        stat = os.stat(input_file)
+        return {'input_file': os.path.abspath(input_file), 'input_size': stat.st_size,
+                'input_mtime_ns': stat.st_mtime_ns}
+
+    @staticmethod
+    def _write_atomically(path: str, write):
+        temp_file = f"{path}.tmp"
+        with open(temp_file, 'w', encoding='utf-8', newline='') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, path)
+
+    def _load_checkpoint(self, input_file: str, output_file: str) -> Dict[Tuple[str, str], Optional[Tuple[float, float]]]:
+        """Completed buildings from a previous run on the same input, or {} if there is none."""
+        manifest_file, partial_file = self._checkpoint_paths(output_file)
+        if not (os.path.exists(manifest_file) and os.path.exists(partial_file)):
+            logger.info("No checkpoint to resume from; starting from the beginning")
+            return {}
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        signature = self._input_signature(input_file)
+        if any(manifest.get(field) != value for field, value in signature.items()):
+            logger.warning(f"Checkpoint {manifest_file} was written for a different input; starting over")
+            return {}
+
+        # Rows appended after the manifest was last written (an interrupted
+        # batch) are dropped; that batch is simply geocoded again.
+        partial_bytes = manifest.get('partial_bytes')
+        if partial_bytes is not None and os.path.getsize(partial_file) > partial_bytes:
+            os.truncate(partial_file, partial_bytes)
+
+        import pandas as pd
+        partial = pd.read_csv(partial_file, dtype=str, keep_default_na=False)
+        completed = {}
+        for address, district, lon, lat in partial[CHECKPOINT_COLUMNS].itertuples(index=False):
+            completed[(address, district)] = (float(lon), float(lat)) if lon and lat else None
+        logger.info(f"Resuming from checkpoint of {manifest.get('updated_at')}: "
+                    f"{len(completed)}/{manifest.get('total_buildings')} buildings already geocoded")
+        return completed
+
+    def _start_checkpoint(self, output_file: str):
+        """Replace any previous partial output with an empty one (header only)."""
+        manifest_file, partial_file = self._checkpoint_paths(output_file)
+        os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+        if os.path.exists(manifest_file):
+            os.remove(manifest_file)
+        self._write_atomically(partial_file, lambda f: csv.writer(f).writerow(CHECKPOINT_COLUMNS))
+
+    def _append_checkpoint(self, input_file: str, output_file: str, rows: List[Tuple[Tuple[str, str], Any]],
+                           completed: int, total: int, batch_size: int):
+        """
+        Append one batch to the partial output and fsync it, then rewrite the
+        small manifest (via rename) to cover the new rows. Each batch costs
+        its own rows, not the whole register.
+        """
+        manifest_file, partial_file = self._checkpoint_paths(output_file)
+        with open(partial_file, 'a', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            for (address, district), coords in rows:
+                writer.writerow((address, district) + (tuple(coords) if coords else ('', '')))
+            f.flush()
+            os.fsync(f.fileno())
+            partial_bytes = f.tell()
+
+        manifest = dict(self._input_signature(input_file),
+                        partial_output=os.path.abspath(partial_file),
+                        partial_bytes=partial_bytes,
+                        total_buildings=total,
+                        completed_buildings=completed,
+                        batch_size=batch_size,
+                        updated_at=time.strftime('%Y-%m-%dT%H:%M:%S%z'))
+        self._write_atomically(manifest_file, lambda f: json.dump(manifest, f, ensure_ascii=False, indent=2))
+
+    def _remove_checkpoint(self, output_file: str):
+        for path in self._checkpoint_paths(output_file):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _geocode_in_batches(self, buildings: List[Tuple[str, str]], input_file: str, output_file: str,
+                            batch_size: int, resume: bool) -> List[Optional[Tuple[float, float]]]:
+        """
+        Geocode buildings batch by batch. After every batch the batch's results
+        are appended to the checkpoint, so --resume continues after the last
+        one. Cache backends that flush incrementally are flushed as well; the
+        JSON cache is rewritten on its save interval and at the end instead.
+        """
+        keys = [self._building_key(address, district) for address, district in buildings]
+        total = len(set(keys))
+        completed = self._load_checkpoint(input_file, output_file) if resume else {}
+        if not completed:
+            self._start_checkpoint(output_file)
+        remaining = [(building, key) for building, key in zip(buildings, keys) if key not in completed]
+        if completed:
+            logger.info(f"Skipping {len(buildings) - len(remaining)} completed buildings, {len(remaining)} to go")
+
+        batch_size = max(1, batch_size)
+        batches = (len(remaining) + batch_size - 1) // batch_size
+        started = time.time()
+        done = 0
+        for number, start in enumerate(range(0, len(remaining), batch_size), 1):
+            batch = remaining[start:start + batch_size]
+            batch_started = time.time()
+            requests_before = self.geocoder.bucket.acquired
+
+            results = self._geocode_buildings([building for building, _ in batch])
+            new_rows = []
+            for (_, key), coords in zip(batch, results):
+                if key not in completed:
+                    new_rows.append((key, coords))
+                completed[key] = coords
+
+            self._save_cache(force=self.cache.incremental_flush)
+            self._append_checkpoint(input_file, output_file, new_rows, len(completed), total, batch_size)
+
+            done += len(batch)
+            elapsed = time.time() - batch_started
+            rate = done / max(time.time() - started, 1e-9)
+            eta = (len(remaining) - done) / rate if rate else 0
+            resolved = sum(coords is not None for coords in results)
+            logger.info(f"Batch {number}/{batches}: {len(batch)} buildings ({resolved} resolved) in {elapsed:.1f}s, "
+                        f"{len(batch) / max(elapsed, 1e-9):.2f} buildings/s, "
+                        f"{self.geocoder.bucket.acquired - requests_before} upstream requests; "
+                        f"{len(completed)}/{total} done, ETA {eta / 60:.1f} min")
+
+        return [completed[key] for key in keys]
+
+    def _geocode_building(self, address: str, district: str = "") -> Optional[Tuple[float, float]]:
+        """Geocode one building and flush the cache once the save interval has passed."""
+        coords = self._geocode_single_address(address, district)
+        self._save_cache()
+        return coords
+
+    def close(self):
+        """Flush pending cache writes and release the cache backend."""
+        self.cache.close()
+        self.variation_stats.close()
+
+    def _save_output(self, df: 'pd.DataFrame', output_file: str, output_format: str):
         try:
             os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
             
-            if output_format.lower() == 'geojson':
-                gdf = gpd.GeoDataFrame(
-                    df,
-                    geometry=gpd.points_from_xy(df.longitude, df.latitude),
-                    crs="EPSG:4326"
-                )
-                gdf.to_file(output_file, driver='GeoJSON')
-            else:
-                df.to_csv(output_file, index=False)
-                
+            write_output(df, output_file, output_format)
             logger.info(f"Saved {len(df)} features to {output_file}")
             
         except Exception as e:
@@ -644,20 +714,49 @@ def parse_arguments():
                       help='Input CSV file with addresses')
     parser.add_argument('--output', default='data/processed/geocoded_properties.geojson',
                       help='Output file path')
-    parser.add_argument('--cache', default='data/geocoding_cache.json', 
-                      help='Cache file path')
+    parser.add_argument('--cache', default='data/geocoding_cache.sqlite',
+                      help='Cache file path (.sqlite/.db files use the SQLite backend; a legacy .json file '
+                           'of the same name is imported on first use)')
+    parser.add_argument('--cache-backend', choices=['auto', 'json', 'sqlite'], default='auto',
+                      help='Cache storage backend (auto: chosen by cache file extension)')
+    parser.add_argument('--import-json-cache', default=None,
+                      help='Import a legacy JSON cache into the SQLite cache before geocoding')
+    parser.add_argument('--gazetteer', default=None,
+                      help='Local gazetteer CSV (street, housenumber, longitude, latitude) tried before Nominatim')
+    parser.add_argument('--manual-coordinates', default=DEFAULT_OVERRIDES_FILE,
+                      help='Manual coordinate overrides JSON (re-read when it changes)')
+    parser.add_argument('--variation-stats', default='data/variation_stats.json',
+                      help='Persistent query variation success statistics used to order upstream attempts')
+    parser.add_argument('--workers', type=int, default=4,
+                      help='Worker threads geocoding buildings concurrently')
+    parser.add_argument('--provider', choices=sorted(PROVIDER_RATE_LIMITS), default='nominatim',
+                      help='Rate limit preset (nominatim: public OSM policy, self-hosted: own instance)')
+    parser.add_argument('--rate', type=float, default=None,
+                      help='Upstream requests per second (overrides the provider preset)')
+    parser.add_argument('--burst', type=float, default=None,
+                      help='Upstream request burst size (overrides the provider preset)')
+    parser.add_argument('--domain', default=None,
+                      help='Nominatim host, e.g. localhost:8080 for a self-hosted instance')
+    parser.add_argument('--scheme', choices=['http', 'https'], default=None,
+                      help='Nominatim URL scheme')
+    parser.add_argument('--timeout', type=float, default=30,
+                      help='Upstream request timeout in seconds')
     parser.add_argument('--batch-size', type=int, default=25, 
-                      help='Number of addresses to process in each batch')
-    parser.add_argument('--format', choices=['geojson', 'csv'], default='geojson',
-                      help='Output format')
+                      help='Number of buildings to geocode between checkpoints')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='geojson',
+                      help='Output format (geoparquet/flatgeobuf: compressed, spatially sorted, '
+                           'readable by column or bounding box)')
     parser.add_argument('--resume', action='store_true',
-                      help='Resume from existing output file')
+                      help='Resume from the checkpoint (<output>.progress.json) of an interrupted run')
+    parser.add_argument('--log-file', default='geocoding.log',
+                      help='Also write the log to this file (empty: console only)')
     parser.add_argument('--debug', action='store_true',
                       help='Enable debug logging')
     return parser.parse_args()
 
 def main():
     args = parse_arguments()
+    configure_logging(args.log_file)
     
     if args.debug:
         logger.setLevel(logging.DEBUG)
@@ -670,17 +769,40 @@ def main():
             logger.error(f"Input file not found: {args.input}")
             return 1
             
+        # Imported before the geocoder opens the cache, so the street matcher sees the entries
+        sqlite_cache = args.cache_backend == 'sqlite' or (args.cache_backend == 'auto'
+                                                          and args.cache.lower().endswith(SQLITE_SUFFIXES))
+        json_cache = args.import_json_cache
+        legacy_cache = os.path.splitext(args.cache)[0] + '.json'
+        if json_cache is None and sqlite_cache and not os.path.exists(args.cache) and os.path.exists(legacy_cache):
+            logger.info(f"First run with {args.cache}: importing the legacy cache {legacy_cache}")
+            json_cache = legacy_cache
+        if json_cache:
+            if not sqlite_cache:
+                logger.error("--import-json-cache requires the SQLite cache backend")
+                return 1
+            migrate_json_cache(json_cache, args.cache)
+
         logger.info(f"Initializing geocoder with cache: {args.cache}")
-        geocoder = SeizedPropertyGeocoder(cache_file=args.cache)
-        
+        geocoder = SeizedPropertyGeocoder(cache_file=args.cache, cache_backend=args.cache_backend,
+                                          workers=args.workers, provider=args.provider,
+                                          rate=args.rate, burst=args.burst,
+                                          domain=args.domain, scheme=args.scheme, timeout=args.timeout,
+                                          gazetteer_file=args.gazetteer,
+                                          manual_coordinates_file=args.manual_coordinates,
+                                          variation_stats_file=args.variation_stats)
+
         logger.info(f"Starting geocoding from {args.input} to {args.output}")
-        success = geocoder.process_properties(
-            input_file=args.input,
-            output_file=args.output,
-            output_format=args.format,
-            batch_size=args.batch_size,
-            resume=args.resume
-        )
+        try:
+            success = geocoder.process_properties(
+                input_file=args.input,
+                output_file=args.output,
+                output_format=args.format,
+                batch_size=args.batch_size,
+                resume=args.resume
+            )
+        finally:
+            geocoder.close()
         
         if success:
             logger.info("Geocoding completed successfully")
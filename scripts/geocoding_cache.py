@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Pluggable storage backends for the geocoding cache.
+
+Both backends behave like a dict from cache key to (lon, lat) tuples, with
+None values recording negative results:
+
+* JsonGeocodingCache keeps the legacy single JSON document in memory.
+* SQLiteGeocodingCache keeps entries in an SQLite database (WAL mode), so
+  startup reads nothing up front, lookups are point queries and writes are
+  buffered into batched upserts. The streets of resolved buildings are kept
+  in their own table, so listing them does not scan the buildings.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from address_normalizer import normalize_address
+
+logger = logging.getLogger(__name__)
+
+Coordinates = Optional[Tuple[float, float]]
+SQLITE_SUFFIXES = ('.sqlite', '.sqlite3', '.db')
+# PRAGMA user_version of SQLite caches whose cache_streets table is complete
+STREETS_SCHEMA_VERSION = 1
+
+# --- Canonical building keys ---
+
+# Comma-separated parts that only add city/region context.
+_CITY_CONTEXT = re.compile(
+    r'^(?:г\.?\s*)?(?:мариуполь|маріуполь|донецкая область|донецька область|донецкая обл\.?|украина|україна)$'
+)
+# Parts naming a district, spelled out or abbreviated; kept in the key.
+_DISTRICT_PART = re.compile(
+    r'^(?:жра|ора|цр|кр|пр|лбр|(?:[а-яіїє]+ский|[а-яіїє]+ський|[а-яіїє]+ный|[а-яіїє]+ний|[а-яіїє]+вий)'
+    r'\s+(?:район|р-н))$'
+)
+# Only an explicit marker (кв., квартира) starts an apartment number.
+_APARTMENT = re.compile(r'\s*\b(?:кв|квартира)\b\.?\s*\d+[^,]*')
+_HOUSE_PREFIX = re.compile(r'\b(?:д|дом|буд)\.?\s*(?=\d)')
+_STREET_TYPES = [
+    (re.compile(r'\b(?:бульвар|бул|б-р)\b\.?'), 'бульвар '),
+    (re.compile(r'\b(?:улица|вулиця|ул|вул)\b\.?'), 'улица '),
+    (re.compile(r'\b(?:проспект|просп|пр-кт|пр-т)\b\.?'), 'проспект '),
+    (re.compile(r'\b(?:переулок|провулок|пер|пров)\b\.?'), 'переулок '),
+    (re.compile(r'\b(?:площадь|площа|пл)\b\.?'), 'площадь '),
+    (re.compile(r'\b(?:поселок|селище|пос|п)\b\.?'), 'поселок '),
+]
+# Separates the building from its district, as in the legacy "address|district" keys
+DISTRICT_SEPARATOR = '|'
+_HOUSE = r'\d+[а-яіїє]?(?:/\d+[а-яіїє]?)?'
+# Legacy cache keys append the apartment right after the house number, with
+# no marker: "бульвар шевченко 228 68/2" is apartment 68/2 of house 228.
+# Only legacy keys are read this way; in a register address that number
+# may belong to the address itself.
+_LEGACY_APARTMENT = re.compile(rf'(\s{_HOUSE})\s+\d+(?:/\d+)?$')
+_TRAILING_HOUSE = re.compile(rf'\s+{_HOUSE}$')
+
+
+def _district_key(district: str) -> str:
+    """Normalized district or settlement name ('ЖРА' and 'Жовтневий район' -> 'октябрьский район')."""
+    key = normalize_address(district).lower().replace('ё', 'е')
+    key = ' '.join(re.sub(r'[.,;]', ' ', key).split()).replace('р-н', 'район')
+    return '' if _CITY_CONTEXT.match(key) else key
+
+
+def building_cache_key(address: str, district: str = "") -> str:
+    """
+    Canonical cache key for the building an address belongs to.
+
+    Apartment numbers, "д." prefixes, city/region context, punctuation,
+    case and street/settlement-type spellings are normalized away, so every
+    apartment and every query variant of one building shares a single entry.
+    The district (the given one, else one named in the address) stays in
+    the key after DISTRICT_SEPARATOR: the same street and house number in two
+    districts are two buildings. Shared by cache writes, cache lookups and
+    legacy cache compaction.
+    """
+    if not address or not isinstance(address, str):
+        return ""
+    key = address.lower().replace('ё', 'е')
+    key = _APARTMENT.sub('', key)
+    parts = []
+    named_district = ''
+    for part in (part.strip() for part in key.split(',')):
+        if not part or _CITY_CONTEXT.match(part):
+            continue
+        if _DISTRICT_PART.match(part):
+            named_district = named_district or _district_key(part)
+            continue
+        parts.append(part)
+    key = ' '.join(parts)
+    key = _HOUSE_PREFIX.sub('', key)
+    for pattern, replacement in _STREET_TYPES:
+        key = pattern.sub(replacement, key)
+    key = re.sub(r'[.,;|]', ' ', key)
+    key = ' '.join(key.split())
+    district_key = (_district_key(district) if district and isinstance(district, str) else '') or named_district
+    return f"{key}{DISTRICT_SEPARATOR}{district_key}" if key and district_key else key
+
+
+def building_part(key: str) -> str:
+    """The street and house number of a building cache key, without its district."""
+    return key.partition(DISTRICT_SEPARATOR)[0]
+
+
+def building_street(key: str) -> str:
+    """The street of a building cache key ("улица артема 5|..." -> "улица артема")."""
+    return _TRAILING_HOUSE.sub('', building_part(key))
+
+
+def cached_building(cache, key: str, default=None):
+    """
+    Cached result for a building key, from any cache backend (or dict).
+
+    A key with a district whose own entry is missing or negative falls back
+    to a resolved entry for the same building without a district. Legacy
+    caches, and callers without a district, stored buildings city-wide, so
+    such an entry stands for the building in whichever district the
+    register lists; a failed query that named the district does not
+    outweigh it. Negative city-wide results are not inherited: the
+    district may be what makes the address resolvable.
+    """
+    value = cache.get(key, default)
+    if (value is default or value is None) and DISTRICT_SEPARATOR in key:
+        city_wide = cache.get(building_part(key))
+        if city_wide is not None:
+            return city_wide
+    return value
+
+
+def legacy_building_key(key: str) -> str:
+    """
+    building_cache_key of a key from a legacy cache: "address|district", or
+    a bare address whose apartment follows the house number
+    ("бульвар Богдана Хмельницкого 24 10, Мариуполь, Украина").
+    """
+    address, _, district = key.partition(DISTRICT_SEPARATOR)
+    building, separator, district_key = building_cache_key(address, district).partition(DISTRICT_SEPARATOR)
+    return _LEGACY_APARTMENT.sub(r'\1', building) + separator + district_key
+
+
+def compact_entries(entries: Iterable[Tuple[str, Optional[Tuple[float, float]]]]) -> Tuple[Dict, int]:
+    """Merge entries by building key. Returns (compacted entries, buildings with conflicting coordinates)."""
+    grouped = defaultdict(list)
+    for key, coords in entries:
+        building = legacy_building_key(key)
+        if building:
+            grouped[building].append(tuple(coords) if coords else None)
+
+    compacted = {}
+    conflicts = 0
+    for building, values in grouped.items():
+        positives = Counter(value for value in values if value is not None)
+        if len(positives) > 1:
+            conflicts += 1
+        compacted[building] = positives.most_common(1)[0][0] if positives else None
+    return compacted, conflicts
+
+
+def _as_coordinates(value) -> Coordinates:
+    if isinstance(value, (tuple, list)) and len(value) == 2:
+        return (float(value[0]), float(value[1]))
+    return None
+
+
+class JsonGeocodingCache:
+    """Legacy backend: the whole cache as one JSON object, rewritten on flush."""
+
+    # A flush costs the size of the whole cache, not of the pending writes
+    incremental_flush = False
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.modified = False
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Coordinates] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._entries = {k: _as_coordinates(v) for k, v in json.load(f).items()}
+            except Exception as e:
+                logger.error(f"Failed to load cache file: {e}")
+
+    def get(self, key: str, default=None):
+        return self._entries.get(key, default)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __getitem__(self, key: str) -> Coordinates:
+        return self._entries[key]
+
+    def __setitem__(self, key: str, value: Coordinates):
+        with self._lock:
+            self._entries[key] = _as_coordinates(value)
+            self.modified = True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def items(self):
+        return list(self._entries.items())
+
+    def street_names(self) -> Set[str]:
+        """Streets (building_street) of the entries holding coordinates."""
+        return {building_street(key) for key, value in self.items() if value is not None}
+
+    def flush(self):
+        if not self.modified or not self.path:
+            return
+        with self._lock:
+            snapshot = dict(self._entries)
+            self.modified = False
+        temp_file = f"{self.path}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=2)
+        os.replace(temp_file, self.path)
+        logger.debug(f"Cache saved with {len(snapshot)} entries")
+
+    def close(self):
+        self.flush()
+
+
+class SQLiteGeocodingCache:
+    """SQLite backend with point lookups and buffered, batched upserts."""
+
+    # A flush only upserts the pending entries
+    incremental_flush = True
+
+    def __init__(self, path: str, batch_size: int = 500):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.RLock()
+        self._pending: Dict[str, Coordinates] = {}
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS geocoding_cache ('
+            ' key TEXT PRIMARY KEY,'
+            ' lon REAL,'
+            ' lat REAL,'
+            ' updated_at REAL NOT NULL)'
+        )
+        self._connection.execute('CREATE TABLE IF NOT EXISTS cache_streets (street TEXT PRIMARY KEY)')
+        self._connection.commit()
+        if self._connection.execute('PRAGMA user_version').fetchone()[0] < STREETS_SCHEMA_VERSION:
+            self._backfill_streets()
+
+    def _backfill_streets(self):
+        """One-time fill of cache_streets for a cache written before the table existed."""
+        streets = set()
+        cursor = self._connection.execute('SELECT key FROM geocoding_cache WHERE lon IS NOT NULL')
+        for (key,) in cursor:
+            streets.add(building_street(key))
+        with self._connection:
+            self._connection.executemany('INSERT OR IGNORE INTO cache_streets (street) VALUES (?)',
+                                         [(street,) for street in streets if street])
+            self._connection.execute(f'PRAGMA user_version = {STREETS_SCHEMA_VERSION}')
+        logger.info(f"Indexed {len(streets)} cached streets in {self.path}")
+
+    @property
+    def modified(self) -> bool:
+        return bool(self._pending)
+
+    def _lookup(self, key: str):
+        with self._lock:
+            if key in self._pending:
+                return True, self._pending[key]
+            row = self._connection.execute(
+                'SELECT lon, lat FROM geocoding_cache WHERE key = ?', (key,)
+            ).fetchone()
+        if row is None:
+            return False, None
+        return True, (None if row[0] is None else (row[0], row[1]))
+
+    def get(self, key: str, default=None):
+        found, value = self._lookup(key)
+        return value if found else default
+
+    def __contains__(self, key: str) -> bool:
+        return self._lookup(key)[0]
+
+    def __getitem__(self, key: str) -> Coordinates:
+        found, value = self._lookup(key)
+        if not found:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Coordinates):
+        with self._lock:
+            self._pending[key] = _as_coordinates(value)
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self.flush()
+            return self._connection.execute('SELECT COUNT(*) FROM geocoding_cache').fetchone()[0]
+
+    def items(self):
+        with self._lock:
+            self.flush()
+            rows = self._connection.execute('SELECT key, lon, lat FROM geocoding_cache').fetchall()
+        return [(key, None if lon is None else (lon, lat)) for key, lon, lat in rows]
+
+    def street_names(self) -> Set[str]:
+        """
+        Streets (building_street) of the entries holding coordinates, read
+        from the cache_streets table: one row per street, not per building.
+        """
+        with self._lock:
+            streets = {building_street(key) for key, value in self._pending.items() if value is not None}
+            streets.update(street for (street,) in self._connection.execute('SELECT street FROM cache_streets'))
+        return streets
+
+    def upsert_many(self, entries: Iterable[Tuple[str, Coordinates]]):
+        now = time.time()
+        rows = []
+        for key, value in entries:
+            coords = _as_coordinates(value)
+            rows.append((key, coords[0] if coords else None, coords[1] if coords else None, now))
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'INSERT INTO geocoding_cache (key, lon, lat, updated_at) VALUES (?, ?, ?, ?)'
+                ' ON CONFLICT(key) DO UPDATE SET lon = excluded.lon, lat = excluded.lat,'
+                ' updated_at = excluded.updated_at',
+                rows
+            )
+            self._connection.executemany(
+                'INSERT OR IGNORE INTO cache_streets (street) VALUES (?)',
+                {(building_street(key),) for key, lon, _, _ in rows if lon is not None and building_street(key)}
+            )
+        return len(rows)
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            self.upsert_many(pending.items())
+        logger.debug(f"Flushed {len(pending)} cache entries to {self.path}")
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._connection.close()
+
+
+def open_geocoding_cache(path: Optional[str], backend: str = 'auto'):
+    """Open a cache file with the requested backend ('auto' picks by extension)."""
+    if backend == 'auto':
+        backend = 'sqlite' if path and path.lower().endswith(SQLITE_SUFFIXES) else 'json'
+    if backend == 'sqlite':
+        if not path:
+            raise ValueError("The SQLite cache backend needs a cache file path")
+        return SQLiteGeocodingCache(path)
+    return JsonGeocodingCache(path)
+
+
+def import_json_cache(json_path: str, cache: SQLiteGeocodingCache, batch_size: int = 5000) -> int:
+    """
+    Import a legacy JSON cache into SQLite under building keys. Entries are
+    re-keyed and merged with compact_entries. Buildings the SQLite cache
+    does not know are added and its negative results are replaced by
+    coordinates; its other entries are kept. Returns the entries written.
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    compacted, conflicts = compact_entries(entries.items())
+    items = [(key, coords) for key, coords in compacted.items()
+             if key not in cache or (coords is not None and cache.get(key) is None)]
+    for start in range(0, len(items), batch_size):
+        cache.upsert_many(items[start:start + batch_size])
+    logger.info(f"Imported {len(items)} buildings ({len(entries)} legacy entries, {conflicts} with conflicting "
+                f"coordinates) from {json_path} into {cache.path}")
+    return len(items)
+
+
+def migrate_json_cache(json_path: str, sqlite_path: str) -> int:
+    """Import a legacy JSON cache into the SQLite cache file at sqlite_path (created if missing)."""
+    cache = SQLiteGeocodingCache(sqlite_path)
+    try:
+        return import_json_cache(json_path, cache)
+    finally:
+        cache.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import a legacy JSON geocoding cache into SQLite')
+    parser.add_argument('json_cache', help='Legacy JSON cache file')
+    parser.add_argument('sqlite_cache', help='SQLite cache file to create or update')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    count = migrate_json_cache(args.json_cache, args.sqlite_cache)
+    print(f"Imported {count} buildings into {args.sqlite_cache}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
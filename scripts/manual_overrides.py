@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Indexed, hot-reloadable manual coordinate overrides.
+
+Overrides (e.g. demolished buildings Nominatim no longer knows) live in a
+JSON file, data/manual_coordinates.json by default:
+
+    {"overrides": [
+        {"address": "б-р Богдана Хмельницкого, д. 24", "longitude": 37.5689,
+         "latitude": 47.1012, "note": "..."},
+        ...
+    ]}
+
+Override addresses and queries are normalized the same way (AddressNormalizer,
+lowercase, collapsed whitespace). A query resolves to the override with the
+identical key, otherwise to the earliest-listed override whose key is a
+prefix of the query ending at a word boundary ("шевченко, 24" matches
+"шевченко, 24, центральный район" but not "шевченко, 245"). Both lookups
+cost O(query length): a dict probe and a walk down a character trie.
+
+The file is re-read when its modification time changes, checked at most
+every `check_interval` seconds, so fixes apply without restarting a run.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from address_normalizer import normalize_address
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OVERRIDES_FILE = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                       '..', 'data', 'manual_coordinates.json'))
+
+Coordinates = Tuple[float, float]
+
+
+def override_key(address: str) -> str:
+    """Lookup key shared by override entries and queries."""
+    return ' '.join(normalize_address(address).lower().replace('ё', 'е').split())
+
+
+class _OverrideTable:
+    """Immutable exact-match map plus prefix trie built from one version of the file."""
+
+    _END = ''  # trie slot holding (rank, coordinates, original address)
+
+    def __init__(self, entries: List[Tuple[str, Coordinates]]):
+        self.exact: Dict[str, Tuple[Coordinates, str]] = {}
+        self.trie: Dict = {}
+        for rank, (address, coords) in enumerate(entries):
+            key = override_key(address)
+            if not key:
+                continue
+            self.exact.setdefault(key, (coords, address))
+            node = self.trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node.setdefault(self._END, (rank, coords, address))
+
+    def __len__(self) -> int:
+        return len(self.exact)
+
+    def prefix_match(self, key: str) -> Optional[Tuple[Coordinates, str]]:
+        """Earliest-listed override whose key is a word-boundary prefix of `key`."""
+        best = None
+        node = self.trie
+        for position, char in enumerate(key):
+            node = node.get(char)
+            if node is None:
+                break
+            terminal = node.get(self._END)
+            if terminal and (best is None or terminal[0] < best[0]):
+                following = key[position + 1:position + 2]
+                if not following or not following.isalnum():
+                    best = terminal
+        return (best[1], best[2]) if best else None
+
+
+class ManualOverrideIndex:
+    """Manual coordinate overrides loaded from a JSON file and reloaded when it changes."""
+
+    def __init__(self, path: Optional[str] = DEFAULT_OVERRIDES_FILE, check_interval: float = 2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._table = _OverrideTable([])
+        self._signature = None
+        self._last_check = 0.0
+        self.reload()
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    @staticmethod
+    def _read_entries(path: str) -> List[Tuple[str, Coordinates]]:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        entries = []
+        for item in data.get('overrides', []):
+            try:
+                entries.append((item['address'], (float(item['longitude']), float(item['latitude']))))
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Skipping manual override {item}: {e}")
+        return entries
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def reload(self, force: bool = True) -> bool:
+        """Re-read the file if it changed (or always, with force). Returns True if reloaded."""
+        if not self.path:
+            return False
+        with self._lock:
+            self._last_check = time.monotonic()
+            signature = self._file_signature()
+            if not force and signature == self._signature:
+                return False
+            if signature is None:
+                logger.warning(f"Manual overrides file not found: {self.path}")
+                self._table, self._signature = _OverrideTable([]), None
+                return True
+            try:
+                table = _OverrideTable(self._read_entries(self.path))
+            except (OSError, ValueError) as e:
+                # Keep serving the previous version until the file changes again
+                logger.error(f"Failed to load manual overrides from {self.path}: {e}")
+                self._signature = signature
+                return False
+            self._table, self._signature = table, signature
+        logger.info(f"Loaded {len(table)} manual coordinate overrides from {self.path}")
+        return True
+
+    def _maybe_reload(self):
+        if self.path and time.monotonic() - self._last_check >= self.check_interval:
+            self.reload(force=False)
+
+    def lookup(self, address: str) -> Optional[Tuple[Coordinates, str, bool]]:
+        """(coordinates, matched override address, exact?) for an address, or None."""
+        self._maybe_reload()
+        key = override_key(address)
+        if not key:
+            return None
+        table = self._table
+        exact = table.exact.get(key)
+        if exact:
+            return exact[0], exact[1], True
+        partial = table.prefix_match(key)
+        if partial:
+            return partial[0], partial[1], False
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Look up addresses in the manual coordinate overrides')
+    parser.add_argument('addresses', nargs='+', help='Addresses to look up')
+    parser.add_argument('--overrides', default=DEFAULT_OVERRIDES_FILE, help='Manual overrides JSON file')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    index = ManualOverrideIndex(args.overrides)
+    for address in args.addresses:
+        print(f"{address} -> {index.lookup(address)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
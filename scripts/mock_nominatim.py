@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Nominatim search API, for exercising and benchmarking
+the geocoder without touching the public service.
+
+GET /search answers the subset of the API geopy's Nominatim client uses (q,
+format=json) from a gazetteer CSV, looked up with GazetteerGeocoder. Like
+free-text Nominatim it only resolves queries that name the city and do not
+mention a district, unless --lenient is given. GET /stats returns the
+request counters as JSON.
+
+Every response can be delayed (--latency, --jitter), and a share of requests
+can fail with 503 (--error-rate) or 429 (--rate-limit-rate), or hang for
+--hang seconds so the client times out (--timeout-rate). Point the
+geocoder at it as a self-hosted instance:
+
+    python scripts/mock_nominatim.py --port 8080 --latency 0.05 --error-rate 0.02
+    python scripts/geocode_properties_enhanced.py --provider self-hosted --domain localhost:8080 --scheme http
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from gazetteer import GazetteerGeocoder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GAZETTEER = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                  '..', 'data', 'fixtures', 'mariupol_gazetteer.csv'))
+# Context the geocoder appends to queries; the gazetteer only needs what precedes it
+_CITY_CONTEXT = re.compile(r',\s*(?:мариуполь|маріуполь)\b.*$', re.IGNORECASE)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: 'MockNominatimServer'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/stats':
+            return self._send(200, self.server.stats())
+        if url.path != '/search':
+            return self._send(404, {'error': f"unknown endpoint {url.path}"})
+
+        query = parse_qs(url.query).get('q', [''])[0]
+        fault = self.server.begin_request()
+        if fault == 'timeout':
+            # Hold the connection past the client's timeout; stop() releases it early
+            self.server.stopping.wait(self.server.hang)
+            return
+        if fault == 'error':
+            return self._send(503, {'error': 'Service temporarily unavailable'})
+        if fault == 'rate_limited':
+            return self._send(429, {'error': 'Too many requests'})
+        self._send(200, self.server.search(query))
+
+    def _send(self, status: int, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class MockNominatimServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering Nominatim /search queries from a gazetteer."""
+
+    daemon_threads = True
+
+    def __init__(self, gazetteer_file: str = DEFAULT_GAZETTEER, host: str = '127.0.0.1', port: int = 0,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, timeout_rate: float = 0.0, hang: float = 10.0,
+                 strict: bool = True, seed: Optional[int] = None):
+        super().__init__((host, port), _Handler)
+        self.gazetteer = GazetteerGeocoder(gazetteer_file)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.timeout_rate = timeout_rate
+        self.hang = hang
+        self.strict = strict
+        self.stopping = threading.Event()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counts = {'requests': 0, 'resolved': 0, 'not_found': 0,
+                        'error': 0, 'rate_limited': 0, 'timeout': 0}
+        self._thread = None
+
+    @property
+    def domain(self) -> str:
+        """host:port, as accepted by the geocoder's --domain."""
+        host, port = self.server_address[:2]
+        return f"{host}:{port}"
+
+    def begin_request(self) -> Optional[str]:
+        """Count a request, sleep the configured latency and pick an injected fault (or None)."""
+        with self._lock:
+            self._counts['requests'] += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            draw = self._random.random()
+            fault = None
+            for name, rate in (('timeout', self.timeout_rate), ('error', self.error_rate),
+                               ('rate_limited', self.rate_limit_rate)):
+                if draw < rate:
+                    fault = name
+                    break
+                draw -= rate
+            if fault:
+                self._counts[fault] += 1
+        if delay:
+            time.sleep(delay)
+        return fault
+
+    def search(self, query: str):
+        lower = query.lower()
+        coords = None
+        if not self.strict or (('мариуполь' in lower or 'маріуполь' in lower) and 'район' not in lower):
+            coords = self.gazetteer.lookup(_CITY_CONTEXT.sub('', query))
+        with self._lock:
+            self._counts['resolved' if coords else 'not_found'] += 1
+            place_id = self._counts['resolved']
+        if not coords:
+            return []
+        lon, lat = coords
+        return [{
+            'place_id': place_id,
+            'lat': f"{lat:.7f}",
+            'lon': f"{lon:.7f}",
+            'display_name': f"{_CITY_CONTEXT.sub('', query)}, Мариуполь, Донецкая область, Украина",
+            'class': 'building',
+            'type': 'yes',
+            'importance': 0.5,
+            'boundingbox': [f"{lat - 0.0001:.7f}", f"{lat + 0.0001:.7f}", f"{lon - 0.0001:.7f}", f"{lon + 0.0001:.7f}"],
+        }]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def start(self) -> 'MockNominatimServer':
+        """Serve on a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name='mock-nominatim', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a local mock of the Nominatim search API')
+    parser.add_argument('--gazetteer', default=DEFAULT_GAZETTEER, help='Gazetteer CSV to answer from')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Uniform +/- seconds around --latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with 503')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Share of requests answered with 429')
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help='Share of requests left hanging')
+    parser.add_argument('--hang', type=float, default=10.0, help='Seconds a hanging request is held')
+    parser.add_argument('--lenient', action='store_true',
+                        help='Resolve queries without the city name or with a district')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    server = MockNominatimServer(args.gazetteer, args.host, args.port, latency=args.latency, jitter=args.jitter,
+                                 error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                                 timeout_rate=args.timeout_rate, hang=args.hang, strict=not args.lenient,
+                                 seed=args.seed)
+    logger.info(f"Mock Nominatim serving {len(server.gazetteer)} addresses on http://{server.domain}/search")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stopping.set()
+        server.server_close()
+        logger.info(f"Request counts: {server.stats()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Writers for the geocoder's output formats.
+
+- geojson: one FeatureCollection, as before. Easy to share, slow to write
+  and read, and large on disk.
+- csv: the plain table.
+- geoparquet: columnar and zstd-compressed, with a GeoParquet 1.1 `bbox`
+  covering column. Located rows are sorted along a Hilbert curve, so each
+  row group covers a compact area and its bbox statistics let readers skip
+  it. Readers can load just the columns or bbox they need, e.g.
+  geopandas.read_parquet(path, columns=[...], bbox=(...)). Rows that failed
+  to geocode are kept at the end with a null geometry.
+- flatgeobuf: streamable binary features with a packed Hilbert R-tree, so
+  GDAL/QGIS/pyogrio bbox reads only touch matching features. The R-tree
+  cannot hold null geometries, so rows without coordinates go to a sidecar
+  CSV, <output>.ungeocoded.csv.
+"""
+
+import os
+import logging
+from typing import Tuple
+
+# pandas and geopandas are imported by the writers that use them, so that
+# importing OUTPUT_FORMATS (for --format choices) or writing CSV stays cheap.
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FORMATS = ('geojson', 'csv', 'geoparquet', 'flatgeobuf')
+
+# Small enough that a bbox read can skip most row groups, large enough to compress well
+PARQUET_ROW_GROUP_SIZE = 16384
+PARQUET_COMPRESSION = 'zstd'
+
+# Python tuples duplicated by longitude/latitude; not representable in FlatGeobuf
+_COLUMNAR_DROP = ('coordinates',)
+
+
+def ungeocoded_sidecar_path(output_file: str) -> str:
+    return f"{output_file}.ungeocoded.csv"
+
+
+def to_geodataframe(df: 'pd.DataFrame') -> 'gpd.GeoDataFrame':
+    """Point geometries from longitude/latitude; rows without coordinates get a null geometry."""
+    import geopandas as gpd
+    located = (df['longitude'].notna() & df['latitude'].notna()).to_numpy()
+    geometry = gpd.points_from_xy(df['longitude'], df['latitude'])
+    geometry[~located] = None
+    return gpd.GeoDataFrame(df, geometry=geometry, crs="EPSG:4326")
+
+
+def _split_located(df: 'pd.DataFrame') -> Tuple['pd.DataFrame', 'pd.DataFrame']:
+    df = df.drop(columns=[c for c in _COLUMNAR_DROP if c in df.columns])
+    located = df['longitude'].notna() & df['latitude'].notna()
+    return df[located], df[~located]
+
+
+def hilbert_sorted(gdf: 'gpd.GeoDataFrame') -> 'gpd.GeoDataFrame':
+    """Rows ordered along a Hilbert curve over their own extent (stable for ties)."""
+    if len(gdf) < 2:
+        return gdf
+    distances = gdf.hilbert_distance(total_bounds=gdf.total_bounds)
+    return gdf.iloc[distances.argsort(kind='stable')]
+
+
+def write_geoparquet(df: 'pd.DataFrame', output_file: str):
+    import pandas as pd
+    located, ungeocoded = _split_located(df)
+    gdf = pd.concat([hilbert_sorted(to_geodataframe(located)), to_geodataframe(ungeocoded)])
+    gdf.to_parquet(output_file, index=False, compression=PARQUET_COMPRESSION,
+                   write_covering_bbox=True, row_group_size=PARQUET_ROW_GROUP_SIZE)
+
+
+def write_flatgeobuf(df: 'pd.DataFrame', output_file: str):
+    located, ungeocoded = _split_located(df)
+    # GDAL creates a directory for FlatGeobuf paths not ending in .fgb
+    temp_file = f"{output_file}.tmp.fgb"
+    to_geodataframe(located).to_file(temp_file, driver='FlatGeobuf', SPATIAL_INDEX='YES')
+    os.replace(temp_file, output_file)
+
+    sidecar = ungeocoded_sidecar_path(output_file)
+    if len(ungeocoded):
+        ungeocoded.to_csv(sidecar, index=False)
+        logger.info(f"Wrote {len(ungeocoded)} rows without coordinates to {sidecar}")
+    elif os.path.exists(sidecar):
+        os.remove(sidecar)
+
+
+def write_output(df: 'pd.DataFrame', output_file: str, output_format: str):
+    output_format = output_format.lower()
+    if output_format == 'geojson':
+        import geopandas as gpd
+        gdf = gpd.GeoDataFrame(
+            df,
+            geometry=gpd.points_from_xy(df.longitude, df.latitude),
+            crs="EPSG:4326"
+        )
+        gdf.to_file(output_file, driver='GeoJSON')
+    elif output_format == 'geoparquet':
+        write_geoparquet(df, output_file)
+    elif output_format == 'flatgeobuf':
+        write_flatgeobuf(df, output_file)
+    elif output_format == 'csv':
+        df.to_csv(output_file, index=False)
+    else:
+        raise ValueError(f"Unknown output format: {output_format}")
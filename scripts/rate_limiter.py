@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Thread-safe token bucket shared by all geocoding workers.
+
+Tokens refill continuously at `rate` per second up to `burst`. acquire()
+reserves a token under a lock and sleeps outside it, so waiting workers are
+served in arrival order and never block each other's bookkeeping.
+"""
+
+import time
+import threading
+from typing import Dict, Optional
+
+# Upstream limits per provider: requests/second and burst size.
+# The public OSM Nominatim policy is at most 1 request/second; a self-hosted
+# instance is bounded only by its own capacity.
+PROVIDER_RATE_LIMITS: Dict[str, Dict[str, float]] = {
+    'nominatim': {'rate': 1 / 1.1, 'burst': 1},
+    'self-hosted': {'rate': 200.0, 'burst': 50},
+}
+
+
+class TokenBucket:
+    """Token bucket rate limiter safe to share between threads."""
+
+    def __init__(self, rate: float, burst: float = 1, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = clock()
+        self.acquired = 0
+        self.waited = 0.0
+
+    def _reserve(self) -> float:
+        """Take one token (possibly going into debt) and return how long to wait for it."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            self.acquired += 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.waited += wait
+            return wait
+
+    def acquire(self) -> float:
+        """Block until a token is available. Returns the time spent waiting."""
+        wait = self._reserve()
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def try_acquire(self) -> bool:
+        """Take a token only if one is available right now."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self.acquired += 1
+            return True
+
+
+def bucket_for_provider(provider: str = 'nominatim', rate: Optional[float] = None,
+                        burst: Optional[float] = None) -> TokenBucket:
+    """Token bucket with a provider's defaults, overridden by explicit rate/burst."""
+    limits = PROVIDER_RATE_LIMITS[provider]
+    return TokenBucket(rate if rate is not None else limits['rate'],
+                       burst if burst is not None else limits['burst'])
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Single-flight execution: concurrent callers asking for the same key share
+one in-flight call instead of each issuing their own.
+
+The first caller for a key (the leader) runs the function; callers that
+arrive while it is running wait for and receive the leader's result (or its
+exception). Once the call completes the key is forgotten, so later callers
+start a fresh call; caching results is the geocoding cache's job.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with equal keys into one execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        return self.execute(key, function)[0]
+
+    def execute(self, key: Hashable, function: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Like do(), but also returns whether this caller was the leader, i.e.
+        ran the function itself. Per-call bookkeeping belongs to the leader
+        only; followers merely share its result.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, False
+
+        try:
+            call.result = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, True
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'executed': self.executed, 'coalesced': self.coalesced, 'in_flight': len(self._calls)}
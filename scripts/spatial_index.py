@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Uniform-grid spatial index over geocoded properties.
+
+Points are bucketed into square cells of `cell_size_m` metres (converted to
+degrees at the data's mean latitude) and stored sorted by row-major cell
+number, so the points of a horizontal run of cells are one contiguous slice.
+A query visits only the cells overlapping its bounding box (one pair of
+binary searches per cell row) and computes exact haversine distances for the
+candidates found there.
+
+Build from the geocoder's output (GeoJSON, CSV, GeoParquet or FlatGeobuf) and
+persist as .npz:
+
+    python scripts/spatial_index.py build data/processed/geocoded_properties.geojson properties_index.npz
+    python scripts/spatial_index.py query properties_index.npz --address "проспект Нахимова 82" --radius 300
+"""
+
+import os
+import sys
+import logging
+import argparse
+from array import array
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from count_geocoded import iter_geojson_features  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = np.pi * EARTH_RADIUS_M / 180
+
+
+def haversine_m(lon1, lat1, lon2, lat2):
+    """Great-circle distance in metres; arguments may be numpy arrays."""
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class GridSpatialIndex:
+    """Radius, k-nearest and bounding-box queries over lon/lat points."""
+
+    def __init__(self, lon: Sequence[float], lat: Sequence[float], ids: Optional[Sequence] = None,
+                 labels: Optional[Sequence[str]] = None, cell_size_m: float = 250.0):
+        lon = np.asarray(lon, dtype=np.float64)
+        lat = np.asarray(lat, dtype=np.float64)
+        if lon.shape != lat.shape or lon.ndim != 1:
+            raise ValueError("lon and lat must be 1-D arrays of equal length")
+        ids = np.arange(len(lon)) if ids is None else np.asarray(ids)
+        labels = np.full(len(lon), '', dtype=str) if labels is None else np.asarray(labels, dtype=str)
+
+        self.cell_size_m = float(cell_size_m)
+        self.lon_min = float(lon.min()) if len(lon) else 0.0
+        self.lat_min = float(lat.min()) if len(lat) else 0.0
+        mean_lat = float(lat.mean()) if len(lat) else 0.0
+        self.cell_lat = self.cell_size_m / METERS_PER_DEGREE
+        self.cell_lon = self.cell_size_m / (METERS_PER_DEGREE * max(np.cos(np.radians(mean_lat)), 1e-6))
+
+        cx = self._cell_x(lon)
+        cy = self._cell_y(lat)
+        self.nx = int(cx.max()) + 1 if len(lon) else 1
+        self.ny = int(cy.max()) + 1 if len(lat) else 1
+        keys = cy * self.nx + cx
+        order = np.argsort(keys, kind='stable')
+
+        self._keys = keys[order]
+        self.lon = lon[order]
+        self.lat = lat[order]
+        self.ids = ids[order]
+        self.labels = labels[order]
+
+    def __len__(self) -> int:
+        return len(self.lon)
+
+    def _cell_x(self, lon):
+        return np.floor((np.asarray(lon) - self.lon_min) / self.cell_lon).astype(np.int64)
+
+    def _cell_y(self, lat):
+        return np.floor((np.asarray(lat) - self.lat_min) / self.cell_lat).astype(np.int64)
+
+    def _candidates(self, min_lon: float, min_lat: float, max_lon: float, max_lat: float) -> np.ndarray:
+        """Positions of the points in every cell overlapping a bounding box."""
+        if (len(self) == 0 or max_lon < self.lon_min or max_lat < self.lat_min
+                or min_lon > self.lon_min + self.nx * self.cell_lon
+                or min_lat > self.lat_min + self.ny * self.cell_lat):
+            return np.empty(0, dtype=np.int64)
+        cx0, cx1 = np.clip(self._cell_x([min_lon, max_lon]), 0, self.nx - 1)
+        cy0, cy1 = np.clip(self._cell_y([min_lat, max_lat]), 0, self.ny - 1)
+        rows = np.arange(cy0, cy1 + 1) * self.nx
+        starts = np.searchsorted(self._keys, rows + cx0, side='left')
+        ends = np.searchsorted(self._keys, rows + cx1, side='right')
+        spans = [np.arange(start, end) for start, end in zip(starts, ends) if end > start]
+        return np.concatenate(spans) if spans else np.empty(0, dtype=np.int64)
+
+    def bbox(self, min_lon: float, min_lat: float, max_lon: float, max_lat: float) -> np.ndarray:
+        """Positions (into .ids/.lon/.lat) of the points inside a lon/lat box."""
+        candidates = self._candidates(min_lon, min_lat, max_lon, max_lat)
+        lon, lat = self.lon[candidates], self.lat[candidates]
+        inside = (lon >= min_lon) & (lon <= max_lon) & (lat >= min_lat) & (lat <= max_lat)
+        return candidates[inside]
+
+    def radius(self, lon: float, lat: float, radius_m: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(positions, distances in metres) of the points within radius_m, nearest first."""
+        dlat = radius_m / METERS_PER_DEGREE
+        dlon = radius_m / (METERS_PER_DEGREE * max(np.cos(np.radians(abs(lat) + dlat)), 1e-6))
+        candidates = self._candidates(lon - dlon, lat - dlat, lon + dlon, lat + dlat)
+        distances = haversine_m(lon, lat, self.lon[candidates], self.lat[candidates])
+        within = distances <= radius_m
+        candidates, distances = candidates[within], distances[within]
+        order = np.argsort(distances, kind='stable')
+        return candidates[order], distances[order]
+
+    def nearest(self, lon: float, lat: float, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """(positions, distances) of the k nearest points, nearest first."""
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        # Every point lies within this distance of the query, so the search terminates
+        extent = max(self.nx * self.cell_lon, self.ny * self.cell_lat) * METERS_PER_DEGREE
+        far = haversine_m(lon, lat, self.lon_min, self.lat_min) + 2 * extent
+        radius_m = self.cell_size_m
+        while True:
+            positions, distances = self.radius(lon, lat, radius_m)
+            if len(positions) >= k or radius_m >= far:
+                return positions[:k], distances[:k]
+            radius_m *= 2
+
+    # --- Persistence ---
+
+    def save(self, path: str):
+        np.savez_compressed(path, lon=self.lon, lat=self.lat, ids=self.ids, labels=self.labels,
+                            cell_size_m=np.array(self.cell_size_m))
+
+    @classmethod
+    def load(cls, path: str) -> 'GridSpatialIndex':
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['lon'], data['lat'], ids=data['ids'], labels=data['labels'],
+                       cell_size_m=float(data['cell_size_m']))
+
+    @classmethod
+    def from_geocoded_output(cls, path: str, cell_size_m: float = 250.0) -> 'GridSpatialIndex':
+        """Index the geocoded points of a geocoder output file (any --format); ids are row numbers."""
+        with open(path, 'rb') as f:
+            magic = f.read(4)
+        if magic == b'PAR1' or magic[:3] == b'fgb':
+            columns = ['address', 'longitude', 'latitude']
+            if magic == b'PAR1':
+                import pandas as pd
+                df = pd.read_parquet(path, columns=columns)
+            else:
+                import geopandas as gpd
+                df = gpd.read_file(path, columns=columns, ignore_geometry=True)
+            lon, lat = df['longitude'].to_numpy(dtype=float), df['latitude'].to_numpy(dtype=float)
+            labels = df['address'].astype(str).to_numpy()
+        elif path.lower().endswith('.csv'):
+            import pandas as pd
+            df = pd.read_csv(path)
+            lon, lat = df['longitude'].to_numpy(dtype=float), df['latitude'].to_numpy(dtype=float)
+            labels = df['address'].astype(str).to_numpy() if 'address' in df.columns else None
+        else:
+            # Streamed one feature at a time; only the columns are kept in memory
+            lon, lat, labels = array('d'), array('d'), []
+            for feature in iter_geojson_features(path):
+                coordinates = (feature.get('geometry') or {}).get('coordinates') or (None, None)
+                lon.append(coordinates[0] if coordinates[0] is not None else np.nan)
+                lat.append(coordinates[1] if coordinates[1] is not None else np.nan)
+                labels.append(str((feature.get('properties') or {}).get('address', '')))
+            lon, lat, labels = np.frombuffer(lon, dtype=float), np.frombuffer(lat, dtype=float), np.array(labels)
+
+        located = ~(np.isnan(lon) | np.isnan(lat))
+        ids = np.flatnonzero(located)
+        logger.info(f"Indexing {located.sum()} of {len(lon)} rows with coordinates from {path}")
+        return cls(lon[located], lat[located], ids=ids,
+                   labels=None if labels is None else labels[located], cell_size_m=cell_size_m)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Build or query a spatial index of geocoded properties')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help='Index a geocoded GeoJSON/CSV/GeoParquet/FlatGeobuf output')
+    build.add_argument('geocoded_file')
+    build.add_argument('index_file', help='Output .npz file')
+    build.add_argument('--cell-size', type=float, default=250.0, help='Grid cell size in metres')
+
+    query = subparsers.add_parser('query', help='Query a saved index')
+    query.add_argument('index_file')
+    center = query.add_mutually_exclusive_group()
+    center.add_argument('--point', nargs=2, type=float, metavar=('LON', 'LAT'))
+    center.add_argument('--address', help='Use the first indexed property whose address contains this text')
+    query.add_argument('--radius', type=float, help='Radius in metres around the point')
+    query.add_argument('--knn', type=int, help='Number of nearest properties')
+    query.add_argument('--bbox', nargs=4, type=float, metavar=('MIN_LON', 'MIN_LAT', 'MAX_LON', 'MAX_LAT'))
+    query.add_argument('--limit', type=int, default=20, help='Rows to print')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.command == 'build':
+        index = GridSpatialIndex.from_geocoded_output(args.geocoded_file, args.cell_size)
+        index.save(args.index_file)
+        print(f"Indexed {len(index)} properties into {args.index_file}")
+        return 0
+
+    index = GridSpatialIndex.load(args.index_file)
+    if args.address:
+        needle = args.address.lower()
+        matches = [i for i, label in enumerate(index.labels) if needle in label.lower()]
+        if not matches:
+            logger.error(f"No indexed property matches address: {args.address}")
+            return 1
+        center = (index.lon[matches[0]], index.lat[matches[0]])
+    else:
+        center = tuple(args.point) if args.point else None
+
+    if args.bbox:
+        positions, distances = index.bbox(*args.bbox), None
+    elif center and args.knn:
+        positions, distances = index.nearest(*center, k=args.knn)
+    elif center and args.radius:
+        positions, distances = index.radius(*center, args.radius)
+    else:
+        logger.error("Give --bbox, or a --point/--address with --radius or --knn")
+        return 1
+
+    print(f"{len(positions)} properties")
+    for n, position in enumerate(positions[:args.limit]):
+        distance = f"{distances[n]:8.1f} m  " if distances is not None else ""
+        print(f"{distance}row {index.ids[position]}  ({index.lon[position]:.6f}, {index.lat[position]:.6f})  "
+              f"{index.labels[position]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Fuzzy street-name index mapping noisy spellings to one canonical street.
+
+Register clerks and Telegram posts spell the same street many ways:
+Russian or Ukrainian letters ("Гагарина"/"Гагаріна"), ё or е, dropped or
+doubled letters ("Металургов"), with or without the street type. The
+geocoder used to cover some of these with a hand-written
+street_name_mappings dict. It scanned that dict for every address and sent
+one more upstream query per listed alternative.
+
+StreetMatcher is built once from every street the pipeline knows:
+- the gazetteer;
+- the toponymic database (both the Ukrainian and the occupation names);
+- resolved geocoding cache keys;
+- the former hand-written variants, now seed groups (STREET_NAME_VARIANTS).
+
+Spellings of one street form a group. Its canonical spelling comes from the
+most trusted source: gazetteer > toponymic database > seed groups > cache.
+
+A lookup works on a folded key: lowercase, no street type, and the
+Ukrainian/Russian letter pairs і/и, ї/и, є/е, ы/и, э/е and ё/е merged, with
+soft and hard signs and apostrophes dropped. It is:
+1. one dict probe for the folded key;
+2. otherwise, candidates that share character trigrams with the query,
+   verified by a bounded Levenshtein distance (at most 1 edit up to 6
+   characters, 2 up to 12, 3 beyond).
+A tie between two different streets is ambiguous and returns no match.
+Results are memoized.
+
+    python scripts/street_matcher.py "ул. Металургов, д. 5" "Гагаріна 12" --gazetteer data/fixtures/mariupol_gazetteer.csv
+"""
+
+import os
+import re
+import sys
+import logging
+import argparse
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Canonical spelling first; formerly street_name_mappings in geocode_properties_enhanced
+STREET_NAME_VARIANTS = [
+    ['Металлургов', 'металургов'],
+    ['Артема', 'артёма'],
+    ['Нахимова', 'нахимова переулок'],
+    ['50-летия СССР', '50 лет СССР', '50 лет ССР', '50-летия ССР', '50 років СРСР', '50 летия СССР',
+     '50-річчя СРСР', '50-річчя СССР'],
+    ['2-й Кальчик', '2-й Кальчикский', '2-я Кальчикская'],
+    ['Кирова', 'Кірова'],
+    ['Чернышевского', 'Чернишевського'],
+    ['Щорса', 'Щорса улица', 'улица Щорса'],
+    ['Луначарского', 'Луначарського'],
+    ['Куйбышева', 'Куйбишева'],
+    ['Фрунзе', 'Фрунзе улица', 'улица Фрунзе'],
+    ['Дзержинского', 'Дзержинського'],
+    ['Куприна', 'Купріна'],
+    ['Лермонтова', 'Лермонтовська'],
+    ['Гагарина', 'Гагаріна'],
+    ['Горького', 'Горького улица', 'улица Горького'],
+]
+
+# Source priorities: the canonical spelling of a group comes from the highest
+PRIORITY_CACHE = 0
+PRIORITY_SEED = 1
+PRIORITY_TOPONYMIC = 2
+PRIORITY_GAZETTEER = 3
+
+_STREET_TYPE = (r'(?:улица|вулиця|ул|вул|проспект|просп|пр-кт|пр-т|бульвар|бул|б-р|переулок|провулок|пер|пров|'
+                r'площадь|площа|пл|шоссе|шосе|набережная|набережна|наб|проезд|проїзд|пр-д|тупик|туп|спуск|'
+                r'микрорайон|мкр)')
+_LEADING_TYPE = re.compile(rf'^\s*{_STREET_TYPE}(?![\w-])\.?\s*', re.IGNORECASE)
+_TRAILING_TYPE = re.compile(rf'\s+{_STREET_TYPE}\.?\s*$', re.IGNORECASE)
+_ANY_TYPE = re.compile(rf'(?<![\w-]){_STREET_TYPE}(?![\w-])\.?', re.IGNORECASE)
+_TRAILING_HOUSE = re.compile(r'\s+(?:д\.?|дом|буд\.?)?\s*\d+[а-яіїєa-z]?(?:/\d+[а-яіїєa-z]?)?\s*$', re.IGNORECASE)
+_FOLD = str.maketrans({'ё': 'е', 'і': 'и', 'ї': 'и', 'є': 'е', 'ы': 'и', 'э': 'е', 'ґ': 'г',
+                       'ь': None, 'ъ': None, "'": None, '’': None, 'ʼ': None,
+                       '-': ' ', '.': ' ', ',': ' ', '"': ' ', '«': ' ', '»': ' '})
+# Adjective endings of folded words by gender: "Морская" (улица) and "Морской"
+# (переулок) are different streets, not a typo of each other
+_ADJECTIVE_ENDINGS = (('m', ('ой', 'ий', 'ей')),
+                      ('f', ('ая', 'яя', 'ска', 'цка', 'зка')),
+                      ('n', ('ое', 'ее', 'ске', 'цке', 'зке')))
+
+
+def fold_street_name(name: str) -> str:
+    """Comparison key of a street name: lowercase, type-free, Russian/Ukrainian letters merged."""
+    folded = _ANY_TYPE.sub(' ', name.lower()).translate(_FOLD)
+    return ' '.join(folded.split())
+
+
+def street_name_span(address: str) -> Optional[Tuple[int, int]]:
+    """(start, end) of the street name in an address such as "ул. Артема, д. 5" or "Артема 5"."""
+    end = address.find(',')
+    head = address if end < 0 else address[:end]
+    house = _TRAILING_HOUSE.search(head)
+    if house:
+        head = head[:house.start()]
+    start = 0
+    leading = _LEADING_TYPE.match(head)
+    if leading:
+        start = leading.end()
+    trailing = _TRAILING_TYPE.search(head, start)
+    end = trailing.start() if trailing else len(head)
+    while start < end and head[start].isspace():
+        start += 1
+    while end > start and head[end - 1].isspace():
+        end -= 1
+    return (start, end) if end > start else None
+
+
+def adjective_genders(key: str) -> Tuple[Optional[str], ...]:
+    """Gender ('m', 'f', 'n') of each word of a folded key that has an adjective ending, else None."""
+    genders = []
+    for word in key.split():
+        gender = None
+        if len(word) >= 4:
+            for candidate, endings in _ADJECTIVE_ENDINGS:
+                if word.endswith(endings):
+                    gender = candidate
+                    break
+        genders.append(gender)
+    return tuple(genders)
+
+
+def _same_genders(a: Tuple[Optional[str], ...], b: Tuple[Optional[str], ...]) -> bool:
+    return all(x is None or y is None or x == y for x, y in zip(a, b))
+
+
+def _trigrams(key: str) -> List[str]:
+    padded = f"  {key} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def _max_distance(length: int) -> int:
+    return 1 if length <= 6 else 2 if length <= 12 else 3
+
+
+def bounded_levenshtein(a: str, b: str, limit: int) -> int:
+    """Edit distance of a and b, or limit + 1 once it is known to exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+class StreetMatcher:
+    """Folded-key dict plus trigram index over known street spellings."""
+
+    def __init__(self, min_similarity: float = 0.4, max_candidates: int = 8, cache_size: int = 65536):
+        self.min_similarity = min_similarity
+        self.max_candidates = max_candidates
+        self._group_of: Dict[str, int] = {}        # folded key -> group
+        self._canonical: List[Tuple[int, str]] = []  # group -> (priority, spelling)
+        self._merged: Dict[int, int] = {}         # group -> group it was merged into
+        self._keys: List[str] = []                # entry -> folded key
+        self._sizes: List[int] = []               # entry -> number of distinct trigrams
+        self._genders: List[Tuple] = []           # entry -> adjective_genders of its key
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _root(self, group: int) -> int:
+        while group in self._merged:
+            group = self._merged[group]
+        return group
+
+    def add(self, spellings: Iterable[str], priority: int = PRIORITY_SEED):
+        """Add spellings of one street; the first is its canonical spelling at this priority."""
+        spellings = [s.strip() for s in spellings if s and s.strip()]
+        keys = [fold_street_name(s) for s in spellings]
+        if not any(keys):
+            return
+        groups = {self._root(self._group_of[key]) for key in keys if key in self._group_of}
+        if groups:
+            group = min(groups)
+            for other in groups - {group}:
+                self._merged[other] = group
+                if self._canonical[other][0] > self._canonical[group][0]:
+                    self._canonical[group] = self._canonical[other]
+        else:
+            group = len(self._canonical)
+            self._canonical.append((priority, spellings[0]))
+        if priority > self._canonical[group][0]:
+            self._canonical[group] = (priority, spellings[0])
+
+        for key in keys:
+            if key and key not in self._group_of:
+                self._group_of[key] = group
+                entry = len(self._keys)
+                self._keys.append(key)
+                trigrams = set(_trigrams(key))
+                self._sizes.append(len(trigrams))
+                self._genders.append(adjective_genders(key))
+                for trigram in trigrams:
+                    self._postings[trigram].append(entry)
+        self.match.cache_clear()
+
+    def _match(self, name: str) -> Optional[str]:
+        """Canonical spelling of a street name, or None if no known street is close enough."""
+        key = fold_street_name(name)
+        if not key:
+            return None
+        group = self._group_of.get(key)
+        if group is not None:
+            return self._canonical[self._root(group)][1]
+
+        trigrams = set(_trigrams(key))
+        shared = Counter()
+        for trigram in trigrams:
+            shared.update(self._postings.get(trigram, ()))
+        similarities = sorted(((2 * count / (len(trigrams) + self._sizes[entry]), entry)
+                               for entry, count in shared.items()), reverse=True)
+
+        limit = _max_distance(len(key))
+        genders = adjective_genders(key)
+        best_distance, best_groups = limit + 1, set()
+        for similarity, entry in similarities[:self.max_candidates]:
+            if similarity < self.min_similarity:
+                break
+            # One letter apart but a different street, as ул. Морская / пер. Морской
+            if not _same_genders(genders, self._genders[entry]):
+                continue
+            distance = bounded_levenshtein(key, self._keys[entry], limit)
+            group = self._root(self._group_of[self._keys[entry]])
+            if distance < best_distance:
+                best_distance, best_groups = distance, {group}
+            elif distance == best_distance:
+                best_groups.add(group)
+        # Two different streets equally close: guessing would misplace the building
+        if best_distance > limit or len(best_groups) != 1:
+            return None
+        return self._canonical[best_groups.pop()][1]
+
+    def canonicalize(self, address: str) -> Optional[str]:
+        """The address with its street name respelled canonically, or None if unknown or unchanged."""
+        if not address or not isinstance(address, str):
+            return None
+        span = street_name_span(address)
+        if span is None:
+            return None
+        name = address[span[0]:span[1]]
+        canonical = self.match(name)
+        if canonical is None or canonical.lower() == name.lower():
+            return None
+        return f"{address[:span[0]]}{canonical}{address[span[1]:]}"
+
+    # --- Sources ---
+
+    def add_gazetteer_file(self, path: str):
+        import csv
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                street = (row.get('street') or '').strip()
+                span = street_name_span(street)
+                if span:
+                    self.add([street[span[0]:span[1]]], PRIORITY_GAZETTEER)
+
+    def add_toponymic_database(self, database: Dict):
+        for district_data in database.values():
+            for street_data in district_data.values():
+                for field in ('ukrainian_name', 'occupation_name', 'new_construction_address'):
+                    value = street_data.get(field) or ''
+                    span = street_name_span(value)
+                    if span:
+                        self.add([value[span[0]:span[1]]], PRIORITY_TOPONYMIC)
+
+    def add_cache_keys(self, cache):
+        """
+        Street names of the buildings a geocoding cache resolved. The cache
+        lists its streets (the SQLite backend keeps them in a table of their
+        own), so this costs the number of streets, not of cached buildings.
+        """
+        names = set()
+        for street in cache.street_names():
+            span = street_name_span(street)
+            if span:
+                names.add(street[span[0]:span[1]])
+        for name in sorted(names):
+            self.add([name], PRIORITY_CACHE)
+
+    @classmethod
+    def build(cls, gazetteer_file: Optional[str] = None, cache=None,
+              toponymic_database: Optional[Dict] = None) -> 'StreetMatcher':
+        matcher = cls()
+        for spellings in STREET_NAME_VARIANTS:
+            matcher.add(spellings, PRIORITY_SEED)
+        if toponymic_database:
+            matcher.add_toponymic_database(toponymic_database)
+        if gazetteer_file:
+            matcher.add_gazetteer_file(gazetteer_file)
+        if cache is not None:
+            matcher.add_cache_keys(cache)
+        logger.info(f"Street matcher indexed {len(matcher)} spellings of {len(matcher._canonical) - len(matcher._merged)} streets")
+        return matcher
+
+
+def load_toponymic_database(path: Optional[str] = None) -> Optional[Dict]:
+    """The toponymic database file (data/toponymic_database.json by default), or None if it cannot be loaded."""
+    src = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+    if src not in sys.path:
+        sys.path.append(src)
+    try:
+        import toponymic_store
+        return toponymic_store.load_database(path or toponymic_store.DEFAULT_DATABASE_FILE)
+    except (ImportError, OSError, ValueError) as e:
+        logger.warning(f"Toponymic database unavailable for street matching: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Map noisy street spellings to canonical streets')
+    parser.add_argument('addresses', nargs='+', help='Addresses or street names')
+    parser.add_argument('--gazetteer', default=None, help='Gazetteer CSV to index')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    matcher = StreetMatcher.build(args.gazetteer, toponymic_database=load_toponymic_database())
+    for address in args.addresses:
+        print(f"{address} -> {matcher.canonicalize(address) or '(unchanged)'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
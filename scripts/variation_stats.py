@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Persistent success statistics for geocoding query variations.
+
+Every upstream query is classified by the template it was built from (street
+type spelling, appended city/region context, district language, case) and
+by the building's context (street type and district). VariationStats counts
+attempts and successes per (context, template) in a small JSON file, and
+orders candidate queries so the template most likely to succeed for that
+context is tried first.
+
+Scores are smoothed towards the template's success rate over all contexts,
+which is itself smoothed towards the overall success rate, so templates with
+no history keep their original relative order. Templates that failed every
+one of at least `prune_after` attempts in a context are dropped (as long as
+some candidate remains).
+"""
+
+import os
+import re
+import json
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STATS_VERSION = 1
+
+_FULL_TYPES = ('улица', 'проспект', 'бульвар', 'переулок', 'площадь', 'шоссе', 'набережная', 'проезд', 'тупик')
+_SHORT_TYPES = {'ул': 'улица', 'пр-т': 'проспект', 'пр-кт': 'проспект', 'просп': 'проспект', 'б-р': 'бульвар',
+                'бул': 'бульвар', 'пер': 'переулок', 'пл': 'площадь', 'ш': 'шоссе', 'наб': 'набережная',
+                'пр-д': 'проезд', 'туп': 'тупик'}
+_TYPE_TOKEN = re.compile(r'(?<![\w-])(' + '|'.join(sorted(
+    [re.escape(t) for t in _FULL_TYPES + tuple(_SHORT_TYPES)], key=len, reverse=True)) + r')(?![\w-])', re.IGNORECASE)
+_CONTEXT_SUFFIXES = (
+    (', мариуполь, донецкая область, украина', 'city+region+country'),
+    (', мариуполь, донецкая область', 'city+region'),
+    (', мариуполь, украина', 'city+country'),
+    (', мариуполь', 'city'),
+)
+_RU_DISTRICTS = ('октябрьский', 'ильичёвский', 'портовский', 'центральный', 'кальмиусский', 'приморский', 'левобережный')
+_UK_DISTRICTS = ('жовтневий', 'іллічівський', 'портівський', 'центральний', 'кальміуський', 'приморський', 'лівобережний')
+
+
+def street_type(address: str) -> str:
+    """Canonical street type of an address ('улица', 'бульвар', ...) or 'none'."""
+    match = _TYPE_TOKEN.search(address or '')
+    if not match:
+        return 'none'
+    token = match.group(1).lower()
+    return _SHORT_TYPES.get(token, token)
+
+
+def variation_context(cleaned: str, district: str = "") -> str:
+    """Statistics bucket of a building: street type and district."""
+    return f"{street_type(cleaned)}|{(district or '').strip().lower() or 'none'}"
+
+
+def variation_template(cleaned: str, variation: str) -> str:
+    """Which transformations of the cleaned address a query variation applies."""
+    lower = variation.lower()
+    match = _TYPE_TOKEN.search(variation)
+    if not match:
+        type_form = 'bare'
+    else:
+        type_form = 'full' if match.group(1).lower() in _FULL_TYPES else 'short'
+
+    context = next((name for suffix, name in _CONTEXT_SUFFIXES if lower.endswith(suffix)), 'none')
+    if any(name in lower for name in _UK_DISTRICTS):
+        district = 'district_uk'
+    elif any(name in lower for name in _RU_DISTRICTS):
+        district = 'district_ru'
+    else:
+        district = 'none'
+
+    if variation == cleaned or variation.startswith(cleaned):
+        case = 'as_cleaned'
+    elif variation == variation.lower():
+        case = 'lower'
+    elif variation == variation.title():
+        case = 'title'
+    else:
+        case = 'mixed'
+    return f"{type_form}|{context}|{district}|{case}"
+
+
+class VariationStats:
+    """Attempt/success counters per (context, template), persisted as JSON."""
+
+    def __init__(self, path: Optional[str] = None, prior_weight: float = 5.0, prune_after: int = 10):
+        self.path = path
+        self.prior_weight = prior_weight
+        self.prune_after = prune_after
+        self.modified = False
+        self._lock = threading.Lock()
+        # context -> template -> [attempts, successes]
+        self._stats: Dict[str, Dict[str, List[int]]] = {}
+        self._totals: Dict[str, List[int]] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == STATS_VERSION:
+                    self._stats = {context: {template: list(counts) for template, counts in templates.items()}
+                                   for context, templates in data.get('stats', {}).items()}
+            except Exception as e:
+                logger.error(f"Failed to load variation stats: {e}")
+        for templates in self._stats.values():
+            for template, (attempts, successes) in templates.items():
+                total = self._totals.setdefault(template, [0, 0])
+                total[0] += attempts
+                total[1] += successes
+
+    def record(self, context: str, template: str, success: bool):
+        with self._lock:
+            for counts in (self._stats.setdefault(context, {}).setdefault(template, [0, 0]),
+                           self._totals.setdefault(template, [0, 0])):
+                counts[0] += 1
+                counts[1] += int(success)
+            self.modified = True
+
+    def _overall_rate(self) -> float:
+        attempts = sum(counts[0] for counts in self._totals.values())
+        successes = sum(counts[1] for counts in self._totals.values())
+        return (successes + 1) / (attempts + 2)
+
+    def score(self, context: str, template: str) -> float:
+        """Smoothed success probability of a template for a context."""
+        weight = self.prior_weight
+        attempts, successes = self._totals.get(template, (0, 0))
+        template_rate = (successes + weight * self._overall_rate()) / (attempts + weight)
+        attempts, successes = self._stats.get(context, {}).get(template, (0, 0))
+        return (successes + weight * template_rate) / (attempts + weight)
+
+    def _is_hopeless(self, context: str, template: str) -> bool:
+        attempts, successes = self._stats.get(context, {}).get(template, (0, 0))
+        return attempts >= self.prune_after and successes == 0
+
+    def order(self, context: str, candidates: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """
+        (variation, template) candidates sorted by descending score, stable for
+        ties, with hopeless templates pruned (never pruning all of them).
+        """
+        with self._lock:
+            kept = [c for c in candidates if not self._is_hopeless(context, c[1])] or candidates
+            scores = {template: self.score(context, template) for _, template in kept}
+        return sorted(kept, key=lambda candidate: -scores[candidate[1]])
+
+    def summary(self) -> Dict[str, Tuple[int, int]]:
+        with self._lock:
+            return {template: tuple(counts) for template, counts in self._totals.items()}
+
+    def flush(self):
+        if not self.modified or not self.path:
+            return
+        with self._lock:
+            snapshot = {'version': STATS_VERSION, 'stats': self._stats}
+            temp_file = f"{self.path}.tmp"
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(temp_file, self.path)
+            self.modified = False
+
+    def close(self):
+        self.flush()
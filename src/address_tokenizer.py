@@ -0,0 +1,229 @@
+# src/address_tokenizer.py
+# Last Updated: October 16, 2026
+# Single-pass address tokenizer and state machine for lemmatized Telegram text.
+#
+# The extraction used to run two broad regular expressions over every
+# message. Their name group ([А-Яа-я\s\-]+) swept across whole sentences and
+# then backtracked to the last digit, and both needed a house number, so
+# lemmatized mentions such as "черноморский переулок" were missed.
+#
+# Here each message is split into tokens by one linear scan, and a small
+# state machine walks the tokens once. It recognizes a street type followed
+# by a name ("проспект нахимова 82", "ул. Артема, д. 22") and an adjective
+# followed by a street type ("черноморский переулок 1б"). A house number is
+# optional.
+
+import re
+from collections import namedtuple
+
+# Street type spellings (lowercase, abbreviations with their dot) and the
+# type each one stands for.
+STREET_TYPES = {}
+for _street_type, _spellings in {
+    'улица': ['улица', 'ул', 'ул.', 'вулиця', 'вул', 'вул.'],
+    'проспект': ['проспект', 'пр', 'пр.', 'пр-т', 'пр-кт', 'просп', 'просп.'],
+    'площадь': ['площадь', 'пл', 'пл.', 'площа'],
+    'переулок': ['переулок', 'пер', 'пер.', 'провулок', 'пров', 'пров.'],
+    'бульвар': ['бульвар', 'б-р', 'бул', 'бул.'],
+    'шоссе': ['шоссе', 'шосе'],
+    'набережная': ['набережная', 'набережна', 'наб', 'наб.'],
+    'проезд': ['проезд', 'проїзд', 'пр-д'],
+    'микрорайон': ['микрорайон', 'мкр', 'мкр.'],
+    'тупик': ['тупик', 'туп', 'туп.'],
+    'спуск': ['спуск'],
+}.items():
+    for _spelling in _spellings:
+        STREET_TYPES[_spelling] = _street_type
+
+HOUSE_MARKERS = {'д', 'д.', 'дом', 'буд', 'буд.', 'будинок'}
+# Words that never belong to a street name.
+NON_NAME_WORDS = {'во', 'на', 'по', 'со', 'ко', 'об', 'от', 'до', 'за', 'из', 'не', 'же', 'ли', 'но', 'та', 'що'}
+# Endings of the adjectives that precede a street type ("черноморский переулок").
+ADJECTIVE_ENDINGS = ('ий', 'ый', 'ой', 'ая', 'яя', 'ій', 'ська', 'цька', 'зька')
+# Suffixes that make a number an ordinal ("2-й Кальчик") rather than a house.
+ORDINAL_SUFFIXES = {'й', 'я', 'е', 'го', 'ий', 'ый', 'ой', 'ая', 'ого', 'ей', 'ій'}
+MAX_NAME_WORDS = 3
+
+# Any message containing an address contains one of these as a whole word.
+# Matched against lowercased text: case-insensitive matching of this many
+# Cyrillic alternatives is several times slower.
+STREET_TYPE_PREFILTER = re.compile(
+    r'(?<![^\W\d_])(?:' + '|'.join(re.escape(spelling.rstrip('.'))
+                                   for spelling in sorted(STREET_TYPES, key=len, reverse=True)) + r')(?![^\W\d_])')
+
+_TOKEN = re.compile(r'''
+    (?P<number>\d+(?:/\d+)?(?:-?[^\W\d_]+)?)
+  | (?P<word>[^\W\d_]+(?:['’-][^\W\d_]+)*)(?P<dot>\.)?
+  | (?P<comma>,)
+  | (?P<stop>[.!?;:()«»"\n—–])
+''', re.VERBOSE)
+_NUMBER = re.compile(r'(\d+(?:/\d+)?)-?(.*)')
+
+# Token kinds
+TYPE, WORD, ORDINAL, MARKER, NUMBER, COMMA, STOP = range(7)
+# Machine states
+START, NAME, ADJECTIVE_TYPE, HOUSE = range(4)
+
+Token = namedtuple('Token', ['kind', 'text', 'start', 'end'])
+
+
+class AddressCandidate(namedtuple('AddressCandidate', ['street_type', 'street_name', 'street', 'house_number',
+                                                       'start', 'end'])):
+    """
+    One address found in a message.
+
+    street_type is the normalized type ('улица', 'переулок', ...),
+    street_name the name as written, and street what correlation looks up:
+    the name alone when the type comes first, or the name and the trailing
+    type ("черноморский переулок") when it follows. house_number is None
+    for a street mentioned without one; start and end span the candidate
+    in the message.
+    """
+    __slots__ = ()
+
+
+def tokenize(text):
+    """
+    Yields the tokens of a message in a single left-to-right scan. Street
+    types, house markers and ordinals are recognized here so the state
+    machine only looks at token kinds.
+    """
+    for match in _TOKEN.finditer(text):
+        kind = match.lastgroup
+        if kind == 'word':
+            word = match.group()
+            lower = word.lower()
+            if lower in STREET_TYPES:
+                yield Token(TYPE, STREET_TYPES[lower], *match.span())
+            elif lower in HOUSE_MARKERS:
+                yield Token(MARKER, word, *match.span())
+            else:
+                yield Token(WORD, word, *match.span())
+        elif kind == 'dot':
+            # A word followed by a dot: an abbreviation, or a word ending a sentence
+            word = match.group('word')
+            abbreviation = word.lower() + '.'
+            start, word_end = match.span('word')
+            if abbreviation in STREET_TYPES:
+                yield Token(TYPE, STREET_TYPES[abbreviation], start, word_end + 1)
+            elif abbreviation in HOUSE_MARKERS:
+                yield Token(MARKER, word, start, word_end + 1)
+            else:
+                lower = abbreviation[:-1]
+                kind = TYPE if lower in STREET_TYPES else MARKER if lower in HOUSE_MARKERS else WORD
+                yield Token(kind, STREET_TYPES[lower] if kind == TYPE else word, start, word_end)
+                yield Token(STOP, '.', word_end, word_end + 1)
+        elif kind == 'number':
+            number = match.group()
+            suffix = _NUMBER.match(number).group(2).lower() if not number.isdigit() else ''
+            if suffix in ORDINAL_SUFFIXES:
+                yield Token(ORDINAL, number, *match.span())
+            elif len(suffix) <= 1:
+                yield Token(NUMBER, number, *match.span())
+            else:
+                yield Token(STOP, number, *match.span())
+        elif kind == 'comma':
+            yield Token(COMMA, ',', *match.span())
+        else:
+            yield Token(STOP, match.group(), *match.span())
+
+
+def _is_name_word(token):
+    if token.kind == ORDINAL:
+        return True
+    return token.kind == WORD and len(token.text) >= 2 and token.text.lower() not in NON_NAME_WORDS
+
+
+def _is_adjective(token):
+    return token is not None and token.kind == WORD and token.text.lower().endswith(ADJECTIVE_ENDINGS)
+
+
+def scan_addresses(text):
+    """
+    Returns the AddressCandidates of a message in order of appearance.
+    Every token is read once (a token that ends a candidate is read once
+    more as the start of the next), so the scan is linear in the message.
+
+    With a house number, the name is every word between the street type and
+    the number (at most MAX_NAME_WORDS). Without one only the first word is
+    kept, since the words after it are as likely to be the rest of the
+    sentence.
+    """
+    candidates = []
+    state = START
+    street_type = None
+    name = []
+    type_first = True
+    previous = None
+
+    def emit(house):
+        words = name if house is not None or not type_first else name[:1]
+        street_name = text[words[0].start:words[-1].end]
+        if type_first:
+            street = street_name
+            start = street_type.start
+        else:
+            street = text[words[0].start:street_type.end]
+            start = words[0].start
+        end = house.end if house is not None else max(words[-1].end, street_type.end)
+        candidates.append(AddressCandidate(street_type.text, street_name, street,
+                                           house.text if house is not None else None, start, end))
+
+    for token in tokenize(text):
+        while True:
+            if state == START:
+                if token.kind == TYPE:
+                    street_type = token
+                    if _is_adjective(previous):
+                        name, type_first, state = [previous], False, ADJECTIVE_TYPE
+                    else:
+                        name, type_first, state = [], True, NAME
+                break
+
+            if state == NAME:
+                if _is_name_word(token) and len(name) < MAX_NAME_WORDS:
+                    name.append(token)
+                    break
+                if name and token.kind == NUMBER:
+                    emit(token)
+                    state = START
+                    break
+                if name and token.kind in (MARKER, COMMA):
+                    state = HOUSE
+                    break
+                if name:
+                    emit(None)
+                state = START
+                continue
+
+            if state == ADJECTIVE_TYPE:
+                if token.kind == NUMBER:
+                    emit(token)
+                    state = START
+                    break
+                if token.kind in (MARKER, COMMA):
+                    state = HOUSE
+                    break
+                if _is_name_word(token):
+                    # "новая улица Ленина": the type starts the name after all
+                    name, type_first, state = [token], True, NAME
+                    break
+                emit(None)
+                state = START
+                continue
+
+            # HOUSE: the name is complete; an optional marker, then the number
+            if token.kind in (MARKER, COMMA):
+                break
+            if token.kind == NUMBER:
+                emit(token)
+                state = START
+                break
+            emit(None)
+            state = START
+            continue
+        previous = token
+
+    if state in (ADJECTIVE_TYPE, HOUSE) or (state == NAME and name):
+        emit(None)
+    return candidates
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+#
+# src/custody_log.py
+#
+# Last Updated: October 16, 2026
+#
+# Append-only, hash-chained chain of custody log (JSON Lines).
+#
+# Each line is one custody entry serialized as compact JSON. Every entry
+# records the SHA-256 of the previous line (the first entry chains to
+# GENESIS_HASH) and of the file it describes, so any edit, deletion or
+# reordering of history breaks the chain. Appends take an exclusive file
+# lock, touch only the end of the file and are fsynced before returning.
+#
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are still atomic per line, but unlocked.
+    fcntl = None
+
+GENESIS_HASH = '0' * 64
+HASH_BUFFER_SIZE = 1024 * 1024
+
+
+def file_sha256(path, buffer_size=HASH_BUFFER_SIZE):
+    """
+    SHA-256 of a file, read in fixed-size blocks so memory use is constant.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(buffer_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class HashingFile(io.RawIOBase):
+    """
+    Unbuffered binary file that feeds every byte read from or written to it
+    into a running SHA-256, so a file's digest comes out of the same pass
+    that parses or produces it. Wrap in io.BufferedReader/BufferedWriter
+    (and io.TextIOWrapper for text) as with any raw file.
+    """
+
+    def __init__(self, path, mode='rb'):
+        super().__init__()
+        self._file = open(path, mode, buffering=0)
+        self._digest = hashlib.sha256()
+        self.size = 0
+
+    def readable(self):
+        return self._file.readable()
+
+    def writable(self):
+        return self._file.writable()
+
+    def readinto(self, buffer):
+        count = self._file.readinto(buffer)
+        if count:
+            self._digest.update(memoryview(buffer)[:count])
+            self.size += count
+        return count
+
+    def write(self, data):
+        count = self._file.write(data)
+        if count:
+            self._digest.update(memoryview(data)[:count])
+            self.size += count
+        return count
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+    def hexdigest(self):
+        return self._digest.hexdigest()
+
+    def finish_reading(self, buffer_size=HASH_BUFFER_SIZE):
+        """
+        Hashes whatever a consumer left unread, so the digest always covers
+        the whole file.
+        """
+        buffer = bytearray(buffer_size)
+        while self.readinto(buffer):
+            pass
+        return self.hexdigest()
+
+
+def serialize_entry(entry):
+    return json.dumps(entry, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def entry_sha256(line):
+    """
+    Hash of one serialized entry, without its trailing newline.
+    """
+    return hashlib.sha256(line.rstrip(b'\n')).hexdigest()
+
+
+def _read_last_line(f):
+    """
+    Returns (last complete line, offset just past it) by scanning backwards
+    from the end of the file, so the cost does not grow with history.
+    """
+    end = f.seek(0, os.SEEK_END)
+    position = end
+    tail = b''
+    while position > 0:
+        step = min(8192, position)
+        position -= step
+        f.seek(position)
+        tail = f.read(step) + tail
+        # Look for the newline that precedes the last complete line.
+        complete_end = tail.rfind(b'\n')
+        if complete_end == -1:
+            continue
+        start = tail.rfind(b'\n', 0, complete_end)
+        if start != -1 or position == 0:
+            return tail[start + 1:complete_end + 1], position + complete_end + 1
+    return b'', 0
+
+
+def append_custody_entry(log_file, entry, processed_file=None):
+    """
+    Appends one entry to a JSON Lines custody log and returns the entry as
+    written. previous_entry_sha256 and, when processed_file is given,
+    processed_file_sha256 are filled in here.
+    """
+    directory = os.path.dirname(log_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    entry = dict(entry)
+    if processed_file is not None and 'processed_file_sha256' not in entry:
+        entry['processed_file_sha256'] = file_sha256(processed_file)
+
+    with open(log_file, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            last_line, complete_end = _read_last_line(f)
+            end = f.seek(0, os.SEEK_END)
+            if complete_end != end:
+                # An interrupted append left a partial line that was never
+                # acknowledged; drop it so the chain continues from the last
+                # complete entry.
+                print(f"Warning: Discarding {end - complete_end} bytes of an incomplete entry in {log_file}.")
+                f.truncate(complete_end)
+
+            entry['previous_entry_sha256'] = entry_sha256(last_line) if last_line else GENESIS_HASH
+            f.write(serialize_entry(entry) + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    return entry
+
+
+def verify_custody_log(log_file):
+    """
+    Streams through a JSON Lines custody log checking every hash link.
+    Returns a dict with 'valid', 'entries', 'head_sha256' and, on failure,
+    'error' and the 1-based 'line' where the chain breaks.
+    """
+    result = {'valid': True, 'entries': 0, 'head_sha256': GENESIS_HASH}
+    previous = GENESIS_HASH
+    with open(log_file, 'rb') as f:
+        for line_number, line in enumerate(f, 1):
+            failure = None
+            if not line.endswith(b'\n'):
+                failure = 'incomplete final entry'
+            else:
+                try:
+                    entry = json.loads(line)
+                except ValueError as e:
+                    failure = f'invalid JSON ({e})'
+                else:
+                    if entry.get('previous_entry_sha256') != previous:
+                        failure = 'previous_entry_sha256 does not match the preceding entry'
+            if failure:
+                result.update(valid=False, error=failure, line=line_number)
+                return result
+            previous = entry_sha256(line)
+            result['entries'] = line_number
+            result['head_sha256'] = previous
+    return result
+
+
+def migrate_legacy_custody_log(legacy_file, log_file):
+    """
+    One-time conversion of a legacy {"custody_chain": [...]} JSON log into a
+    hash-chained JSON Lines log. Entry order is kept; the file hashes of
+    historical entries are unknown and recorded as null.
+    """
+    if os.path.exists(log_file) and os.path.getsize(log_file) > 0:
+        raise FileExistsError(f"Refusing to migrate into non-empty custody log: {log_file}")
+
+    with open(legacy_file, 'r', encoding='utf-8') as f:
+        legacy_entries = json.load(f).get('custody_chain', [])
+
+    directory = os.path.dirname(log_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_file = f"{log_file}.tmp"
+    previous = GENESIS_HASH
+    with open(temp_file, 'wb') as f:
+        for legacy_entry in legacy_entries:
+            entry = dict(legacy_entry)
+            entry.setdefault('processed_file_sha256', None)
+            entry['migrated_from'] = os.path.basename(legacy_file)
+            entry['previous_entry_sha256'] = previous
+            line = serialize_entry(entry)
+            f.write(line + b'\n')
+            previous = entry_sha256(line)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_file, log_file)
+    return len(legacy_entries)
+
+
+VERIFY_HELP = 'Check every hash link of a JSON Lines custody log'
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Verify or migrate the chain of custody log')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    verify = subparsers.add_parser('verify', help=VERIFY_HELP)
+    verify.add_argument('log_file')
+
+    migrate = subparsers.add_parser('migrate', help='Convert a legacy JSON custody log to JSON Lines')
+    migrate.add_argument('legacy_file')
+    migrate.add_argument('log_file')
+    return parser.parse_args()
+
+
+def verify(log_file):
+    """Prints the verdict on a custody log; returns the exit code."""
+    if not os.path.exists(log_file):
+        print(f"Error: File not found: {log_file}")
+        return 1
+    result = verify_custody_log(log_file)
+    if result['valid']:
+        print(f"Custody log intact: {result['entries']} entries, head {result['head_sha256']}")
+        return 0
+    print(f"Custody log BROKEN at line {result['line']}: {result['error']}")
+    return 1
+
+
+def verify_main():
+    """The verify subcommand on its own, for `mariupol verify-custody LOG`."""
+    parser = argparse.ArgumentParser(description=VERIFY_HELP)
+    parser.add_argument('log_file')
+    return verify(parser.parse_args().log_file)
+
+
+def main():
+    args = parse_arguments()
+    if args.command == 'verify':
+        return verify(args.log_file)
+
+    if not os.path.exists(args.legacy_file):
+        print(f"Error: File not found: {args.legacy_file}")
+        return 1
+    count = migrate_legacy_custody_log(args.legacy_file, args.log_file)
+    print(f"Migrated {count} entries from {args.legacy_file} to {args.log_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+# src/enrichment_state.py
+# Last Updated: October 16, 2026
+# Persistent store of per-message enrichment results for incremental runs.
+
+import hashlib
+import os
+import sqlite3
+
+ENRICHMENT_COLUMNS = ['toponymic_intelligence', 'is_flagged', 'threat_type', 'erasure_type']
+
+
+def text_sha256(text, date=None):
+    """
+    Hash of a message's lemmatized text and the date it is correlated as of.
+    Missing text hashes like an empty message, since both enrich to the
+    empty result.
+    """
+    digest = hashlib.sha256((text if isinstance(text, str) else '').encode('utf-8'))
+    if isinstance(date, str):
+        digest.update(b'\0' + date.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class EnrichmentStateStore:
+    """
+    SQLite store mapping message_id to the enrichment result of a specific
+    text hash under a specific enrichment version (toponymic database and
+    address extractor). A stored result is reused only when both still
+    match; otherwise the message is re-analyzed and its entry replaced.
+    """
+
+    QUERY_BATCH = 500
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS enrichment ('
+            ' message_id TEXT PRIMARY KEY,'
+            ' text_sha256 TEXT NOT NULL,'
+            ' database_version TEXT NOT NULL,'
+            ' toponymic_intelligence TEXT NOT NULL,'
+            ' is_flagged INTEGER NOT NULL,'
+            ' threat_type TEXT,'
+            ' erasure_type TEXT)'
+        )
+        self.connection.commit()
+
+    def fetch(self, database_version, keys):
+        """
+        Looks up (message_id, text_sha256) pairs. Returns a dict from each
+        pair with a current entry to its (intelligence, is_flagged,
+        threat_type, erasure_type) tuple.
+        """
+        wanted = dict(keys)
+        message_ids = list(wanted)
+        found = {}
+        for start in range(0, len(message_ids), self.QUERY_BATCH):
+            batch = message_ids[start:start + self.QUERY_BATCH]
+            placeholders = ','.join('?' * len(batch))
+            rows = self.connection.execute(
+                'SELECT message_id, text_sha256, toponymic_intelligence, is_flagged, threat_type, erasure_type'
+                f' FROM enrichment WHERE database_version = ? AND message_id IN ({placeholders})',
+                [database_version] + batch
+            )
+            for message_id, digest, intelligence, is_flagged, threat_type, erasure_type in rows:
+                if wanted.get(message_id) == digest:
+                    found[(message_id, digest)] = (intelligence, bool(is_flagged), threat_type, erasure_type)
+        return found
+
+    def store(self, database_version, records):
+        """
+        Upserts (message_id, text_sha256, intelligence, is_flagged,
+        threat_type, erasure_type) records in one transaction.
+        """
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO enrichment VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (message_id, digest, database_version, intelligence, int(bool(is_flagged)), threat_type, erasure_type)
+                    for message_id, digest, intelligence, is_flagged, threat_type, erasure_type in records
+                ]
+            )
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
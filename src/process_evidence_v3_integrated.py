@@ -10,54 +10,244 @@
 #
 
 import pandas as pd
+import io
 import json
 import os
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 # UPDATED: Import the entire module to avoid import errors.
 import toponymic_db_fw
+import enrichment_state
+import custody_log
 
-def process_evidence_file(input_csv, output_csv):
+def read_evidence_csv(input_csv, chunksize=None):
+    """
+    Reads the scrape with every column kept as text, so values are written
+    back verbatim and each chunk of a streamed read is parsed the same way
+    as the whole file.
+    """
+    return pd.read_csv(input_csv, dtype=str, chunksize=chunksize)
+
+def _init_enrichment_worker(database_file):
+    """
+    Process pool initializer: loads the parent's toponymic database once per
+    worker. Workers that did not fork from the parent map its compiled
+    snapshot instead of rebuilding the index.
+    """
+    if database_file != toponymic_db_fw.TOPONYMIC_DATABASE_FILE:
+        toponymic_db_fw.load_toponymic_database(database_file)
+    toponymic_db_fw.get_toponymic_index()
+
+def _enrich_shard(shard):
+    texts, dates = shard
+    return toponymic_db_fw.extract_addresses_batch(texts, dates)
+
+def _message_dates(df):
+    """
+    The message dates each row is correlated as of, or None for a scrape
+    without a date column.
+    """
+    return df['date'] if 'date' in df.columns else None
+
+def _analyze_texts(texts, dates=None, executor=None, workers=1):
+    if executor is None or workers <= 1 or len(texts) <= 1:
+        # UPDATED: Analyze the whole 'lemmatized_text' column in one batch pass.
+        return toponymic_db_fw.extract_addresses_batch(texts, dates)
+
+    # A few shards per worker keeps the pool busy when shards run unevenly.
+    shard_count = min(len(texts), workers * 4)
+    bounds = [len(texts) * i // shard_count for i in range(shard_count + 1)]
+    shards = [(texts.iloc[start:stop], None if dates is None else dates.iloc[start:stop])
+              for start, stop in zip(bounds, bounds[1:])]
+    return pd.concat(list(executor.map(_enrich_shard, shards)))
+
+def enrich_evidence_frame(df, executor=None, workers=1, state_store=None):
+    """
+    Adds the toponymic intelligence columns to a frame of scraped messages.
+    With an executor, the rows are split into contiguous shards that are
+    analyzed in parallel and merged back in the original message order.
+
+    Each message is correlated against the renamings in effect on its date
+    column, when the scrape has one.
+
+    With a state store, only messages whose text, date or enrichment version
+    (database or address extractor) changed since the stored result are
+    re-analyzed; the rest are merged from the store. Returns the frame and the number of re-analyzed rows.
+    """
+    texts = df['lemmatized_text']
+    dates = _message_dates(df)
+    if state_store is None:
+        enriched = _analyze_texts(texts, dates, executor, workers)
+        for column in enriched.columns:
+            df[column] = enriched[column]
+        return df, len(df)
+
+    version = toponymic_db_fw.enrichment_version()
+    message_ids = df['message_id'].tolist()
+    digests = [enrichment_state.text_sha256(text, date)
+               for text, date in zip(texts, dates if dates is not None else [None] * len(texts))]
+    cached = state_store.fetch(version, [
+        (message_id, digest) for message_id, digest in zip(message_ids, digests)
+        if isinstance(message_id, str)
+    ])
+
+    rows = [cached.get((message_id, digest)) for message_id, digest in zip(message_ids, digests)]
+    stale = [position for position, row in enumerate(rows) if row is None]
+    if stale:
+        fresh = _analyze_texts(texts.iloc[stale], None if dates is None else dates.iloc[stale], executor, workers)
+        fresh_rows = list(zip(*(fresh[column] for column in enrichment_state.ENRICHMENT_COLUMNS)))
+        for position, row in zip(stale, fresh_rows):
+            rows[position] = row
+        state_store.store(version, [
+            (message_ids[position], digests[position]) + tuple(row)
+            for position, row in zip(stale, fresh_rows)
+            if isinstance(message_ids[position], str)
+        ])
+
+    for column, values in zip(enrichment_state.ENRICHMENT_COLUMNS, zip(*rows) if rows else [[]] * 4):
+        df[column] = list(values)
+    df['is_flagged'] = df['is_flagged'].astype(bool)
+    return df, len(stale)
+
+def process_evidence_file(input_csv, output_csv, chunksize=None, workers=1, state_file=None, fingerprints=None):
     """
     Reads a raw CSV of scraped data, applies toponymic analysis,
     and writes an enriched CSV file.
+
+    With chunksize set, the input is streamed: each chunk is enriched and
+    appended to the output before the next one is read, so memory stays
+    bounded and completed chunks survive a crash. The output is byte-identical
+    to the in-memory path. Returns the enriched DataFrame, or None when
+    streaming.
+
+    With workers > 1, enrichment is sharded across a process pool; each
+    worker builds the toponymic index once at startup and results keep the
+    input order, so the output does not depend on the worker count.
+
+    With state_file set, the run is incremental: results are kept in a
+    persistent store keyed on message_id, text hash and enrichment version,
+    and only new or changed messages are re-analyzed.
+
+    If a fingerprints dict is passed, it receives the SHA-256 and size of the
+    input and output files, computed from the bytes as they are parsed and
+    written rather than by reading either file again.
     """
+    state_store = enrichment_state.EnrichmentStateStore(state_file) if state_file else None
+    try:
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_enrichment_worker,
+                                     initargs=(toponymic_db_fw.TOPONYMIC_DATABASE_FILE,)) as executor:
+                return _process_evidence_file(input_csv, output_csv, chunksize, executor, workers, state_store, fingerprints)
+        return _process_evidence_file(input_csv, output_csv, chunksize, None, 1, state_store, fingerprints)
+    finally:
+        if state_store is not None:
+            state_store.close()
+
+def _open_hashed_output(output_csv):
+    raw = custody_log.HashingFile(output_csv, 'wb')
+    writer = io.BufferedWriter(raw, custody_log.HASH_BUFFER_SIZE)
+    return raw, io.TextIOWrapper(writer, encoding='utf-8-sig', newline='')
+
+def _process_evidence_file(input_csv, output_csv, chunksize, executor, workers, state_store, fingerprints):
     print(f"Processing {input_csv}...")
-    df = pd.read_csv(input_csv)
-
-    # UPDATED: Use the more comprehensive extraction function.
-    def analyze_row(row_text):
-        """Helper function to analyze text from a row."""
-        if not isinstance(row_text, str):
-            return {
-                'verified_correlations': [],
-                'ownership_claim_threats': [],
-                'cultural_erasure_evidence': []
-            }
-        # Call the function from the imported module
-        return toponymic_db_fw.extract_addresses_with_verified_toponymy(row_text)
-
-    # Apply the intelligence function to the 'lemmatized_text' column
-    intelligence_results = df['lemmatized_text'].apply(analyze_row)
-
-    # Expand the results into new columns
-    df['toponymic_intelligence'] = intelligence_results.apply(lambda x: json.dumps(x, ensure_ascii=False))
-    df['is_flagged'] = intelligence_results.apply(lambda x: bool(x.get('ownership_claim_threats') or x.get('cultural_erasure_evidence')))
-    df['threat_type'] = intelligence_results.apply(lambda x: x.get('ownership_claim_threats')[0]['manipulation_tactic'] if x.get('ownership_claim_threats') else None)
-    df['erasure_type'] = intelligence_results.apply(lambda x: x.get('cultural_erasure_evidence')[0]['cultural_significance'] if x.get('cultural_erasure_evidence') else None)
-
-    # Ensure the output directory exists
-    os.makedirs(os.path.dirname(output_csv), exist_ok=True)
-    df.to_csv(output_csv, index=False, encoding='utf-8-sig')
-    print(f"Enriched data saved to {output_csv}")
-    print(f"Flagged {df['is_flagged'].sum()} records for high-level review.")
+    # Ensure the output directory exists (none to create for a bare filename)
+    output_dir = os.path.dirname(output_csv)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    # Both files go through hashing handles so their digests fall out of
+    # the single read and write pass.
+    source_raw = custody_log.HashingFile(input_csv, 'rb')
+    sink_raw, output = _open_hashed_output(output_csv)
+    with io.BufferedReader(source_raw, custody_log.HASH_BUFFER_SIZE) as source, output:
+        if chunksize:
+            df = None
+            total_rows = 0
+            total_flagged = 0
+            total_analyzed = 0
+            for chunk_number, chunk in enumerate(read_evidence_csv(source, chunksize=chunksize)):
+                chunk, analyzed = enrich_evidence_frame(chunk, executor, workers, state_store)
+                chunk.to_csv(output, index=False, header=(chunk_number == 0))
+                output.flush()
+                total_rows += len(chunk)
+                total_flagged += int(chunk['is_flagged'].sum())
+                total_analyzed += analyzed
+        else:
+            df, total_analyzed = enrich_evidence_frame(read_evidence_csv(source), executor, workers, state_store)
+            df.to_csv(output, index=False)
+            total_rows = len(df)
+            total_flagged = int(df['is_flagged'].sum())
+        input_sha256 = source_raw.finish_reading()
+
+    if fingerprints is not None:
+        fingerprints.update({
+            'input_sha256': input_sha256,
+            'input_bytes': source_raw.size,
+            'output_sha256': sink_raw.hexdigest(),
+            'output_bytes': sink_raw.size,
+        })
+
+    if chunksize:
+        print(f"Enriched data saved to {output_csv} ({total_rows} records, streamed in chunks of {chunksize})")
+    else:
+        print(f"Enriched data saved to {output_csv}")
+    if state_store is not None:
+        print(f"Re-analyzed {total_analyzed} new or changed records; reused {total_rows - total_analyzed} from {state_store.path}")
+    print(f"Flagged {total_flagged} records for high-level review.")
     return df
 
-def update_chain_of_custody(log_file, processed_file):
+def update_chain_of_custody(log_file, processed_file, input_file=None, fingerprints=None):
     """
     Appends a new entry to the chain of custody log.
+
+    The entry records the input and output files with their SHA-256 digests
+    (the output digest also as processed_file_sha256) and the content hash of the toponymic database the output was enriched
+    with.
+    Digests already collected by process_evidence_file can be passed in as
+    fingerprints; any that are missing are computed with a streaming read.
+
+    A .jsonl log uses the append-only, hash-chained backend in custody_log;
+    any other path keeps the legacy single-document JSON format.
     """
-    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    fingerprints = dict(fingerprints or {})
+    if input_file and 'input_sha256' not in fingerprints:
+        fingerprints['input_sha256'] = custody_log.file_sha256(input_file)
+    if 'output_sha256' not in fingerprints:
+        fingerprints['output_sha256'] = custody_log.file_sha256(processed_file)
+
+    new_entry = {
+        "timestamp_utc": datetime.utcnow().isoformat(),
+        "event": "DATA_ENRICHMENT",
+        "script": "src/process_evidence_v3_integrated.py",
+        "input_file": os.path.basename(input_file or processed_file),
+        "input_sha256": fingerprints.get('input_sha256'),
+        "output_file": os.path.basename(processed_file),
+        "output_sha256": fingerprints['output_sha256'],
+        # Same digest under the field earlier entries (and migrated ones) carry,
+        # so every entry in the log has one schema
+        "processed_file_sha256": fingerprints['output_sha256'],
+        "toponymic_database_version": toponymic_db_fw.toponymic_database_version(),
+        "details": "Applied Toponymic Intelligence Correlation."
+    }
+    for key in ('input_bytes', 'output_bytes'):
+        if key in fingerprints:
+            new_entry[key] = fingerprints[key]
+
+    if log_file.endswith('.jsonl'):
+        legacy_file = log_file[:-len('.jsonl')] + '.json'
+        if os.path.exists(legacy_file) and not os.path.exists(log_file):
+            count = custody_log.migrate_legacy_custody_log(legacy_file, log_file)
+            print(f"Migrated {count} legacy custody entries from {legacy_file}")
+        custody_log.append_custody_entry(log_file, new_entry)
+        print(f"Updated chain of custody log: {log_file}")
+        return
+
+    log_dir = os.path.dirname(log_file)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
     log_data = {"custody_chain": []}
     if os.path.exists(log_file):
         with open(log_file, 'r', encoding='utf-8') as f:
@@ -66,33 +256,57 @@ def update_chain_of_custody(log_file, processed_file):
             except json.JSONDecodeError:
                 print(f"Warning: Custody log {log_file} is empty or corrupted. Starting a new log.")
 
-    with open(log_file, 'w', encoding='utf-8') as f:
-        new_entry = {
-            "timestamp_utc": datetime.utcnow().isoformat(),
-            "event": "DATA_ENRICHMENT",
-            "script": "src/process_evidence_v3_integrated.py",
-            "input_file": os.path.basename(processed_file),
-            "output_file": os.path.basename(processed_file),
-            "details": "Applied Toponymic Intelligence Correlation."
-        }
-        if "custody_chain" not in log_data:
-            log_data["custody_chain"] = []
-        log_data["custody_chain"].append(new_entry)
+    if "custody_chain" not in log_data:
+        log_data["custody_chain"] = []
+    log_data["custody_chain"].append(new_entry)
+
+    # Serialize to a temporary file first so a crash never truncates the log.
+    temp_file = f"{log_file}.tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
         json.dump(log_data, f, indent=4, ensure_ascii=False)
+    os.replace(temp_file, log_file)
 
     print(f"Updated chain of custody log: {log_file}")
 
 
-# CORRECTED CODE
-if __name__ == "__main__":
-    # File paths are now relative to the project root, where the script is run from.
-    INPUT_FILE = 'data/telegram_scrape_results_lemmatized.csv'
-    OUTPUT_FILE = 'output/Mariupol_Evidence_Locker_Processed_v3.csv'
-    CUSTODY_LOG = 'output/evidence_custody_log.json'
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Apply toponymic intelligence to scraped Telegram data')
+    parser.add_argument('--input', default='data/telegram_scrape_results_lemmatized.csv',
+                        help='Lemmatized scrape CSV')
+    parser.add_argument('--output', default='output/Mariupol_Evidence_Locker_Processed_v3.csv',
+                        help='Enriched output CSV')
+    parser.add_argument('--custody-log', default='output/evidence_custody_log.jsonl',
+                        help='Chain of custody log (.jsonl: append-only hash chain; .json: legacy format)')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='Stream the input in chunks of this many rows (bounded memory)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of worker processes for toponymic enrichment')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only re-analyze new or changed messages, reusing stored results')
+    parser.add_argument('--toponymic-database', default=None,
+                        help='Toponymic database file (.json or .csv; default: data/toponymic_database.json)')
+    parser.add_argument('--state-store', default='output/enrichment_state.sqlite',
+                        help='Persistent enrichment state used by --incremental')
+    return parser.parse_args()
+
 
-    if not os.path.exists(INPUT_FILE):
-        print(f"Error: Input file not found at {INPUT_FILE}")
+def main():
+    # File paths are relative to the project root, where the script is run from.
+    args = parse_arguments()
+
+    if not os.path.exists(args.input):
+        print(f"Error: Input file not found at {args.input}")
         print("Please ensure the data files are in the 'data/' directory.")
-    else:
-        processed_df = process_evidence_file(INPUT_FILE, OUTPUT_FILE)
-        update_chain_of_custody(CUSTODY_LOG, OUTPUT_FILE)
\ No newline at end of file
+        return 1
+    if args.toponymic_database:
+        toponymic_db_fw.load_toponymic_database(args.toponymic_database)
+    fingerprints = {}
+    process_evidence_file(args.input, args.output, chunksize=args.chunksize, workers=args.workers,
+                          state_file=args.state_store if args.incremental else None,
+                          fingerprints=fingerprints)
+    update_chain_of_custody(args.custody_log, args.output, input_file=args.input, fingerprints=fingerprints)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,100 +2,221 @@
 # Last Updated: June 24, 2025
 # This version contains all necessary functions for the processing script.
 
-import re
+import json
 import asyncio
 
+import pandas as pd
+
+import toponymic_store
+from address_tokenizer import STREET_TYPE_PREFILTER, scan_addresses
+from toponymic_index import ToponymicIndex, normalize_date
+
 # --- Database Section ---
-MARIUPOL_COMPREHENSIVE_TOPONYMIC_DATABASE = {
-    'CENTRAL_DISTRICT_VERIFIED': {
-        'площадь_свободы': {
-            'ukrainian_name': 'Площа Свободи', 'ukrainian_transliteration': 'Freedom Square',
-            'occupation_name': 'площадь Ленина', 'occupation_transliteration': 'Lenin Square',
-            'renaming_date': '2023-08', 'renaming_authority': 'Denis Pushilin (DPR Head)',
-            'cultural_significance': 'DEMOCRATIC_VALUES_ERASURE', 'strategic_importance': 'CRITICAL_SYMBOLIC_CENTER'
-        },
-        'проспект_нахимова_82': {
-            'ukrainian_name': 'проспект Нахімова, 82', 'demolition_status': 'BUILDING_DEMOLISHED_2022',
-            'new_construction_address': 'Черноморский переулок 1б', 'address_manipulation_tactic': 'OWNERSHIP_CLAIM_PREVENTION',
-            'legal_impact': 'COMPENSATION_DENIAL_MECHANISM', 'war_crimes_evidence': 'SYSTEMATIC_PROPERTY_APPROPRIATION'
-        }
-    },
-    'INDUSTRIAL_DISTRICT_VERIFIED': {
-        'азовстальська_вулиця': {
-            'ukrainian_name': 'Азовсталь вулиця', 'ukrainian_transliteration': 'Azovstalska Street',
-            'occupation_name': 'улица Тульская', 'occupation_transliteration': 'Tula Street',
-            'renaming_date': '2023-08', 'renaming_authority': 'Denis Pushilin (DPR Head)',
-            'cultural_significance': 'RESISTANCE_SYMBOL_ERASURE', 'strategic_importance': 'INDUSTRIAL_HERITAGE_ELIMINATION'
-        }
-    }
-}
+# The database itself lives in data/toponymic_database.json; see
+# toponymic_store for the file format and the compiled snapshots.
+TOPONYMIC_DATABASE_FILE = toponymic_store.DEFAULT_DATABASE_FILE
+
+_TOPONYMIC_INDEX = toponymic_store.load_index(TOPONYMIC_DATABASE_FILE)
+MARIUPOL_COMPREHENSIVE_TOPONYMIC_DATABASE = _TOPONYMIC_INDEX.source
 
 # --- Function Definitions ---
 
-def find_verified_toponymic_correlation(street_name, house_number=None):
+def load_toponymic_database(path=None):
+    """
+    Switches to the database in another file (.json or .csv), loading its
+    compiled snapshot when it has one. Raises
+    toponymic_store.ToponymicDatabaseError if the file fails validation.
+    """
+    global TOPONYMIC_DATABASE_FILE, MARIUPOL_COMPREHENSIVE_TOPONYMIC_DATABASE, _TOPONYMIC_INDEX
+    path = path or TOPONYMIC_DATABASE_FILE
+    _TOPONYMIC_INDEX = toponymic_store.load_index(path)
+    TOPONYMIC_DATABASE_FILE = path
+    MARIUPOL_COMPREHENSIVE_TOPONYMIC_DATABASE = _TOPONYMIC_INDEX.source
+    return MARIUPOL_COMPREHENSIVE_TOPONYMIC_DATABASE
+
+def get_toponymic_index():
+    """
+    Returns the compiled lookup index for the comprehensive database.
+    The index comes from the database file's snapshot at import and is
+    rebuilt only when the database object is replaced or
+    invalidate_toponymic_index() is called after an edit.
+    """
+    global _TOPONYMIC_INDEX
+    if _TOPONYMIC_INDEX is None or _TOPONYMIC_INDEX.source is not MARIUPOL_COMPREHENSIVE_TOPONYMIC_DATABASE:
+        _TOPONYMIC_INDEX = ToponymicIndex(MARIUPOL_COMPREHENSIVE_TOPONYMIC_DATABASE)
+    return _TOPONYMIC_INDEX
+
+def invalidate_toponymic_index():
+    """
+    Discards the compiled index. Call after editing the database in place.
+    """
+    global _TOPONYMIC_INDEX
+    _TOPONYMIC_INDEX = None
+
+def toponymic_database_version():
+    """
+    Content hash of the database the current index was built from.
+    """
+    return get_toponymic_index().version
+
+def find_verified_toponymic_correlation(street_name, house_number=None, as_of=None):
     """
     Finds correlations using verified intelligence from the comprehensive database.
+    With as_of (a date), an occupation name only correlates once its street
+    had been renamed by that date.
     """
-    street_name_normalized = street_name.lower().strip()
+    return get_toponymic_index().lookup(street_name, as_of)
 
-    for district_data in MARIUPOL_COMPREHENSIVE_TOPONYMIC_DATABASE.values():
-        for street_key, street_data in district_data.items():
-            search_terms = [
-                street_data.get('occupation_name', '').lower(),
-                street_data.get('new_construction_address', '').lower(),
-                street_data.get('ukrainian_name').lower()
-            ]
-            search_terms = [term for term in search_terms if term]
+def find_ukrainian_name(street_name):
+    """
+    Ukrainian name of the street known by this exact occupation (or other) name.
+    """
+    return get_toponymic_index().to_ukrainian(street_name)
 
-            for term in search_terms:
-                if street_name_normalized in term or term in street_name_normalized:
-                    return street_data
-    return None
+def find_occupation_name(street_name, as_of=None):
+    """
+    Occupation name of the street known by this exact Ukrainian (or other)
+    name; with as_of, only if it had been renamed by that date.
+    """
+    return get_toponymic_index().to_occupation(street_name, as_of)
 
-def extract_addresses_with_verified_toponymy(text):
+def find_name_on(street_name, as_of):
     """
-    Enhanced address extraction using documented systematic renaming intelligence.
-    This is the function that was missing from your file.
+    The name the street known by street_name officially carried on a date.
     """
-    extracted_addresses = {
+    return get_toponymic_index().name_on(street_name, as_of)
+
+# Bump when address extraction changes what a message enriches to, so
+# incremental runs re-analyze results stored by the previous extractor.
+ADDRESS_EXTRACTOR_VERSION = 2
+
+def enrichment_version():
+    """
+    Version of everything an enrichment result depends on besides the
+    message: the database content hash and the address extractor.
+    """
+    return f"{toponymic_database_version()}/extractor-{ADDRESS_EXTRACTOR_VERSION}"
+
+def _empty_intelligence():
+    return {
         'verified_correlations': [],
         'ownership_claim_threats': [],
         'cultural_erasure_evidence': []
     }
-    comprehensive_patterns = [
-        r'(?:ул\.|улица|пр\.|проспект|пл\.|площадь|пер\.|переулок)\s*([А-Яа-я\s\-]+)\s*,?\s*(\d+[А-Яа-я]*)',
-        r'([А-Яа-я]+ский\s+переулок)\s+(\d+[а-я])',
-    ]
-
-    for pattern in comprehensive_patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        for match in matches:
-            street_name, house_number = match[0].strip(), match[1].strip()
-            full_address_text = f"{street_name}, {house_number}"
-            correlation = find_verified_toponymic_correlation(street_name, house_number)
-
-            if correlation:
-                if correlation.get('address_manipulation_tactic'):
-                    extracted_addresses['ownership_claim_threats'].append({
-                        'current_address': full_address_text,
-                        'original_ukrainian_address': correlation.get('ukrainian_name'),
-                        'manipulation_tactic': correlation.get('address_manipulation_tactic'),
-                        'legal_impact': correlation.get('legal_impact'),
-                        'evidence_type': 'VERIFIED_ADDRESS_MANIPULATION'
-                    })
-                elif correlation.get('cultural_significance'):
-                    extracted_addresses['cultural_erasure_evidence'].append({
-                        'current_name': street_name,
-                        'ukrainian_name': correlation.get('ukrainian_name'),
-                        'cultural_significance': correlation.get('cultural_significance'),
-                        'renaming_authority': correlation.get('renaming_authority'),
-                        'evidence_type': 'SYSTEMATIC_CULTURAL_ERASURE'
-                    })
-                extracted_addresses['verified_correlations'].append({
-                    'occupation_address': full_address_text,
-                    'ukrainian_correlation': correlation.get('ukrainian_name'),
-                    'verification_status': 'DOCUMENTED_INTELLIGENCE',
-                    'strategic_importance': correlation.get('strategic_importance')
-                })
-
-    return extracted_addresses
\ No newline at end of file
+
+def _correlate_address(street_name, house_number, as_of=None):
+    """
+    Returns the (ownership threat, cultural erasure, verified correlation)
+    entries for one extracted address, as of the message date when known;
+    entries that do not apply are None. A street mentioned without a house
+    number is correlated on its name alone.
+    """
+    full_address_text = f"{street_name}, {house_number}" if house_number else street_name
+    correlation = find_verified_toponymic_correlation(street_name, house_number, as_of)
+    if not correlation:
+        return None, None, None
+
+    threat = erasure = None
+    if correlation.get('address_manipulation_tactic'):
+        threat = {
+            'current_address': full_address_text,
+            'original_ukrainian_address': correlation.get('ukrainian_name'),
+            'manipulation_tactic': correlation.get('address_manipulation_tactic'),
+            'legal_impact': correlation.get('legal_impact'),
+            'evidence_type': 'VERIFIED_ADDRESS_MANIPULATION'
+        }
+    elif correlation.get('cultural_significance'):
+        erasure = {
+            'current_name': street_name,
+            'ukrainian_name': correlation.get('ukrainian_name'),
+            'cultural_significance': correlation.get('cultural_significance'),
+            'renaming_authority': correlation.get('renaming_authority'),
+            'evidence_type': 'SYSTEMATIC_CULTURAL_ERASURE'
+        }
+    verified = {
+        'occupation_address': full_address_text,
+        'ukrainian_correlation': correlation.get('ukrainian_name'),
+        'verification_status': 'DOCUMENTED_INTELLIGENCE',
+        'strategic_importance': correlation.get('strategic_importance')
+    }
+    return threat, erasure, verified
+
+def _collect_intelligence(entries):
+    extracted_addresses = _empty_intelligence()
+    for threat, erasure, verified in entries:
+        if threat:
+            extracted_addresses['ownership_claim_threats'].append(threat)
+        if erasure:
+            extracted_addresses['cultural_erasure_evidence'].append(erasure)
+        if verified:
+            extracted_addresses['verified_correlations'].append(verified)
+    return extracted_addresses
+
+def extract_addresses_with_verified_toponymy(text, as_of=None):
+    """
+    Enhanced address extraction using documented systematic renaming intelligence.
+    This is the function that was missing from your file.
+    Pass the message date as as_of to correlate against the renamings in
+    effect on that date.
+    """
+    if not STREET_TYPE_PREFILTER.search(text.lower()):
+        return _empty_intelligence()
+    as_of = normalize_date(as_of)
+    entries = [_correlate_address(candidate.street, candidate.house_number, as_of)
+               for candidate in scan_addresses(text)]
+    return _collect_intelligence(entries)
+
+def extract_addresses_batch(texts, dates=None):
+    """
+    Batch counterpart of extract_addresses_with_verified_toponymy for a whole
+    column of messages (a Series or any list of texts). dates, if given, is
+    the aligned column of message dates used as each message's as_of.
+
+    Messages without a street type word are skipped with one vectorized
+    prefilter, the rest are scanned by the address tokenizer, each distinct
+    (street, house, date) triple is correlated once, and all derived
+    columns are built in a single pass. Returns a DataFrame aligned to the
+    input index with the toponymic_intelligence, is_flagged, threat_type and
+    erasure_type columns; non-string entries get the empty result.
+    """
+    series = texts if isinstance(texts, pd.Series) else pd.Series(list(texts), dtype=object)
+    original_index = series.index
+    is_text = series.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+    text = series.where(is_text).astype(object).reset_index(drop=True)
+    as_of = [normalize_date(value) for value in dates] if dates is not None else [None] * len(text)
+
+    # Only messages with a street type word can hold an address at all.
+    candidates = text[is_text]
+    if not candidates.empty:
+        candidates = candidates[candidates.str.lower().str.contains(STREET_TYPE_PREFILTER)]
+
+    empty_json = json.dumps(_empty_intelligence(), ensure_ascii=False)
+    intelligence = [empty_json] * len(text)
+    is_flagged = [False] * len(text)
+    threat_type = [None] * len(text)
+    erasure_type = [None] * len(text)
+
+    correlated = {}
+    row_entries = {}
+    for row, message in candidates.items():
+        for candidate in scan_addresses(message):
+            key = (candidate.street, candidate.house_number, as_of[row])
+            if key not in correlated:
+                correlated[key] = _correlate_address(*key)
+            row_entries.setdefault(row, []).append(correlated[key])
+
+    for row, entries in row_entries.items():
+        result = _collect_intelligence(entries)
+        threats = result['ownership_claim_threats']
+        erasures = result['cultural_erasure_evidence']
+        intelligence[row] = json.dumps(result, ensure_ascii=False)
+        is_flagged[row] = bool(threats or erasures)
+        threat_type[row] = threats[0]['manipulation_tactic'] if threats else None
+        erasure_type[row] = erasures[0]['cultural_significance'] if erasures else None
+
+    return pd.DataFrame({
+        'toponymic_intelligence': intelligence,
+        'is_flagged': is_flagged,
+        'threat_type': threat_type,
+        'erasure_type': erasure_type,
+    }, index=original_index).astype({'is_flagged': bool})
@@ -0,0 +1,361 @@
+# src/toponymic_index.py
+# Last Updated: October 16, 2026
+# Compiled lookup structures for the toponymic intelligence database.
+
+import hashlib
+import json
+import re
+from bisect import bisect_right
+
+# Bump when the compiled structures change, so stale pickled snapshots of an
+# older layout are rebuilt instead of loaded (see toponymic_store).
+INDEX_FORMAT = 2
+
+# Start of a name that has been valid at every date; sorts before any date.
+ALWAYS = ''
+_DATE = re.compile(r'^\s*(\d{4})-(\d{2})(?:-(\d{2}))?')
+
+# --- Index Section ---
+
+def database_version(database):
+    """
+    Content hash of a toponymic database, stable across processes and runs.
+    """
+    canonical = json.dumps(database, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def normalize_date(value):
+    """
+    YYYY-MM-DD form of a database renaming date or a message timestamp, so
+    dates compare as strings. Month-precision dates ('2023-08') map to the
+    first of the month; anything unparsable (missing, NaN) gives None.
+    """
+    if not isinstance(value, str):
+        return None
+    match = _DATE.match(value)
+    if not match:
+        return None
+    year, month, day = match.groups()
+    return f"{year}-{month}-{day or '01'}"
+
+
+def _staircase(steps):
+    """
+    Compresses (start, rank) pairs into the best rank available from each
+    start onward: starts ascend and ranks strictly descend, so the best
+    rank on a date is the last step starting on or before it.
+    """
+    starts, ranks = [], []
+    for start, rank in sorted(steps):
+        if not ranks or rank < ranks[-1]:
+            starts.append(start)
+            ranks.append(rank)
+    return starts, ranks
+
+
+class ToponymicIndex:
+    """
+    Build-once index over the occupation, Ukrainian and new-construction names
+    of a toponymic database.
+
+    A lookup reproduces the first-match semantics of the original linear scan:
+    the first street (in database order) having a search term that either
+    contains the queried name or is contained in it. Both directions are
+    answered in time proportional to the length of the query:
+
+    * an Aho-Corasick automaton over the terms finds terms inside the query;
+    * a generalized suffix automaton over the terms finds terms containing
+      the query.
+
+    Lookups can also be made as of a date. An occupation name only counts
+    from its street's renaming_date, while Ukrainian names and undated
+    renamings count at every date. Each automaton state keeps, besides its
+    best rank overall, a sorted staircase of (start date, best rank) steps
+    when dated terms change its answer over time. An as-of lookup bisects
+    it, so lookups stay logarithmic in the length of the rename history.
+
+    Exact names also resolve in both directions (Ukrainian to occupation and
+    back), and name_on() answers which name a street officially carried on
+    a given date from the street's sorted timeline of names.
+    """
+
+    MEMO_LIMIT = 100000
+
+    def __init__(self, database):
+        self.source = database
+        self.version = database_version(database)
+        self.records = []
+        self.timelines = []
+        self._street_of = {}
+        terms = []
+        for district_data in database.values():
+            for street_data in district_data.values():
+                rank = len(self.records)
+                self.records.append(street_data)
+                renamed = normalize_date(street_data.get('renaming_date')) or ALWAYS
+                for field in ('occupation_name', 'new_construction_address', 'ukrainian_name'):
+                    term = (street_data.get(field) or '').lower()
+                    if term:
+                        terms.append((term, rank, ALWAYS if field == 'ukrainian_name' else renamed))
+                        self._street_of.setdefault(term.strip(), rank)
+                self.timelines.append(self._timeline(street_data, renamed))
+
+        self._build_aho_corasick(terms)
+        self._build_suffix_automaton(terms)
+        self._memo = {}
+
+    def __getstate__(self):
+        # The lookup memo is per-process warm-up state, not part of a snapshot.
+        state = dict(self.__dict__)
+        state['_memo'] = {}
+        return state
+
+    def lookup(self, street_name, as_of=None):
+        """
+        Returns the matching street record for a name, or None. With as_of
+        (a date string), occupation names of streets renamed later than
+        that date do not match.
+        """
+        normalized = street_name.lower().strip()
+        as_of = normalize_date(as_of)
+        key = normalized if as_of is None else (normalized, as_of)
+        if key in self._memo:
+            return self._memo[key]
+
+        rank = min(self._rank_containing(normalized, as_of), self._rank_contained(normalized, as_of))
+        result = self.records[rank] if rank < len(self.records) else None
+
+        if len(self._memo) >= self.MEMO_LIMIT:
+            self._memo.clear()
+        self._memo[key] = result
+        return result
+
+    # --- Exact names, both directions ---
+
+    @staticmethod
+    def _timeline(street_data, renamed):
+        """
+        Sorted (start, name) history of one street: its Ukrainian name, then
+        the occupation name (or new-construction address) from the renaming
+        date. A renaming without a date is taken to have always applied.
+        """
+        timeline = [(ALWAYS, street_data.get('ukrainian_name'))]
+        replacement = street_data.get('occupation_name') or street_data.get('new_construction_address')
+        if replacement:
+            timeline.append((renamed, replacement))
+        return [entry for entry in timeline if entry[1]]
+
+    def street(self, name):
+        """The street record carrying exactly this name (any case), or None."""
+        rank = self._street_of.get(name.lower().strip())
+        return None if rank is None else self.records[rank]
+
+    def name_on(self, name, as_of):
+        """
+        The name the street known by name officially carried on the date
+        as_of, or None for an unknown street or a date without a name.
+        """
+        rank = self._street_of.get(name.lower().strip())
+        as_of = normalize_date(as_of)
+        if rank is None or as_of is None:
+            return None
+        timeline = self.timelines[rank]
+        position = bisect_right([start for start, _ in timeline], as_of) - 1
+        return timeline[position][1] if position >= 0 else None
+
+    def to_ukrainian(self, name):
+        """Ukrainian name of the street known by an occupation (or any) name."""
+        record = self.street(name)
+        return record.get('ukrainian_name') if record else None
+
+    def to_occupation(self, name, as_of=None):
+        """
+        Occupation name of the street known by a Ukrainian (or any) name; with
+        as_of, None unless the renaming had happened by that date.
+        """
+        record = self.street(name)
+        if not record:
+            return None
+        replacement = record.get('occupation_name') or record.get('new_construction_address')
+        renamed = normalize_date(record.get('renaming_date')) or ALWAYS
+        as_of = normalize_date(as_of)
+        if replacement and (as_of is None or renamed <= as_of):
+            return replacement
+        return None
+
+    # --- Dated ranks ---
+
+    def _rank_on(self, staircases, ranks, state, as_of):
+        steps = staircases.get(state)
+        if steps is None:
+            return ranks[state]
+        starts, step_ranks = steps
+        position = bisect_right(starts, as_of) - 1
+        return step_ranks[position] if position >= 0 else len(self.records)
+
+    # --- Aho-Corasick: terms contained in the query ---
+
+    def _build_aho_corasick(self, terms):
+        no_match = len(self.records)
+        self._ac_goto = [{}]
+        self._ac_fail = [0]
+        self._ac_rank = [no_match]
+
+        # Staircases exist only for states whose answer depends on the date.
+        self._ac_since = {}
+        own_steps = {}
+        for term, rank, start in terms:
+            state = 0
+            for char in term:
+                nxt = self._ac_goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._ac_goto)
+                    self._ac_goto.append({})
+                    self._ac_fail.append(0)
+                    self._ac_rank.append(no_match)
+                    self._ac_goto[state][char] = nxt
+                state = nxt
+            self._ac_rank[state] = min(self._ac_rank[state], rank)
+            own_steps.setdefault(state, []).append((start, rank))
+
+        # Breadth-first pass to wire failure links and fold output ranks.
+        queue = list(self._ac_goto[0].values())
+        for state in queue:
+            self._fold_ac_steps(state, own_steps.get(state, []))
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for char, nxt in self._ac_goto[state].items():
+                fallback = self._ac_fail[state]
+                while fallback and char not in self._ac_goto[fallback]:
+                    fallback = self._ac_fail[fallback]
+                target = self._ac_goto[fallback].get(char, 0)
+                self._ac_fail[nxt] = target if target != nxt else 0
+                self._ac_rank[nxt] = min(self._ac_rank[nxt], self._ac_rank[self._ac_fail[nxt]])
+                if nxt in own_steps or self._ac_fail[nxt] in self._ac_since:
+                    self._fold_ac_steps(nxt, own_steps.get(nxt, []))
+                queue.append(nxt)
+
+    def _fold_ac_steps(self, state, own):
+        fail = self._ac_fail[state]
+        inherited = self._ac_since.get(fail)
+        if inherited is None and all(start == ALWAYS for start, _ in own):
+            return
+        steps = list(own)
+        if inherited is not None:
+            steps.extend(zip(*inherited))
+        elif self._ac_rank[fail] < len(self.records):
+            steps.append((ALWAYS, self._ac_rank[fail]))
+        starts, ranks = _staircase(steps)
+        if starts != [ALWAYS]:
+            self._ac_since[state] = (starts, ranks)
+
+    def _rank_contained(self, text, as_of=None):
+        best = len(self.records)
+        state = 0
+        goto, fail, ranks = self._ac_goto, self._ac_fail, self._ac_rank
+        dated = as_of is not None and self._ac_since
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            rank = self._rank_on(self._ac_since, ranks, state, as_of) if dated else ranks[state]
+            if rank < best:
+                best = rank
+        return best
+
+    # --- Generalized suffix automaton: terms containing the query ---
+
+    def _build_suffix_automaton(self, terms):
+        self._sa_next = [{}]
+        self._sa_link = [-1]
+        self._sa_len = [0]
+
+        prefix_states = []
+        for term, rank, start in terms:
+            last = 0
+            states = []
+            for char in term:
+                last = self._sa_extend(last, char)
+                states.append(last)
+            prefix_states.append((rank, start, states))
+
+        # Every substring of a term is a suffix of one of its prefixes, so
+        # marking each prefix state and its suffix-link ancestors covers it.
+        # Terms are visited in rank order, so a state whose earliest step
+        # starts no later than the term is already answered better at every
+        # date the term is valid, and so are all of its ancestors.
+        no_match = len(self.records)
+        link = self._sa_link
+        self._sa_rank = [no_match] * len(self._sa_next)
+        earliest = [None] * len(self._sa_next)
+        later_steps = {}
+        for rank, start, states in sorted(prefix_states, key=lambda item: item[0]):
+            for state in states:
+                while state != -1:
+                    first = earliest[state]
+                    if first is not None and first <= start:
+                        break
+                    if first is None:
+                        self._sa_rank[state] = rank
+                    else:
+                        later_steps.setdefault(state, [(first, self._sa_rank[state])]).append((start, rank))
+                    earliest[state] = start
+                    state = link[state]
+
+        # Steps were appended with descending starts and ascending ranks.
+        self._sa_since = {}
+        for state, first in enumerate(earliest):
+            if first and state not in later_steps:
+                self._sa_since[state] = ([first], [self._sa_rank[state]])
+        for state, steps in later_steps.items():
+            steps.reverse()
+            self._sa_since[state] = ([start for start, _ in steps], [rank for _, rank in steps])
+
+    def _sa_new_state(self, length, link, transitions=None):
+        self._sa_next.append(dict(transitions) if transitions else {})
+        self._sa_link.append(link)
+        self._sa_len.append(length)
+        return len(self._sa_next) - 1
+
+    def _sa_clone(self, p, q, char):
+        clone = self._sa_new_state(self._sa_len[p] + 1, self._sa_link[q], self._sa_next[q])
+        while p != -1 and self._sa_next[p].get(char) == q:
+            self._sa_next[p][char] = clone
+            p = self._sa_link[p]
+        self._sa_link[q] = clone
+        return clone
+
+    def _sa_extend(self, last, char):
+        nxt, link, length = self._sa_next, self._sa_link, self._sa_len
+
+        if char in nxt[last]:
+            q = nxt[last][char]
+            if length[last] + 1 == length[q]:
+                return q
+            return self._sa_clone(last, q, char)
+
+        cur = self._sa_new_state(length[last] + 1, 0)
+        p = last
+        while p != -1 and char not in nxt[p]:
+            nxt[p][char] = cur
+            p = link[p]
+        if p != -1:
+            q = nxt[p][char]
+            if length[p] + 1 == length[q]:
+                link[cur] = q
+            else:
+                link[cur] = self._sa_clone(p, q, char)
+        return cur
+
+    def _rank_containing(self, text, as_of=None):
+        state = 0
+        for char in text:
+            state = self._sa_next[state].get(char)
+            if state is None:
+                return len(self.records)
+        if as_of is not None and state in self._sa_since:
+            return self._rank_on(self._sa_since, self._sa_rank, state, as_of)
+        return self._sa_rank[state]
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+#
+# src/toponymic_store.py
+#
+# Last Updated: October 16, 2026
+#
+# External toponymic database files and their compiled snapshots.
+#
+# The database lives in data/toponymic_database.json (or a CSV export of it)
+# so renamings can be added without touching code. Loading validates every
+# record. The compiled ToponymicIndex is pickled into a snapshot named after
+# the SHA-256 of the source file, so a process whose source is unchanged
+# skips parsing, validation and the automaton build and just unpickles the
+# snapshot. Snapshots are build artifacts: they live in data/snapshots/
+# (ignored by git) and are rebuilt whenever they are missing or stale.
+#
+
+import argparse
+import csv
+import json
+import os
+import pickle
+import re
+import sys
+
+from custody_log import file_sha256
+from toponymic_index import INDEX_FORMAT, ToponymicIndex
+
+DEFAULT_DATABASE_FILE = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                      '..', 'data', 'toponymic_database.json'))
+SNAPSHOT_DIRECTORY_NAME = 'snapshots'
+# First line of a snapshot, before the pickle: magic, index format, source hash
+SNAPSHOT_MAGIC = b'toponymic-snapshot'
+
+# Field order is also the column order of CSV exports.
+RECORD_FIELDS = [
+    'ukrainian_name', 'ukrainian_transliteration',
+    'occupation_name', 'occupation_transliteration',
+    'renaming_date', 'renaming_authority',
+    'cultural_significance', 'strategic_importance',
+    'demolition_status', 'new_construction_address',
+    'address_manipulation_tactic', 'legal_impact', 'war_crimes_evidence',
+]
+SEARCH_FIELDS = ['occupation_name', 'new_construction_address', 'ukrainian_name']
+CSV_KEY_COLUMNS = ['district', 'street_id']
+RENAMING_DATE = re.compile(r'^\d{4}-(0[1-9]|1[0-2])(-(0[1-9]|[12]\d|3[01]))?$')
+
+
+class ToponymicDatabaseError(ValueError):
+    """
+    A database file that failed validation. Every problem found is listed
+    in errors, not just the first.
+    """
+
+    def __init__(self, path, errors):
+        self.path = path
+        self.errors = errors
+        super().__init__(f"{path}: {len(errors)} invalid entries:\n  " + '\n  '.join(errors))
+
+
+def _read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _read_csv(path):
+    """
+    One row per street: district, street_id and the record fields. Empty
+    cells are left out of the record, as absent keys are in the JSON form.
+    """
+    database = {}
+    duplicates = []
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for line_number, row in enumerate(csv.DictReader(f), 2):
+            district = (row.pop('district', None) or '').strip()
+            street_id = (row.pop('street_id', None) or '').strip()
+            streets = database.setdefault(district, {})
+            if street_id in streets:
+                duplicates.append(f"line {line_number}: duplicate street {district}/{street_id}")
+            streets[street_id] = {field: value for field, value in row.items() if value}
+    if duplicates:
+        raise ToponymicDatabaseError(path, duplicates)
+    return database
+
+
+def validate_database(database):
+    """
+    Returns the list of problems in a database: every district must map
+    street ids to records of known string fields with a Ukrainian name, a
+    renaming date must be YYYY-MM or YYYY-MM-DD, and no search term may
+    belong to two streets (only the first could ever be matched).
+    """
+    if not isinstance(database, dict):
+        return ['the database must map district names to streets']
+    errors = []
+    term_owner = {}
+    for district, streets in database.items():
+        if not district:
+            errors.append('empty district name')
+        if not isinstance(streets, dict):
+            errors.append(f"{district}: must map street ids to records")
+            continue
+        for street_id, record in streets.items():
+            where = f"{district}/{street_id}"
+            if not street_id:
+                errors.append(f"{district}: empty street id")
+            if not isinstance(record, dict):
+                errors.append(f"{where}: record must be an object")
+                continue
+            unknown = sorted(set(record) - set(RECORD_FIELDS))
+            if unknown:
+                errors.append(f"{where}: unknown fields {', '.join(unknown)}")
+            for field, value in record.items():
+                if not isinstance(value, str):
+                    errors.append(f"{where}: {field} must be a string")
+            if not str(record.get('ukrainian_name') or '').strip():
+                errors.append(f"{where}: missing ukrainian_name")
+            renaming_date = record.get('renaming_date')
+            if isinstance(renaming_date, str) and not RENAMING_DATE.match(renaming_date):
+                errors.append(f"{where}: renaming_date {renaming_date!r} is not YYYY-MM or YYYY-MM-DD")
+            for field in SEARCH_FIELDS:
+                term = record.get(field)
+                if not isinstance(term, str) or not term.strip():
+                    continue
+                owner = term_owner.setdefault(term.lower().strip(), where)
+                if owner != where:
+                    errors.append(f"{where}: {field} {term!r} already belongs to {owner}")
+    return errors
+
+
+def load_database(path=DEFAULT_DATABASE_FILE):
+    """
+    Reads and validates a database file (.json, or .csv with district and
+    street_id columns). Raises ToponymicDatabaseError listing every problem.
+    """
+    database = _read_csv(path) if path.lower().endswith('.csv') else _read_json(path)
+    errors = validate_database(database)
+    if errors:
+        raise ToponymicDatabaseError(path, errors)
+    return database
+
+
+def write_database(database, path):
+    """
+    Writes a database as JSON or, for a .csv path, as one row per street.
+    """
+    temp_file = f"{path}.tmp"
+    if path.lower().endswith('.csv'):
+        with open(temp_file, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, CSV_KEY_COLUMNS + RECORD_FIELDS)
+            writer.writeheader()
+            for district, streets in database.items():
+                for street_id, record in streets.items():
+                    writer.writerow({'district': district, 'street_id': street_id, **record})
+    else:
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(database, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+    os.replace(temp_file, path)
+
+
+# --- Snapshot Section ---
+
+def snapshot_path(path, source_sha256, snapshot_dir=None):
+    """
+    Snapshot file of a database source with the given content hash. The
+    index format is part of the name, so a changed ToponymicIndex never
+    loads a snapshot pickled by an older version.
+    """
+    directory = snapshot_dir or os.path.join(os.path.dirname(os.path.abspath(path)), SNAPSHOT_DIRECTORY_NAME)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(directory, f"{stem}-{source_sha256[:16]}-v{INDEX_FORMAT}.pickle")
+
+
+def _snapshot_header(source_sha256):
+    return b' '.join([SNAPSHOT_MAGIC, str(INDEX_FORMAT).encode(), source_sha256.encode()]) + b'\n'
+
+
+def _read_snapshot(snapshot_file, source_sha256):
+    """
+    The pickled index, or None when the snapshot is missing or stale. The
+    header is checked before anything is unpickled, so a snapshot of another
+    source or index format is never deserialized.
+    """
+    expected = _snapshot_header(source_sha256)
+    try:
+        with open(snapshot_file, 'rb') as f:
+            if f.readline(len(expected)) != expected:
+                return None
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError) as e:
+        print(f"Warning: Ignoring unreadable toponymic snapshot {snapshot_file}: {e}")
+        return None
+
+
+def _write_snapshot(snapshot_file, source_sha256, index):
+    temp_file = f"{snapshot_file}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(snapshot_file), exist_ok=True)
+        with open(temp_file, 'wb') as f:
+            f.write(_snapshot_header(source_sha256))
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, snapshot_file)
+    except OSError as e:
+        # A read-only checkout still works; it just compiles on every start.
+        print(f"Warning: Could not write toponymic snapshot {snapshot_file}: {e}")
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+
+def load_index(path=DEFAULT_DATABASE_FILE, snapshot_dir=None):
+    """
+    Returns the compiled ToponymicIndex of a database file, from its snapshot
+    when one matches the file's current contents, otherwise by loading,
+    validating and compiling the file and saving a snapshot for next time.
+    The index's version is the content hash of the database itself.
+    """
+    source_sha256 = file_sha256(path)
+    snapshot_file = snapshot_path(path, source_sha256, snapshot_dir)
+    index = _read_snapshot(snapshot_file, source_sha256)
+    if index is None:
+        index = ToponymicIndex(load_database(path))
+        _write_snapshot(snapshot_file, source_sha256, index)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate a toponymic database file and compile its snapshot')
+    parser.add_argument('database', nargs='?', default=DEFAULT_DATABASE_FILE, help='Database .json or .csv')
+    parser.add_argument('--snapshot-dir', default=None, help='Snapshot directory (default: snapshots/ next to the file)')
+    parser.add_argument('--export', default=None, help='Also write the database to this .json or .csv path')
+    args = parser.parse_args()
+
+    try:
+        index = load_index(args.database, args.snapshot_dir)
+    except ToponymicDatabaseError as e:
+        print(f"Error: {e}")
+        return 1
+    streets = len(index.records)
+    districts = len(index.source)
+    print(f"{args.database}: {streets} streets in {districts} districts, version {index.version}")
+    print(f"Snapshot: {snapshot_path(args.database, file_sha256(args.database), args.snapshot_dir)}")
+    if args.export:
+        write_database(index.source, args.export)
+        print(f"Exported to {args.export}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())